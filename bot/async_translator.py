@@ -0,0 +1,169 @@
+# bot/async_translator.py
+import asyncio
+import threading
+import weakref
+from typing import Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from openai import AsyncOpenAI
+
+from myproject import http_client
+
+from .cache import acache_call
+from .intent import record_path
+from .langdetect import record_detection
+from .translator import AITranslatorChatbot
+
+
+class AsyncAITranslatorChatbot(AITranslatorChatbot):
+    """
+    Async variant of AITranslatorChatbot for the ASGI views. OpenAI and Google calls are
+    awaited (AsyncOpenAI / httpx) instead of blocking a worker thread; local parsing,
+    caching and output formatting are shared with the sync class.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._async_openai_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def async_openai_client(self) -> AsyncOpenAI:
+        # AsyncOpenAI pools connections on the event loop that first uses it
+        loop = asyncio.get_running_loop()
+        client = self._async_openai_clients.get(loop)
+        if client is None:
+            client = self._async_openai_clients[loop] = AsyncOpenAI(api_key=self.openai_api_key)
+        return client
+
+    async def aclose_openai_client(self):
+        """Close the running loop's AsyncOpenAI client (see myproject.http_client.aclose_client)."""
+        client = self._async_openai_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    async def aget_normal_reply(self, user_input: str, history: Optional[List[Dict]] = None) -> str:
+        ai_reply = await self.aget_ai_reply(user_input, history=history)
+        if ai_reply:
+            return ai_reply
+        return f"I received your message: {user_input}"
+
+    async def aget_ai_reply(self, user_input: str, temperature: float = 0.6, max_tokens: int = 512, history: Optional[List[Dict]] = None) -> str:
+        """Async get_ai_reply: a sanitized conversational reply, or None on errors."""
+        try:
+            response = await self.async_openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=self._chat_messages(user_input, history),
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return self.finalize_ai_reply(response.choices[0].message.content)
+        except Exception:
+            return None
+
+    async def adetect_language(self, text: str) -> str:
+        local_code, local_confidence = self.language_detector.detect(text)
+        if local_code and local_confidence >= self.local_detect_confidence:
+            record_detection('local')
+            return local_code
+        try:
+            url, data = self._detect_request(text)
+            response = await http_client.apost(url, endpoint='google.detect', data=data)
+            if response.status_code == 200:
+                return self._read_detection(response.json())
+        except Exception:
+            pass
+        return self._offline_detection(local_code, local_confidence)
+
+    async def aparse_request(self, user_input: str) -> Dict:
+        local_result = self.intent_parser.parse(user_input)
+        if local_result['confidence'] >= self.intent_fast_path_confidence:
+            record_path('local')
+            return local_result
+        record_path('llm')
+        return await self.aparse_with_ai(user_input)
+
+    async def aparse_with_ai(self, user_input: str) -> Dict:
+        try:
+            response = await self.async_openai_client.chat.completions.create(**self._parse_completion_kwargs(user_input))
+            return self._read_parse(response.choices[0].message.content, user_input)
+        except Exception:
+            record_path('llm_fallback')
+            # fallback_parse may call OpenAI synchronously for text extraction
+            return await sync_to_async(self.fallback_parse, thread_sensitive=False)(user_input)
+
+    async def atranslate_text(self, text: str, target_language_code: str, source_language_code: str = 'auto') -> dict:
+        try:
+            if len(text) > self.translation_chunk_chars:
+                text_chunks = self.split_text_into_chunks(text, self.translation_chunk_chars)
+                chunk_results, parallelism, failure = await self._atranslate_chunks(text_chunks, target_language_code, source_language_code)
+                if failure:
+                    return failure
+                return self._join_chunk_results(chunk_results, target_language_code, parallelism)
+            else:
+                return self._single_chunk_result(await self._atranslate_single_chunk(text, target_language_code, source_language_code))
+        except Exception as e:
+            return self._translation_failure(f"Translation failed: {str(e)}")
+
+    async def _atranslate_chunks(self, chunks: List[str], target_language_code: str, source_language_code: str = 'auto'):
+        """Async _translate_chunks: at most translation_chunk_workers requests in flight, cancelled on first failure."""
+        parallelism = max(1, min(self.translation_chunk_workers, len(chunks)))
+        semaphore = asyncio.Semaphore(parallelism)
+
+        async def translate_chunk(chunk):
+            async with semaphore:
+                return await self._atranslate_single_chunk(chunk, target_language_code, source_language_code)
+
+        tasks = [asyncio.ensure_future(translate_chunk(chunk)) for chunk in chunks]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if not result['success']:
+                    return None, parallelism, result
+        finally:
+            for task in tasks:
+                task.cancel()
+        return [task.result() for task in tasks], parallelism, None
+
+    async def _atranslate_single_chunk(self, text: str, target_language_code: str, source_language_code: str = 'auto') -> dict:
+        cached = await acache_call(self._cached_chunk, text, target_language_code, source_language_code)
+        if cached is not None:
+            return cached
+        try:
+            url, data = self._translate_request(text, target_language_code, source_language_code)
+            response = await http_client.apost(url, endpoint='google.translate', data=data)
+            if response.status_code == 200:
+                return await acache_call(self._read_translation, response.json(), text, target_language_code, source_language_code)
+            return self._translation_failure(f"Translation API failed: {response.status_code}")
+        except Exception as e:
+            return self._translation_failure(f"Translation failed: {str(e)}")
+
+    async def aprocess_translation(self, text: str, target_language_code: str, target_language_name: str) -> dict:
+        if not text or not text.strip():
+            return self.create_json_output("", "", "", "", "", "", False, "No text provided to translate")
+        clean_text = text.strip()
+        # Phrasebook and memory lookups may hit the database, which the ORM only allows from sync code
+        translation_result = await sync_to_async(self._stored_translation)(clean_text, target_language_code)
+        if translation_result is None:
+            translation_result = await self.atranslate_text(clean_text, target_language_code)
+        return self._format_translation_result(clean_text, translation_result, target_language_code, target_language_name)
+
+
+_async_translator = None
+_async_translator_lock = threading.Lock()
+
+
+def get_async_translator() -> AsyncAITranslatorChatbot:
+    """Return the process-wide async translator, building it on first use (raises ValueError like get_translator)."""
+    global _async_translator
+    if _async_translator is None:
+        with _async_translator_lock:
+            if _async_translator is None:
+                _async_translator = AsyncAITranslatorChatbot()
+    return _async_translator
+
+
+def reset_async_translator():
+    """Drop the shared async translator so the next call builds a fresh one (used by tests)."""
+    global _async_translator
+    with _async_translator_lock:
+        _async_translator = None
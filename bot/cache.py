@@ -0,0 +1,154 @@
+# bot/cache.py
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache lookups: NFC and collapsed whitespace. Case is kept, since it can change the translation."""
+    t = unicodedata.normalize('NFC', text)
+    return _WHITESPACE_RE.sub(' ', t).strip()
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache: a bounded in-process LRU with TTL in front of
+    an optional shared tier backed by Django's cache framework.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl: int = 86400, shared_alias: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    def make_key(self, text: str, target: str, source: str = 'auto', namespace: str = 'text') -> tuple:
+        return (namespace, source or 'auto', target, normalize_text(text))
+
+    def _shared_key(self, key: tuple) -> str:
+        namespace, source, target, normalized = key
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return f"tr:{namespace}:{source}:{target}:{digest}"
+
+    def _shared(self):
+        if not self.shared_alias:
+            return None
+        try:
+            return caches[self.shared_alias]
+        except Exception:
+            return None
+
+    def _incr(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, text: str, target: str, source: str = 'auto', namespace: str = 'text') -> Optional[Any]:
+        key = self.make_key(text, target, source, namespace)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return value
+                del self._entries[key]
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                value = shared.get(self._shared_key(key))
+            except Exception:
+                value = None
+            if value is not None:
+                self._store(key, value)
+                self._incr('shared_hits')
+                return value
+
+        self._incr('misses')
+        return None
+
+    def set(self, text: str, target: str, value: Any, source: str = 'auto', namespace: str = 'text'):
+        if value is None:
+            return
+        key = self.make_key(text, target, source, namespace)
+        self._store(key, value)
+        self._incr('sets')
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(self._shared_key(key), value, self.ttl)
+            except Exception:
+                pass
+
+    def _store(self, key: tuple, value: Any):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters['hits'] + counters['shared_hits'] + counters['misses']
+        hit_rate = (counters['hits'] + counters['shared_hits']) / lookups if lookups else 0.0
+        return {
+            **counters,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'shared': bool(self.shared_alias),
+            'hit_rate': round(hit_rate, 4),
+        }
+
+
+_translation_cache = None
+_translation_cache_lock = threading.Lock()
+
+
+def get_translation_cache() -> TranslationCache:
+    """Return the process-wide translation cache, creating it from settings on first use."""
+    global _translation_cache
+    if _translation_cache is None:
+        with _translation_cache_lock:
+            if _translation_cache is None:
+                _translation_cache = TranslationCache(
+                    max_entries=getattr(settings, 'TRANSLATION_CACHE_SIZE', 5000),
+                    ttl=getattr(settings, 'TRANSLATION_CACHE_TTL', 86400),
+                    shared_alias='default' if getattr(settings, 'TRANSLATION_CACHE_SHARED', False) else None,
+                )
+    return _translation_cache
+
+
+async def acache_call(func, *args, **kwargs):
+    """
+    Await func(*args, **kwargs), a call that reads or writes the translation cache, from async code.
+    With the shared tier on, that is a network round trip (Redis, memcached), so it runs in a
+    worker thread instead of blocking the event loop; the in-process tier alone is called inline.
+    """
+    if get_translation_cache().shared_alias:
+        return await sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+    return func(*args, **kwargs)
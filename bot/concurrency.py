@@ -0,0 +1,108 @@
+# bot/concurrency.py
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+
+_executor = None
+_executor_lock = threading.Lock()
+_counts = {'calls': 0, 'timeouts': 0, 'errors': 0}
+_counts_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool that request scopes run their side calls on."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'CHAT_FANOUT_WORKERS', 16),
+                    thread_name_prefix='request-scope',
+                )
+    return _executor
+
+
+def _count(name: str):
+    with _counts_lock:
+        _counts[name] += 1
+
+
+class RequestScope:
+    """
+    Runs the side calls of one request (such as language detection) on the shared pool while
+    the request thread makes its main call, under a shared deadline. The pool is small, so the
+    main call should not go through it. submit() starts a call right away; result() waits for
+    it only as long as the deadline allows and returns `default` if it times out or raises,
+    so the request always answers.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        if timeout is None:
+            timeout = getattr(settings, 'CHAT_REQUEST_DEADLINE', 20.0)
+        self.deadline = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        _count('calls')
+        return get_executor().submit(fn, *args, **kwargs)
+
+    def result(self, future: Future, default: Any = None) -> Any:
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeoutError:
+            # The call keeps running in the pool; its result is simply not waited for
+            _count('timeouts')
+            return default
+        except Exception:
+            _count('errors')
+            return default
+
+    async def aresult(self, awaitable, default: Any = None) -> Any:
+        """Async counterpart of result(): awaits a coroutine within the remaining deadline."""
+        _count('calls')
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            _count('timeouts')
+            return default
+        except Exception:
+            _count('errors')
+            return default
+
+    async def agather(self, *calls) -> list:
+        """Run (awaitable, default) pairs concurrently and return their results in order."""
+        return await asyncio.gather(*(self.aresult(awaitable, default) for awaitable, default in calls))
+
+
+def fanout_stats() -> Dict:
+    with _counts_lock:
+        return dict(_counts)
+
+
+_speculation = {'started': 0, 'used': 0, 'cancelled': 0, 'wasted': 0, 'wasted_tokens_est': 0}
+
+
+def record_speculation(outcome: str, tokens: int = 0):
+    with _counts_lock:
+        _speculation[outcome] += 1
+        if outcome == 'wasted':
+            _speculation['wasted_tokens_est'] += tokens
+
+
+def estimate_tokens(*texts: str) -> int:
+    # ~4 characters per token; good enough to track the cost trend of speculation
+    return sum(len(t or '') for t in texts) // 4
+
+
+def speculation_stats() -> Dict:
+    with _counts_lock:
+        counts = dict(_speculation)
+    resolved = counts['used'] + counts['cancelled'] + counts['wasted']
+    counts['waste_ratio'] = round((counts['cancelled'] + counts['wasted']) / resolved, 4) if resolved else 0.0
+    return counts
@@ -0,0 +1,143 @@
+# bot/conversation.py
+import hashlib
+import secrets
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from .concurrency import estimate_tokens
+from .models import Conversation
+
+
+def _signer() -> signing.Signer:
+    return signing.Signer(salt='bot.conversation')
+
+
+def _is_authenticated(user) -> bool:
+    return user is not None and getattr(user, 'is_authenticated', False)
+
+
+def issue_session_id() -> str:
+    """A new anonymous session id, signed so a client can only resume sessions the server handed out."""
+    return _signer().sign(secrets.token_urlsafe(16))
+
+
+def session_for(user, session_id: Optional[str]) -> Optional[str]:
+    """
+    The session_id to use for this request and return to the client. Signed-in users' conversations
+    are keyed by user, so any id will do; an anonymous client's id must be one we issued, and
+    anything else (missing, guessed, forged or from before ids were signed) starts a new session.
+    """
+    if _is_authenticated(user):
+        return session_id or None
+    if not session_id:
+        return issue_session_id()
+    try:
+        _signer().unsign(session_id)
+        return session_id
+    except signing.BadSignature:
+        return issue_session_id()
+
+
+def conversation_key(user, session_id: Optional[str] = None) -> Optional[str]:
+    """Signed-in users get one conversation per session_id; anonymous clients need a server-issued session_id."""
+    if _is_authenticated(user):
+        # Hashed so any client-chosen session_id fits Conversation.key
+        session_hash = hashlib.sha256(session_id.encode('utf-8')).hexdigest() if session_id else ''
+        return f"user:{user.pk}:{session_hash}"
+    if session_id:
+        try:
+            return f"session:{_signer().unsign(session_id)}"
+        except signing.BadSignature:
+            return None
+    return None
+
+
+def _expired_before():
+    ttl = getattr(settings, 'CONVERSATION_TTL', 0)
+    return timezone.now() - timedelta(seconds=ttl) if ttl else None
+
+
+def purge_expired() -> int:
+    """Delete conversations idle for longer than CONVERSATION_TTL. Returns the number removed."""
+    cutoff = _expired_before()
+    if cutoff is None:
+        return 0
+    deleted, _ = Conversation.objects.filter(updated_at__lt=cutoff).delete()
+    return deleted
+
+
+def _summarize_turn(turn: Dict) -> str:
+    # Older turns are kept as short one-line notes; the recent ring buffer keeps full text
+    content = ' '.join(turn['content'].split())
+    limit = getattr(settings, 'CONVERSATION_SUMMARY_LINE_CHARS', 160)
+    if len(content) > limit:
+        content = content[:limit].rstrip() + '…'
+    return f"{turn['role']}: {content}"
+
+
+def load_context(key: Optional[str]) -> List[Dict]:
+    """
+    Return the chat messages to send ahead of the new user message: the rolling summary
+    (if any) and as many recent turns as fit CONVERSATION_TOKEN_BUDGET, newest kept first.
+    """
+    if not key:
+        return []
+    conversations = Conversation.objects.filter(key=key)
+    cutoff = _expired_before()
+    if cutoff is not None:
+        # Expired but not yet purged: treat as gone
+        conversations = conversations.filter(updated_at__gte=cutoff)
+    conversation = conversations.only('summary', 'turns').first()
+    if conversation is None:
+        return []
+
+    budget = getattr(settings, 'CONVERSATION_TOKEN_BUDGET', 1200)
+    messages = []
+    if conversation.summary:
+        summary = {"role": "system", "content": f"Summary of the earlier conversation:\n{conversation.summary}"}
+        budget -= estimate_tokens(summary['content'])
+        messages.append(summary)
+
+    recent = []
+    for turn in reversed(conversation.turns):
+        cost = estimate_tokens(turn['content']) + 4
+        if cost > budget:
+            break
+        budget -= cost
+        recent.append({"role": turn['role'], "content": turn['content']})
+    messages.extend(reversed(recent))
+    return messages
+
+
+def record_turn(key: Optional[str], user_input: str, reply: str):
+    """Append a user/assistant exchange; turns pushed out of the ring buffer are folded into the summary."""
+    if not key:
+        return
+    max_turns = getattr(settings, 'CONVERSATION_MAX_TURNS', 12)
+    max_summary = getattr(settings, 'CONVERSATION_SUMMARY_CHARS', 1500)
+    with transaction.atomic():
+        conversation, _ = Conversation.objects.select_for_update().get_or_create(key=key)
+        cutoff = _expired_before()
+        if cutoff is not None and conversation.updated_at < cutoff:
+            conversation.summary, conversation.turns = '', []
+        turns = conversation.turns + [
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": reply},
+        ]
+        if len(turns) > max_turns:
+            evicted, turns = turns[:-max_turns], turns[-max_turns:]
+            lines = [conversation.summary] if conversation.summary else []
+            lines.extend(_summarize_turn(turn) for turn in evicted)
+            summary = '\n'.join(lines)
+            if len(summary) > max_summary:
+                # Drop the oldest notes first, cutting at a line boundary
+                summary = summary[-max_summary:]
+                summary = summary[summary.find('\n') + 1:] if '\n' in summary else summary
+            conversation.summary = summary
+        conversation.turns = turns
+        conversation.save(update_fields=['summary', 'turns', 'updated_at'])
@@ -0,0 +1,106 @@
+# bot/intent.py
+import re
+import threading
+from typing import Dict, Optional
+
+# Same markers ChatView uses to decide whether a translation was explicitly asked for
+TRANSLATION_KEYWORDS = ['translate', 'translat', 'traduir', 'অনুবাদ', 'ترجم', 'traduire', 'how do you say']
+EXPLICIT_MARKER_RE = re.compile(r'\b(?:to|in|into)\s+[A-Za-z]+', re.IGNORECASE)
+
+# Language names are one to three words at the end of the sentence, e.g. "chinese (simplified)"
+_LANG = r'([A-Za-z()]+(?:\s+[A-Za-z()]+){0,2})'
+_END = r'\s*[.?!]*\s*$'
+_QUOTES = '"\'“”‘’«»'
+
+# (pattern, group index of text, group index of language)
+UNAMBIGUOUS_PATTERNS = [
+    # "translate good morning to French", "please translate 'thank you' into German"
+    (re.compile(r'^(?:please\s+|can\s+you\s+|could\s+you\s+|kindly\s+)*translate\s+(.+)\s+(?:to|into|in)\s+' + _LANG + _END, re.IGNORECASE | re.DOTALL), 1, 2),
+    # "translate to French: good morning"
+    (re.compile(r'^(?:please\s+|can\s+you\s+|could\s+you\s+|kindly\s+)*translate\s+(?:to|into|in)\s+' + _LANG + r'\s*[:\-]\s*(.+?)\s*$', re.IGNORECASE | re.DOTALL), 2, 1),
+    # "how do you say thank you in Japanese?"
+    (re.compile(r'^how\s+do\s+(?:you|i)\s+say\s+(.+)\s+in\s+' + _LANG + _END, re.IGNORECASE | re.DOTALL), 1, 2),
+]
+# "good morning in Japanese" — also matches "I am fluent in French", so never trusted on its own
+IMPLICIT_PATTERN = re.compile(r'^(.+)\s+in\s+' + _LANG + _END, re.IGNORECASE | re.DOTALL)
+
+
+def _not_translation(confidence: float) -> Dict:
+    return {
+        'is_translation_request': False,
+        'text': None,
+        'target_language_code': None,
+        'target_language_name': None,
+        'confidence': confidence
+    }
+
+
+class LocalIntentParser:
+    """
+    Deterministic intent parser based on the fallback_parse rules.
+    Returns the parse_with_ai result shape; `confidence` tells the caller whether it can skip the LLM.
+    """
+
+    def __init__(self, supported_languages: Dict[str, str], resolver):
+        self.supported_languages = supported_languages
+        self.resolver = resolver
+
+    def resolve_language(self, name: str) -> Optional[str]:
+        # Exact names, aliases and endonyms only; typo correction is left to the LLM path
+        return self.resolver.resolve_exact(name, allow_codes=False)
+
+    def _translation(self, text: str, code: str, confidence: float) -> Optional[Dict]:
+        text = text.strip().strip(_QUOTES).strip()
+        if not text:
+            return None
+        return {
+            'is_translation_request': True,
+            'text': text,
+            'target_language_code': code,
+            'target_language_name': self.supported_languages[code],
+            'confidence': confidence
+        }
+
+    def parse(self, user_input: str) -> Dict:
+        text = user_input.strip()
+        lowered = text.lower()
+        has_keyword = any(keyword in lowered for keyword in TRANSLATION_KEYWORDS)
+        if not has_keyword and not EXPLICIT_MARKER_RE.search(text):
+            # ChatView answers these as normal chat whatever the LLM says
+            return _not_translation(1.0)
+
+        for pattern, text_group, lang_group in UNAMBIGUOUS_PATTERNS:
+            m = pattern.match(text)
+            if m:
+                code = self.resolve_language(m.group(lang_group))
+                if code:
+                    result = self._translation(m.group(text_group), code, 0.95)
+                    if result:
+                        return result
+
+        m = IMPLICIT_PATTERN.match(text)
+        if m:
+            code = self.resolve_language(m.group(2))
+            if code:
+                result = self._translation(m.group(1), code, 0.7)
+                if result:
+                    return result
+
+        return _not_translation(0.3 if has_keyword else 0.5)
+
+
+_path_counts = {'local': 0, 'llm': 0, 'llm_fallback': 0}
+_path_lock = threading.Lock()
+
+
+def record_path(name: str):
+    with _path_lock:
+        _path_counts[name] = _path_counts.get(name, 0) + 1
+
+
+def path_stats() -> Dict:
+    with _path_lock:
+        counts = dict(_path_counts)
+    total = counts['local'] + counts['llm']
+    counts['local_ratio'] = round(counts['local'] / total, 4) if total else 0.0
+    return counts
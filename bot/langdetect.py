@@ -0,0 +1,223 @@
+# bot/langdetect.py
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+# (first, last code point, script) — scripts that map to one language (or a small family)
+SCRIPT_RANGES = [
+    (0x0370, 0x03FF, 'Greek'), (0x0400, 0x04FF, 'Cyrillic'), (0x0530, 0x058F, 'Armenian'),
+    (0x0590, 0x05FF, 'Hebrew'), (0x0600, 0x06FF, 'Arabic'), (0x0750, 0x077F, 'Arabic'),
+    (0x0780, 0x07BF, 'Thaana'), (0x0900, 0x097F, 'Devanagari'), (0x0980, 0x09FF, 'Bengali'),
+    (0x0A00, 0x0A7F, 'Gurmukhi'), (0x0A80, 0x0AFF, 'Gujarati'), (0x0B00, 0x0B7F, 'Oriya'),
+    (0x0B80, 0x0BFF, 'Tamil'), (0x0C00, 0x0C7F, 'Telugu'), (0x0C80, 0x0CFF, 'Kannada'),
+    (0x0D00, 0x0D7F, 'Malayalam'), (0x0D80, 0x0DFF, 'Sinhala'), (0x0E00, 0x0E7F, 'Thai'),
+    (0x0E80, 0x0EFF, 'Lao'), (0x0F00, 0x0FFF, 'Tibetan'), (0x1000, 0x109F, 'Myanmar'),
+    (0x10A0, 0x10FF, 'Georgian'), (0x1100, 0x11FF, 'Hangul'), (0x1200, 0x139F, 'Ethiopic'),
+    (0x1780, 0x17FF, 'Khmer'), (0x3040, 0x309F, 'Kana'), (0x30A0, 0x30FF, 'Kana'),
+    (0x3400, 0x4DBF, 'Han'), (0x4E00, 0x9FFF, 'Han'), (0xAC00, 0xD7AF, 'Hangul'),
+    (0xFB50, 0xFDFF, 'Arabic'), (0xFE70, 0xFEFF, 'Arabic'),
+]
+
+SCRIPT_LANGUAGE = {
+    'Greek': 'el', 'Armenian': 'hy', 'Hebrew': 'he', 'Thaana': 'dv', 'Devanagari': 'hi', 'Bengali': 'bn',
+    'Gurmukhi': 'pa', 'Gujarati': 'gu', 'Oriya': 'or', 'Tamil': 'ta', 'Telugu': 'te', 'Kannada': 'kn',
+    'Malayalam': 'ml', 'Sinhala': 'si', 'Thai': 'th', 'Lao': 'lo', 'Tibetan': 'bo', 'Myanmar': 'my',
+    'Georgian': 'ka', 'Hangul': 'ko', 'Ethiopic': 'am', 'Khmer': 'km', 'Kana': 'ja', 'Han': 'zh-CN',
+    'Arabic': 'ar', 'Cyrillic': 'ru',
+}
+
+# Scripts shared by several languages; a hit on a marker letter picks the language,
+# otherwise the script default is used, with confidence growing as more letters go by without a marker.
+SCRIPT_MARKERS = {
+    'Arabic': [('ur', 'ٹڈڑںےۓھہ'), ('fa', 'پچژگی'), ('ps', 'ټډړږښځ'), ('ug', 'ۆۈۋې'), ('sd', 'ڄڃڀٺٽڦ'), ('ar', 'ةىيك')],
+    'Cyrillic': [('uk', 'іїєґ'), ('be', 'ў'), ('sr', 'ђјљњћџ'), ('mk', 'ѓќѕ'), ('kk', 'әғқңұһ'), ('mn', 'өү'), ('ru', 'ыэё'), ('bg', 'ъ')],
+    'Devanagari': [('mr', 'ळ')],
+    'Hebrew': [('yi', 'ײַױ')],
+}
+
+# Seed vocabulary for the Latin-script model: each language's most frequent words.
+# Their character trigrams form a compact per-language profile at startup.
+LATIN_SEED_WORDS = {
+    'en': 'the and of to in is you that it he was for on are with as his they be at one have this from '
+          'or had by not but what all were we when your can said there use an each which she do how their '
+          'if will about out many then them these so some her would make like him into time has look two '
+          'more write go see number no way could people my than first been call who its now find where '
+          'please thank thanks hello good morning night want need help',
+    'es': 'de la que el en y a los se del las un por con no una su para es al lo como más pero sus le ya '
+          'o este sí porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo '
+          'nos durante todos uno les ni contra otros ese eso ante ellos e esto mí antes algunos qué unos '
+          'yo otro otras otra él tanto esa estos mucho quienes nada muchos cual poco ella estar estas '
+          'hola gracias buenos días por favor quiero necesito dónde está cuánto cuesta',
+    'fr': 'de la le et les des en un du une que est pour qui dans par plus pas au sur ne se ce il sont '
+          'avec ou son mais comme on tout nous elle été aux leur cette ses deux même ils lui fait très '
+          'entre aussi où bien sans peut tous après ont donc encore avoir je vous être faire ça merci '
+          'bonjour bonsoir veux besoin combien est-ce parce toujours rien quand chez voilà',
+    'de': 'der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an '
+          'werden aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum '
+          'war haben nur oder aber vor zur bis mehr durch man sein wurde sei ich du wir ihr mich dich '
+          'danke bitte hallo guten morgen wo ist wie viel kostet möchte brauche',
+    'it': 'di e il la che in a per un è del non sono una le si con da al dei come più lo ma gli ha anche '
+          'nel alla delle questo o se ci ne della perché quando essere io tu lui lei noi voi loro molto '
+          'ciao grazie buongiorno buonasera prego dove quanto costa voglio vorrei bisogno sempre tutto',
+    'pt': 'de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele '
+          'das tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela '
+          'entre era depois sem mesmo aos ter seus quem nas me esse eles estão você vocês obrigado '
+          'obrigada olá bom dia boa noite onde quanto custa quero preciso',
+    'nl': 'de en van ik te dat die in een hij het niet zijn is was op aan met als voor had er maar om hem '
+          'dan zou of wat mijn men dit zo door over ze zich bij ook tot je mij uit der daar haar naar '
+          'heb hoe heeft hebben deze u want nog zal me zij nu ge geen omdat iets worden toch al waren '
+          'dank bedankt hallo goedemorgen alstublieft waar hoeveel kost wil graag',
+    'id': 'yang dan di itu dengan untuk tidak ini dari dalam akan pada juga saya ke karena tersebut bisa '
+          'ada mereka lebih kata tahun sudah atau saat oleh menjadi orang kami bahwa hanya kita sangat '
+          'terima kasih selamat pagi malam tolong mau ingin berapa harga dimana apa bagaimana',
+    'tr': 'bir ve bu da de için ile çok ne o ben sen ama daha gibi var olarak kadar sonra en değil her '
+          'mi mu olan şey ya iki nasıl ki kendi şimdi yok ise biz siz onlar benim teşekkür ederim '
+          'merhaba günaydın lütfen nerede ne kadar istiyorum ihtiyacım',
+    'pl': 'i w nie na się z do to że jest o jak ale po co tak za od go już jego jej ich mnie może przez '
+          'tylko dla czy ten był być bardzo gdzie jestem masz dziękuję proszę dzień dobry cześć ile '
+          'kosztuje chcę potrzebuję',
+    'sv': 'och i att det som en på är av för med till den har de inte om ett han men var jag sig från '
+          'vi så kan man när år säger hon under också efter eller nu sin där vid mot ska skulle kommer '
+          'tack hej god morgon snälla var finns hur mycket kostar vill behöver',
+    'vi': 'của và các có được trong là cho những với không một người này đã khi đến về như từ cũng để '
+          'tôi bạn anh chị em chúng ta họ rất nhiều cảm ơn xin chào buổi sáng làm ơn ở đâu bao nhiêu '
+          'tiền muốn cần',
+    'ro': 'și în de la a cu că nu se pe din o un mai este care pentru ce sunt fi au ca lui sau ei el '
+          'dar acest după am fost foarte eu tu noi voi mulțumesc bună ziua dimineața vă rog unde cât '
+          'costă vreau am nevoie',
+    'sw': 'na ya wa kwa ni za la katika kuwa hiyo cha huo yake wake hii pia lakini kama sana mimi wewe '
+          'yeye sisi ninyi wao asante habari jambo tafadhali wapi ngapi bei nataka nahitaji karibu',
+    'fil': 'ang ng sa na at mga ay si ko ako mo ka siya kami tayo sila ito iyan iyon hindi oo po opo '
+           'salamat magandang umaga gabi pakiusap saan magkano gusto kailangan',
+}
+
+# Non-ASCII letters each Latin-script language uses; any other accented letter in the text
+# counts against the language (and against all of them for languages the model does not know)
+LATIN_LETTERS = {
+    'en': '', 'es': 'áéíñóúü', 'fr': 'àâæçéèêëîïôœùûüÿ', 'de': 'äöüß', 'it': 'àèéìíîòóùú',
+    'pt': 'áâãàçéêíóôõú', 'nl': 'éëïóöü', 'id': 'é', 'tr': 'çğıöşüâîû', 'pl': 'ąćęłńóśźż',
+    'sv': 'åäöé', 'vi': 'àáâãèéêìíòóôõùúýăđĩũơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ',
+    'ro': 'ăâîșşțţ', 'sw': '', 'fil': 'ñ',
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)?")
+
+
+def _script_of(ch: str) -> Optional[str]:
+    cp = ord(ch)
+    if cp < 0x0370:
+        return 'Latin' if ch.isalpha() else None
+    for first, last, script in SCRIPT_RANGES:
+        if first <= cp <= last:
+            return script
+    return 'Latin' if 0x1E00 <= cp <= 0x1EFF else None
+
+
+def _text_trigrams(words: Iterable[str]) -> Counter:
+    grams = Counter()
+    for word in words:
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams[padded[i:i + 3]] += 1
+    return grams
+
+
+def _build_profile(seed: str, size: int = 120) -> Dict[str, float]:
+    """Weights for the `size` most frequent seed trigrams, the most frequent weighted 1.0."""
+    ranked = _text_trigrams(seed.split()).most_common(size)
+    return {gram: 1.0 - rank / size for rank, (gram, _) in enumerate(ranked)}
+
+
+class LocalLanguageDetector:
+    """
+    Offline language detector: classifies by Unicode script first, then by a compact
+    character trigram model for Latin-script text. Only returns supported codes.
+    """
+
+    def __init__(self, supported_languages: Dict[str, str]):
+        self.supported_languages = supported_languages
+        self.latin_profiles = {
+            code: _build_profile(seed) for code, seed in LATIN_SEED_WORDS.items() if code in supported_languages
+        }
+        self.latin_words = {code: frozenset(LATIN_SEED_WORDS[code].split()) for code in self.latin_profiles}
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        """Return (language code or None, confidence 0..1)."""
+        sample = text[:500]
+        scripts = Counter()
+        for ch in sample:
+            script = _script_of(ch)
+            if script:
+                scripts[script] += 1
+        if not scripts:
+            return None, 0.0
+        script, count = scripts.most_common(1)[0]
+        share = count / sum(scripts.values())
+
+        if script == 'Latin':
+            code, confidence = self._detect_latin(sample)
+            return code, confidence * share
+        if script in ('Han', 'Kana') and scripts.get('Han') and scripts.get('Kana'):
+            # Japanese mixes kanji and kana: both count towards its share
+            script = 'Kana'
+            share = (scripts['Han'] + scripts['Kana']) / sum(scripts.values())
+        code, confidence = self._detect_script(script, sample, count)
+        if code not in self.supported_languages:
+            return None, 0.0
+        return code, confidence * share
+
+    def _detect_script(self, script: str, sample: str, letters: int) -> Tuple[str, float]:
+        markers = SCRIPT_MARKERS.get(script)
+        if not markers:
+            return SCRIPT_LANGUAGE[script], 0.99
+        for code, marker_letters in markers:
+            if any(ch in marker_letters for ch in sample):
+                return code, 0.9
+        # Shared script with no distinguishing letters seen: probably the default language,
+        # the more so the longer the text runs without a marker letter
+        return SCRIPT_LANGUAGE[script], round(0.6 + 0.39 * min(1.0, letters / 40), 4)
+
+    def _detect_latin(self, sample: str) -> Tuple[Optional[str], float]:
+        words = [w.lower() for w in _WORD_RE.findall(sample)]
+        if not words:
+            return None, 0.0
+        grams = _text_trigrams(words)
+        total = sum(grams.values())
+        accented = {ch for word in words for ch in word if not ch.isascii()}
+        scores = []
+        for code, profile in self.latin_profiles.items():
+            # Hits on frequent profile trigrams weigh more than hits on rare ones
+            trigram_score = sum(count * profile[g] for g, count in grams.items() if g in profile) / total
+            word_score = sum(1 for word in words if word in self.latin_words[code]) / len(words)
+            # Each accented letter outside the language's alphabet halves its score
+            foreign = len(accented - set(LATIN_LETTERS.get(code, '')))
+            scores.append(((trigram_score + word_score) * 0.5 ** foreign, code))
+        scores.sort(reverse=True)
+        best_score, best_code = scores[0]
+        if best_score <= 0:
+            return None, 0.0
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        margin = (best_score - runner_up) / best_score
+        # Calibrated so an ordinary sentence in a modeled language reaches 0.8 while close calls
+        # (Portuguese vs Spanish), languages the model does not know and one-word inputs stay below:
+        # fit is how well the text matches the best profile, separation how far ahead of the
+        # runner-up it is, and single words never count as more than weak evidence.
+        fit = min(1.0, best_score / 0.45)
+        separation = 0.5 + 0.5 * min(1.0, margin / 0.4)
+        evidence = min(1.0, 0.5 + len(words) / 6)
+        return best_code, round(fit * separation * evidence, 4)
+
+
+_detection_counts = {'local': 0, 'google': 0, 'local_offline': 0}
+_detection_lock = threading.Lock()
+
+
+def record_detection(name: str):
+    with _detection_lock:
+        _detection_counts[name] = _detection_counts.get(name, 0) + 1
+
+
+def detection_stats() -> Dict:
+    with _detection_lock:
+        return dict(_detection_counts)
@@ -0,0 +1,259 @@
+# bot/languages.py
+import threading
+import unicodedata
+from typing import Dict, Optional
+
+SUPPORTED_LANGUAGES = {
+    'af': 'Afrikaans', 'ak': 'Twi', 'am': 'Amharic', 'ar': 'Arabic', 'as': 'Assamese', 'ay': 'Aymara',
+    'az': 'Azerbaijani', 'bm': 'Bambara', 'be': 'Belarusian', 'bn': 'Bengali', 'bho': 'Bhojpuri',
+    'bs': 'Bosnian', 'bg': 'Bulgarian', 'ca': 'Catalan', 'ceb': 'Cebuano', 'ny': 'Chichewa',
+    'zh': 'Chinese', 'zh-CN': 'Chinese (Simplified)', 'zh-TW': 'Chinese (Traditional)', 'co': 'Corsican',
+    'hr': 'Croatian', 'cs': 'Czech', 'da': 'Danish', 'dv': 'Dhivehi', 'doi': 'Dogri', 'nl': 'Dutch',
+    'en': 'English', 'eo': 'Esperanto', 'et': 'Estonian', 'ee': 'Ewe', 'fil': 'Filipino', 'fi': 'Finnish',
+    'fr': 'French', 'fy': 'Frisian', 'gl': 'Galician', 'ka': 'Georgian', 'de': 'German', 'el': 'Greek',
+    'gn': 'Guarani', 'gu': 'Gujarati', 'ht': 'Haitian Creole', 'ha': 'Hausa', 'haw': 'Hawaiian',
+    'he': 'Hebrew', 'hi': 'Hindi', 'hmn': 'Hmong', 'hu': 'Hungarian', 'is': 'Icelandic', 'ig': 'Igbo',
+    'ilo': 'Ilocano', 'id': 'Indonesian', 'ga': 'Irish', 'it': 'Italian', 'ja': 'Japanese', 'jw': 'Javanese',
+    'kn': 'Kannada', 'kk': 'Kazakh', 'km': 'Khmer', 'rw': 'Kinyarwanda', 'gom': 'Konkani', 'ko': 'Korean',
+    'kri': 'Krio', 'ku': 'Kurdish (Kurmanji)', 'ckb': 'Kurdish (Sorani)', 'ky': 'Kyrgyz', 'lo': 'Lao',
+    'la': 'Latin', 'lv': 'Latvian', 'ln': 'Lingala', 'lt': 'Lithuanian', 'lg': 'Luganda', 'lb': 'Luxembourgish',
+    'mk': 'Macedonian', 'mai': 'Maithili', 'mg': 'Malagasy', 'ms': 'Malay', 'ml': 'Malayalam',
+    'mt': 'Maltese', 'mi': 'Maori', 'mr': 'Marathi', 'mni-Mtei': 'Meiteilon (Manipuri)', 'lus': 'Mizo',
+    'mn': 'Mongolian', 'my': 'Myanmar (Burmese)', 'ne': 'Nepali', 'no': 'Norwegian', 'or': 'Odia (Oriya)',
+    'om': 'Oromo', 'ps': 'Pashto', 'fa': 'Persian', 'pl': 'Polish', 'pt': 'Portuguese', 'pa': 'Punjabi',
+    'qu': 'Quechua', 'ro': 'Romanian', 'ru': 'Russian', 'sm': 'Samoan', 'sa': 'Sanskrit',
+    'gd': 'Scots Gaelic', 'nso': 'Sepedi', 'sr': 'Serbian', 'st': 'Sesotho', 'sn': 'Shona',
+    'sd': 'Sindhi', 'si': 'Sinhala', 'sk': 'Slovak', 'sl': 'Slovenian', 'so': 'Somali', 'es': 'Spanish',
+    'su': 'Sundanese', 'sw': 'Swahili', 'sv': 'Swedish', 'tg': 'Tajik', 'ta': 'Tamil', 'tt': 'Tatar',
+    'te': 'Telugu', 'th': 'Thai', 'ti': 'Tigrinya', 'ts': 'Tsonga', 'tr': 'Turkish', 'tk': 'Turkmen',
+    'uk': 'Ukrainian', 'ur': 'Urdu', 'ug': 'Uyghur', 'uz': 'Uzbek', 'vi': 'Vietnamese', 'cy': 'Welsh',
+    'xh': 'Xhosa', 'yi': 'Yiddish', 'yo': 'Yoruba', 'zu': 'Zulu', 'br': 'Breton', 'oc': 'Occitan',
+    'kmr': 'Northern Kurdish', 'sc': 'Sardinian', 'kl': 'Greenlandic', 'sq': 'Albanian', 'hy': 'Armenian',
+    'eu': 'Basque', 'rm': 'Romansh', 'fur': 'Friulian', 'lad': 'Ladino', 'yue': 'Cantonese', 'wuu': 'Shanghainese',
+    'hak': 'Hakka', 'nan': 'Min Nan', 'gan': 'Gan', 'cdo': 'Min Dong', 'hsn': 'Xiang', 'bo': 'Tibetan',
+    'dz': 'Dzongkha', 'hil': 'Hiligaynon', 'war': 'Waray', 'pam': 'Pampangan', 'bik': 'Bikol', 'pag': 'Pangasinan',
+    'smn': 'Inari Sami', 'se': 'Northern Sami', 'sms': 'Skolt Sami', 'sma': 'Southern Sami', 'smj': 'Lule Sami',
+    'ba': 'Bashkir', 'cv': 'Chuvash', 'sah': 'Yakut', 'ce': 'Chechen', 'av': 'Avar', 'os': 'Ossetic',
+    'kbd': 'Kabardian', 'ady': 'Adyghe', 'lez': 'Lezghian', 'tab': 'Tabasaran', 'kum': 'Kumyk', 'dar': 'Dargwa',
+    'inh': 'Ingush', 'tut': 'Altaic', 'sux': 'Sumerian', 'akk': 'Akkadian', 'xal': 'Kalmyk'
+}
+
+# Common spellings and typos of language names -> language code
+LANGUAGE_ALIASES = {
+    'spanish': 'es', 'span ish': 'es', 'spansh': 'es', 'english': 'en', 'engl ish': 'en', 'englsh': 'en',
+    'french': 'fr', 'fren ch': 'fr', 'frnch': 'fr', 'german': 'de', 'germ an': 'de', 'germn': 'de',
+    'italian': 'it', 'ital ian': 'it', 'portuguese': 'pt', 'port uguese': 'pt', 'russian': 'ru',
+    'russ ian': 'ru', 'chinese': 'zh', 'chin ese': 'zh', 'japanese': 'ja', 'japan ese': 'ja', 'japan': 'ja',
+    'korean': 'ko', 'kor ean': 'ko', 'arabic': 'ar', 'arab ic': 'ar', 'hindi': 'hi', 'hind i': 'hi',
+    'bengali': 'bn', 'beng ali': 'bn', 'dutch': 'nl', 'du tch': 'nl', 'swedish': 'sv', 'swed ish': 'sv',
+    'norwegian': 'no', 'norw egian': 'no', 'urdu': 'ur', 'ur du': 'ur', 'tamil': 'ta', 'tam il': 'ta',
+    'telugu': 'te', 'tel ugu': 'te', 'creole': 'ht', 'haitian creole': 'ht', 'haitian': 'ht', 'zulu': 'zu',
+    'zu lu': 'zu', 'yoruba': 'yo', 'yor uba': 'yo', 'swahili': 'sw', 'swah ili': 'sw', 'hawaiian': 'haw',
+    'hawai ian': 'haw', 'esperanto': 'eo', 'esper anto': 'eo', 'afrikaans': 'af', 'afrik aans': 'af',
+    'albanian': 'sq', 'alban ian': 'sq', 'amharic': 'am', 'amhar ic': 'am', 'armenian': 'hy',
+    'armen ian': 'hy', 'azerbaijani': 'az', 'azerbaij ani': 'az', 'basque': 'eu', 'bas que': 'eu',
+    'belarusian': 'be', 'belaru sian': 'be', 'bosnian': 'bs', 'bosn ian': 'bs', 'bulgarian': 'bg',
+    'bulgar ian': 'bg', 'catalan': 'ca', 'catal an': 'ca', 'cebuano': 'ceb', 'cebu ano': 'ceb',
+    'croatian': 'hr', 'croat ian': 'hr', 'czech': 'cs', 'cz ech': 'cs', 'danish': 'da', 'dan ish': 'da',
+    'estonian': 'et', 'eston ian': 'et', 'filipino': 'tl', 'filip ino': 'tl', 'finnish': 'fi',
+    'finn ish': 'fi', 'georgian': 'ka', 'georg ian': 'ka', 'greek': 'el', 'gre ek': 'el',
+    'gujarati': 'gu', 'gujar ati': 'gu', 'hausa': 'ha', 'haus a': 'ha', 'hebrew': 'he', 'hebr ew': 'he',
+    'hungarian': 'hu', 'hungar ian': 'hu', 'icelandic': 'is', 'icel andic': 'is', 'igbo': 'ig',
+    'ig bo': 'ig', 'indonesian': 'id', 'indones ian': 'id', 'irish': 'ga', 'ir ish': 'ga',
+    'javanese': 'jw', 'javan ese': 'jw', 'kannada': 'kn', 'kann ada': 'kn', 'kazakh': 'kk',
+    'kaz akh': 'kk', 'khmer': 'km', 'khm er': 'km', 'kurdish': 'ku', 'kurd ish': 'ku', 'kyrgyz': 'ky',
+    'kyrg yz': 'ky', 'lao': 'lo', 'la o': 'lo', 'latin': 'la', 'lat in': 'la', 'latvian': 'lv',
+    'latv ian': 'lv', 'lithuanian': 'lt', 'lithuan ian': 'lt', 'luxembourgish': 'lb',
+    'luxemb ourgish': 'lb', 'macedonian': 'mk', 'macedon ian': 'mk', 'malagasy': 'mg',
+    'malag asy': 'mg', 'malay': 'ms', 'mal ay': 'ms', 'malayalam': 'ml', 'malaya lam': 'ml',
+    'maltese': 'mt', 'malt ese': 'mt', 'maori': 'mi', 'mao ri': 'mi', 'marathi': 'mr',
+    'marath i': 'mr', 'mongolian': 'mn', 'mongol ian': 'mn', 'myanmar': 'my', 'myan mar': 'my',
+    'burmese': 'my', 'nepali': 'ne', 'nep ali': 'ne', 'persian': 'fa', 'pers ian': 'fa',
+    'polish': 'pl', 'pol ish': 'pl', 'punjabi': 'pa', 'punj abi': 'pa', 'romanian': 'ro',
+    'roman ian': 'ro', 'samoan': 'sm', 'samo an': 'sm', 'sanskrit': 'sa', 'sanskr it': 'sa',
+    'serbian': 'sr', 'serb ian': 'sr', 'sinhala': 'si', 'sinh ala': 'si', 'slovak': 'sk',
+    'slov ak': 'sk', 'slovenian': 'sl', 'sloven ian': 'sl', 'somali': 'so', 'som ali': 'so',
+    'sundanese': 'su', 'sundan ese': 'su', 'tajik': 'tg', 'taj ik': 'tg', 'tatar': 'tt',
+    'tat ar': 'tt', 'thai': 'th', 'th ai': 'th', 'turkish': 'tr', 'turk ish': 'tr',
+    'turkmen': 'tk', 'turkm en': 'tk', 'ukrainian': 'uk', 'ukrain ian': 'uk', 'uyghur': 'ug',
+    'uygh ur': 'ug', 'uzbek': 'uz', 'uzb ek': 'uz', 'vietnamese': 'vi', 'vietnam ese': 'vi',
+    'welsh': 'cy', 'wel sh': 'cy', 'xhosa': 'xh', 'xhos a': 'xh', 'yiddish': 'yi', 'yidd ish': 'yi',
+    # Countries named instead of their language ("translate this to Turkey"); otherwise the
+    # typo matching would take "turkey" for Turkmen
+    'turkey': 'tr', 'türkiye': 'tr', 'turkiye': 'tr', 'germany': 'de', 'spain': 'es', 'mexico': 'es',
+    'italy': 'it', 'brazil': 'pt', 'portugal': 'pt', 'russia': 'ru', 'china': 'zh', 'korea': 'ko',
+    'south korea': 'ko', 'greece': 'el', 'holland': 'nl', 'netherlands': 'nl', 'sweden': 'sv',
+    'norway': 'no', 'denmark': 'da', 'finland': 'fi', 'poland': 'pl', 'ukraine': 'uk', 'hungary': 'hu',
+    'romania': 'ro', 'czechia': 'cs', 'czech republic': 'cs', 'iran': 'fa', 'persia': 'fa', 'israel': 'he',
+    'egypt': 'ar', 'thailand': 'th', 'vietnam': 'vi', 'indonesia': 'id', 'bangladesh': 'bn', 'nepal': 'ne',
+}
+
+# Endonyms, so "বাংলা" or "español" resolve like their English names
+NATIVE_LANGUAGE_NAMES = {
+    'afrikaans': 'af', 'አማርኛ': 'am', 'العربية': 'ar', 'عربي': 'ar', 'অসমীয়া': 'as', 'azərbaycan': 'az',
+    'беларуская': 'be', 'বাংলা': 'bn', 'bangla': 'bn', 'bosanski': 'bs', 'български': 'bg', 'català': 'ca',
+    '中文': 'zh', '简体中文': 'zh-CN', '繁體中文': 'zh-TW', 'hrvatski': 'hr', 'čeština': 'cs', 'cesky': 'cs',
+    'dansk': 'da', 'ދިވެހި': 'dv', 'nederlands': 'nl', 'eesti': 'et', 'tagalog': 'fil', 'suomi': 'fi',
+    'français': 'fr', 'francais': 'fr', 'galego': 'gl', 'ქართული': 'ka', 'deutsch': 'de', 'ελληνικά': 'el',
+    'ગુજરાતી': 'gu', 'kreyòl ayisyen': 'ht', 'עברית': 'he', 'हिन्दी': 'hi', 'हिंदी': 'hi', 'magyar': 'hu',
+    'íslenska': 'is', 'bahasa indonesia': 'id', 'gaeilge': 'ga', 'italiano': 'it', '日本語': 'ja',
+    'basa jawa': 'jw', 'ಕನ್ನಡ': 'kn', 'қазақ': 'kk', 'ខ្មែរ': 'km', 'ikinyarwanda': 'rw', '한국어': 'ko',
+    'kurdî': 'ku', 'کوردی': 'ckb', 'кыргызча': 'ky', 'ລາວ': 'lo', 'latviešu': 'lv', 'lietuvių': 'lt',
+    'lëtzebuergesch': 'lb', 'македонски': 'mk', 'bahasa melayu': 'ms', 'മലയാളം': 'ml', 'malti': 'mt',
+    'te reo māori': 'mi', 'मराठी': 'mr', 'монгол': 'mn', 'မြန်မာ': 'my', 'नेपाली': 'ne', 'norsk': 'no',
+    'ଓଡ଼ିଆ': 'or', 'پښتو': 'ps', 'فارسی': 'fa', 'farsi': 'fa', 'polski': 'pl', 'português': 'pt',
+    'portugues': 'pt', 'ਪੰਜਾਬੀ': 'pa', 'română': 'ro', 'русский': 'ru', 'संस्कृतम्': 'sa', 'српски': 'sr',
+    'srpski': 'sr', 'سنڌي': 'sd', 'සිංහල': 'si', 'slovenčina': 'sk', 'slovenščina': 'sl', 'soomaali': 'so',
+    'español': 'es', 'espanol': 'es', 'kiswahili': 'sw', 'svenska': 'sv', 'тоҷикӣ': 'tg', 'தமிழ்': 'ta',
+    'татар': 'tt', 'తెలుగు': 'te', 'ไทย': 'th', 'ትግርኛ': 'ti', 'türkçe': 'tr', 'türkmen': 'tk',
+    'українська': 'uk', 'اردو': 'ur', 'ئۇيغۇرچە': 'ug', 'oʻzbek': 'uz', "o'zbek": 'uz',
+    'tiếng việt': 'vi', 'cymraeg': 'cy', 'isixhosa': 'xh', 'ייִדיש': 'yi', 'yorùbá': 'yo', 'isizulu': 'zu',
+    'shqip': 'sq', 'հայերեն': 'hy', 'euskara': 'eu', '粵語': 'yue', '廣東話': 'yue', 'བོད་སྐད': 'bo',
+    'རྫོང་ཁ': 'dz', 'esperanto': 'eo',
+}
+
+
+def normalize_language_name(name: str) -> str:
+    name = unicodedata.normalize('NFC', name or '').casefold()
+    return ' '.join(name.replace('(', ' ').replace(')', ' ').split())
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up early once every path exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        best = i
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            current.append(cost)
+            if cost < best:
+                best = cost
+        if best > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LanguageResolver:
+    """
+    Precomputed index from language names, aliases, typos, endonyms and codes to supported codes.
+    Exact lookups are a single dict access; fuzzy lookups use a trigram index to pick
+    candidates, verify them with a bounded edit distance, and are memoized.
+    """
+
+    def __init__(self, supported_languages: Dict[str, str], aliases: Dict[str, str], native_names: Dict[str, str], memo_size: int = 4096):
+        self.supported_languages = supported_languages
+        self.index = {}
+        self._canonical = set()
+        for code, name in supported_languages.items():
+            key = normalize_language_name(name)
+            self._add(key, code)
+            self._canonical.add(key)
+            # "Myanmar (Burmese)" also answers to "myanmar" and "burmese"
+            if '(' in name:
+                outer, inner = name.split('(', 1)
+                self._add(normalize_language_name(outer), code)
+                self._add(normalize_language_name(inner), code)
+                self._add(normalize_language_name(f"{inner} {outer}"), code)
+        # Codes ("fr", "zh-cn") are kept apart: short ones like "my" or "it" are also ordinary words
+        self.codes = {code.lower(): code for code in supported_languages}
+        for table in (aliases, native_names):
+            for alias, code in table.items():
+                if code in supported_languages:
+                    self._add(normalize_language_name(alias), code)
+
+        self._prefixes = {}
+        for key, code in self.index.items():
+            for n in range(4, len(key)):
+                self._prefixes.setdefault(key[:n], set()).add(code)
+        self._trigram_index = {}
+        for key in sorted(k for k in self.index if len(k) >= 4):
+            for gram in trigrams(key):
+                self._trigram_index.setdefault(gram, []).append(key)
+        self._memo = {}
+        self._memo_size = memo_size
+        self._memo_lock = threading.Lock()
+
+    def _add(self, key: str, code: str):
+        if key:
+            self.index.setdefault(key, code)
+            self.index.setdefault(key.replace(' ', ''), code)
+
+    def resolve_exact(self, name: str, allow_codes: bool = True) -> Optional[str]:
+        key = normalize_language_name(name)
+        code = self.index.get(key) or self.index.get(key.replace(' ', ''))
+        if not code and allow_codes:
+            code = self.codes.get(key)
+        return code
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Resolve a language name found in free text, tolerating typos and trailing words ("japanese please").
+        Bare codes are not names here ("it", "my", "no" are words); use resolve_exact for structured input.
+        """
+        key = normalize_language_name(name)
+        if not key:
+            return None
+        code = self.index.get(key)
+        if code:
+            return code
+        with self._memo_lock:
+            if key in self._memo:
+                return self._memo[key]
+        code = self._resolve_fuzzy(key)
+        with self._memo_lock:
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[key] = code
+        return code
+
+    def _resolve_fuzzy(self, key: str) -> Optional[str]:
+        words = key.split()
+        candidates = [key, key.replace(' ', '')]
+        # Leading sub-phrases: "chinese simplified please" -> "chinese simplified" -> "chinese"
+        candidates += [' '.join(words[:n]) for n in range(min(len(words) - 1, 3), 0, -1)]
+        for candidate in candidates:
+            code = self.index.get(candidate) or self.index.get(candidate.replace(' ', ''))
+            if code:
+                return code
+        for candidate in candidates:
+            code = self._nearest(candidate)
+            if code:
+                return code
+        for candidate in candidates:
+            codes = self._prefixes.get(candidate)
+            if codes and len(codes) == 1:
+                return next(iter(codes))
+        return None
+
+    def _nearest(self, key: str) -> Optional[str]:
+        if len(key) < 4:
+            return None
+        max_distance = 1 if len(key) <= 5 else 2
+        shared = {}
+        for gram in trigrams(key):
+            for candidate in self._trigram_index.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        matches = []
+        for candidate, count in shared.items():
+            # An edit touches at most three trigrams, so weaker overlaps cannot be within range
+            if count < len(key) - 3 * max_distance:
+                continue
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, candidate not in self._canonical, candidate))
+        if not matches:
+            return None
+        # Deterministic: closest first, then canonical names over aliases, then alphabetical
+        return self.index[min(matches)[2]]
+
+
+language_resolver = LanguageResolver(SUPPORTED_LANGUAGES, LANGUAGE_ALIASES, NATIVE_LANGUAGE_NAMES)
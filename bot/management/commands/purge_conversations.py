@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bot.conversation import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete chat conversations idle for longer than CONVERSATION_TTL (run it from cron)."
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'CONVERSATION_TTL', 0):
+            self.stdout.write("CONVERSATION_TTL is 0: conversations never expire, nothing to do.")
+            return
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired conversations."))
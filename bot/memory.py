@@ -0,0 +1,257 @@
+# bot/memory.py
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .cache import normalize_text
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]+')
+_TOKEN_RE = re.compile(r"\w+(?:['’]\w+)*")
+_NUMBER_RE = re.compile(r'\d+')
+# Words that flip a sentence's meaning while barely moving its trigram score
+NEGATIONS = frozenset((
+    'not', 'no', 'never', 'nothing', 'none', 'nobody', 'nor', 'neither', 'cannot', 'without',
+    'nunca', 'ni', 'sin', 'nada', 'ne', 'pas', 'jamais', 'sans', 'non', 'rien',
+    'nicht', 'kein', 'keine', 'keinen', 'nie', 'ohne', 'não', 'nem',
+    'না', 'নয়', 'নি', 'নেই', 'नहीं', 'न', 'मत', 'لا', 'لم', 'لن', 'ليس', 'نہیں',
+))
+
+
+def fuzzy_form(text: str) -> str:
+    """Looser normalization for near-matches: also folds case and drops punctuation, so "Hello!" matches "hello"."""
+    return ' '.join(_PUNCTUATION_RE.sub(' ', normalize_text(text).casefold()).split())
+
+
+def anchors(text: str) -> tuple:
+    """
+    Numbers, negation words and all-caps words of a text; near-matches must agree on them exactly.
+    fuzzy_form folds case, but "US" and "us" (or "IT" and "it") are different words.
+    """
+    tokens = _TOKEN_RE.findall(normalize_text(text))
+    folded = [token.casefold() for token in tokens]
+    negations = sorted(
+        token for token in folded
+        if token in NEGATIONS or token.endswith("n't") or token.endswith("n’t")
+    )
+    acronyms = sorted(token for token in tokens if len(token) > 1 and token.isupper())
+    return tuple(_NUMBER_RE.findall(text)), tuple(negations), tuple(acronyms)
+
+
+def trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TranslationMemory:
+    """
+    Translation memory over past TranslationHistory results.
+    Exact lookups go through a dict keyed on (target, normalized text); near-matches use an
+    inverted character-trigram index scored with the Dice coefficient against `threshold`;
+    only the rarest query trigrams are used to collect candidates (prefix filtering).
+    A near-match is only served when it has the same numbers, negation and all-caps words as the query.
+    Entries are bounded (oldest evicted first) and new history rows are pulled in incrementally.
+    """
+
+    def __init__(self, max_entries: int = 50000, threshold: float = 0.9, max_chars: int = 500, refresh_interval: int = 60):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.max_chars = max_chars
+        self.refresh_interval = refresh_interval
+        self._entries = OrderedDict()  # (target, normalized) -> entry
+        self._postings = {}  # (target, trigram) -> set of entry keys
+        self._last_id = 0
+        self._last_refresh = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._counters = {'exact_hits': 0, 'fuzzy_hits': 0, 'misses': 0, 'loaded': 0, 'evictions': 0}
+
+    def add(self, source_text: str, translated_text: str, source_code: str, target_code: str):
+        if not source_text or not translated_text or not target_code or len(source_text) > self.max_chars:
+            return
+        key = (target_code, normalize_text(source_text))
+        grams = trigrams(fuzzy_form(source_text))
+        entry = {
+            'source_text': source_text,
+            'translated_text': translated_text,
+            'source_code': source_code,
+            'target_code': target_code,
+            'trigrams': grams,
+            'anchors': anchors(source_text),
+        }
+        with self._lock:
+            if key in self._entries:
+                self._unindex(key)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            for gram in grams:
+                self._postings.setdefault((target_code, gram), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._unindex(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def _unindex(self, key: tuple):
+        entry = self._entries.pop(key)
+        for gram in entry['trigrams']:
+            posting = self._postings.get((key[0], gram))
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[(key[0], gram)]
+
+    def add_result(self, translation_result: dict):
+        """Index a successful process_translation() result (the TranslationHistory.translation_result shape)."""
+        if not isinstance(translation_result, dict) or not translation_result.get('success'):
+            return
+        translation = translation_result.get('translation') or {}
+        if translation.get('from_memory') or translation.get('from_phrasebook'):
+            return
+        self.add(
+            translation.get('given_text'),
+            translation.get('translated_text'),
+            translation.get('given_language_code'),
+            translation.get('translated_language_code'),
+        )
+
+    def lookup(self, text: str, target_code: str) -> Optional[Dict]:
+        """Return {'translated_text', 'source_code', 'match', 'similarity'} for a remembered translation, or None."""
+        if not text or len(text) > self.max_chars:
+            return None
+        key = (target_code, normalize_text(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters['exact_hits'] += 1
+                return self._hit(entry, 'exact', 1.0)
+
+            grams = trigrams(fuzzy_form(text))
+            # Dice >= threshold needs at least min_overlap shared trigrams, so a match must
+            # contain one of the len(grams) - min_overlap + 1 rarest query trigrams
+            min_overlap = math.ceil(self.threshold * len(grams) / (2 - self.threshold))
+            postings = sorted((self._postings.get((target_code, gram), ()) for gram in grams), key=len)
+            candidates = set()
+            for posting in postings[:len(grams) - min_overlap + 1]:
+                candidates.update(posting)
+
+            # Dice >= threshold also bounds the candidate's trigram count relative to the query's
+            min_size = self.threshold * len(grams) / (2 - self.threshold)
+            max_size = len(grams) * (2 - self.threshold) / self.threshold
+            # "Room 1234" vs "room 1235" or "I am (not) allergic" score above any sane threshold
+            query_anchors = anchors(text)
+            best, best_score = None, 0.0
+            for candidate in candidates:
+                other = self._entries[candidate]['trigrams']
+                if not min_size <= len(other) <= max_size:
+                    continue
+                if self._entries[candidate]['anchors'] != query_anchors:
+                    continue
+                score = 2 * len(grams & other) / (len(grams) + len(other))
+                if score > best_score:
+                    best, best_score = candidate, score
+            if best is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best)
+                self._counters['fuzzy_hits'] += 1
+                return self._hit(self._entries[best], 'fuzzy', round(best_score, 4))
+            self._counters['misses'] += 1
+            return None
+
+    def _hit(self, entry: dict, match: str, similarity: float) -> Dict:
+        return {
+            'translated_text': entry['translated_text'],
+            'source_code': entry['source_code'],
+            'match': match,
+            'similarity': similarity,
+        }
+
+    def refresh(self):
+        """Index TranslationHistory rows added since the last refresh (the first call loads the newest max_entries)."""
+        from .models import TranslationHistory
+
+        with self._refresh_lock:
+            rows = TranslationHistory.objects.filter(id__gt=self._last_id).order_by('-id')
+            if not self._last_id:
+                rows = rows[:self.max_entries]
+            loaded = 0
+            for row_id, result in reversed(list(rows.values_list('id', 'translation_result'))):
+                self.add_result(result)
+                self._last_id = max(self._last_id, row_id)
+                loaded += 1
+            with self._lock:
+                self._counters['loaded'] += loaded
+            self._last_refresh = time.monotonic()
+
+    def _refresh_in_background(self):
+        from django.db import connections
+
+        try:
+            self.refresh()
+        except Exception:
+            # The memory is an optimization; a database hiccup only delays the next attempt
+            self._last_refresh = time.monotonic()
+        finally:
+            self._refreshing = False
+            connections.close_all()
+
+    def maybe_refresh(self):
+        """
+        Start a refresh on a background thread when one is due. Lookups keep answering from
+        the current index meanwhile, so the first request of a worker never waits for the
+        initial load of up to max_entries rows.
+        """
+        if self._refreshing:
+            return
+        if self._last_refresh is not None and time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name='translation-memory-refresh', daemon=True).start()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._last_id = 0
+            self._last_refresh = None
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters['exact_hits'] + counters['fuzzy_hits'] + counters['misses']
+        hit_rate = (counters['exact_hits'] + counters['fuzzy_hits']) / lookups if lookups else 0.0
+        return {
+            **counters,
+            'size': size,
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'hit_rate': round(hit_rate, 4),
+        }
+
+
+_translation_memory = None
+_translation_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    """Return the process-wide translation memory, creating it from settings on first use."""
+    global _translation_memory
+    if _translation_memory is None:
+        with _translation_memory_lock:
+            if _translation_memory is None:
+                _translation_memory = TranslationMemory(
+                    max_entries=getattr(settings, 'TRANSLATION_MEMORY_SIZE', 50000),
+                    threshold=getattr(settings, 'TRANSLATION_MEMORY_THRESHOLD', 0.9),
+                    max_chars=getattr(settings, 'TRANSLATION_MEMORY_MAX_CHARS', 500),
+                    refresh_interval=getattr(settings, 'TRANSLATION_MEMORY_REFRESH', 60),
+                )
+    return _translation_memory
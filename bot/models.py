@@ -8,4 +8,15 @@ class TranslationHistory(models.Model):
     timestamp = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return f"Translation at {self.timestamp}: {self.user_input[:50]}..."
\ No newline at end of file
+        return f"Translation at {self.timestamp}: {self.user_input[:50]}..."
+
+
+class Conversation(models.Model):
+    """Compact chat memory per user or client session: recent turns plus a rolling summary of older ones."""
+    key = models.CharField(max_length=128, unique=True)
+    summary = models.TextField(blank=True, default='')
+    turns = models.JSONField(default=list)  # [{"role": "user"|"assistant", "content": "..."}], oldest first
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Conversation {self.key} ({len(self.turns)} turns)"
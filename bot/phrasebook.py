@@ -0,0 +1,101 @@
+# bot/phrasebook.py
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .languages import language_resolver
+from .memory import fuzzy_form
+
+
+class Phrasebook:
+    """
+    Reverse index over the curated dashboard Phrase rows: the normalized text of a phrase in
+    any of its languages maps to that language's code and all of the phrase's translations.
+    Built on first lookup, dropped by invalidate() when a Phrase changes and rebuilt after
+    `max_age` seconds so other workers pick up edits too.
+    """
+
+    def __init__(self, max_age: int = 300):
+        self.max_age = max_age
+        self._index = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'builds': 0}
+
+    def build(self) -> Dict[str, tuple]:
+        from dashboard.models import Phrase
+
+        index = {}
+        for translated_text in Phrase.objects.order_by('id').values_list('translated_text', flat=True).iterator():
+            if not isinstance(translated_text, dict):
+                continue
+            # Phrase keys are language names ("english", "bangla"); codes are also accepted
+            translations = {}
+            for language, text in translated_text.items():
+                code = language_resolver.resolve_exact(str(language))
+                if code and isinstance(text, str) and text.strip():
+                    translations[code] = text.strip()
+            for code, text in translations.items():
+                key = fuzzy_form(text)
+                if key:
+                    index.setdefault(key, (code, translations))
+        return index
+
+    def _current(self) -> Dict[str, tuple]:
+        index = self._index
+        if index is not None and time.monotonic() - self._built_at < self.max_age:
+            return index
+        with self._lock:
+            if self._index is None or time.monotonic() - self._built_at >= self.max_age:
+                self._index = self.build()
+                self._built_at = time.monotonic()
+                self._counters['builds'] += 1
+            return self._index
+
+    def lookup(self, text: str, target_code: str) -> Optional[Dict]:
+        """Return {'translated_text', 'source_code'} for a curated translation of `text` into `target_code`, or None."""
+        if not text:
+            return None
+        try:
+            index = self._current()
+        except Exception:
+            # Missing table or database hiccup: fall through to the regular translation path
+            return None
+        source_code, translations = index.get(fuzzy_form(text) or None, (None, {}))
+        translated = translations.get(target_code)
+        with self._lock:
+            self._counters['hits' if translated else 'misses'] += 1
+        if not translated:
+            return None
+        return {'translated_text': translated, 'source_code': source_code}
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._index) if self._index is not None else 0
+        lookups = counters['hits'] + counters['misses']
+        return {
+            **counters,
+            'size': size,
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+        }
+
+
+_phrasebook = None
+_phrasebook_lock = threading.Lock()
+
+
+def get_phrasebook() -> Phrasebook:
+    """Return the process-wide phrasebook index, creating it from settings on first use."""
+    global _phrasebook
+    if _phrasebook is None:
+        with _phrasebook_lock:
+            if _phrasebook is None:
+                _phrasebook = Phrasebook(max_age=getattr(settings, 'PHRASEBOOK_MAX_AGE', 300))
+    return _phrasebook
@@ -0,0 +1,160 @@
+# bot/sanitizer.py
+import re
+from typing import Optional
+
+_ESCAPE_RE = re.compile(r'\\u[0-9a-fA-F]{4}|\\x[0-9a-fA-F]{2}|\\n|\\t|\\r')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+_VENDOR_RE = re.compile(r'\b(ChatGPT|Chat GPT|OpenAI|GPT-4o-mini|GPT-4|GPT4|GPT-3\.5|GPT-3|gpt-4o-mini)\b', re.IGNORECASE)
+_SELF_NAME_RE = re.compile(r'(?i)\b(my name is|i am|i\'m|call me|you can call me|you may call me)\b\s*[A-Za-z0-9_\-\'"]{0,60}')
+_ASSISTANT_RE = re.compile(r'(?i)\b(assistant|bot|virtual assistant)\b')
+_REPEATED_NAME_RE = re.compile(r'(?i)\b(helpmespeak)(?:[\s,;:.!?-]+\1)+\b')
+_NAME_EXPLANATION_RE = re.compile(
+    r'^\s*[\'"]?([A-Z\u00C0-\u017F][\w\-\']{0,60})[\'"]?\s*(?:can\s+refer|can\s+also\s+refer|may\s+refer|is\s+a\s+name|can\s+mean|refers\s+to|is\s+used\s+to|is\s+commonly)\b',
+    re.IGNORECASE
+)
+_SHORT_REPLY_RE = re.compile(r'^\s*[\'"]?([^\'"\s][^\'"]{0,200})[\'"]?\s*[.?!]?\s*$')
+_SPACES_RE = re.compile(r'[ \t]{2,}')
+
+# Stray backslashes plus characters the user asked not to include, removed in one pass
+_STRIP_CHARS = str.maketrans('', '', '\\`#')
+
+
+def sanitize_ai_reply(text: str) -> str:
+    """
+    Replace occurrences of model/assistant names in AI reply with 'helpmespeak',
+    while keeping other parts of the reply intact. Also clean formatting:
+    - convert escaped newlines to real newlines
+    - remove backslashes, backticks, hashes and stray escape chars
+    - collapse duplicate helpmespeak tokens
+    Idempotent: sanitizing the result again returns it unchanged.
+    """
+    if not text or not isinstance(text, str):
+        return text
+
+    t = text
+
+    # Try to unescape JSON/unicode style escapes so "\n" becomes an actual newline, etc.
+    # Only attempt unicode_escape when the text actually contains escape sequences
+    if '\\' in t and _ESCAPE_RE.search(t):
+        try:
+            t = bytes(t, 'utf-8').decode('unicode_escape')
+        except Exception:
+            t = t.replace('\\n', '\n').replace('\\r', '\n').replace('\\t', ' ').replace('\\"', '"').replace("\\'", "'")
+
+    t = t.translate(_STRIP_CHARS)
+
+    # Normalize repeated blank lines to max two
+    if '\n' in t:
+        t = _BLANK_LINES_RE.sub('\n\n', t)
+
+    # Trim surrounding whitespace and quotes
+    t = _trim(t, '"\'')
+
+    t = _rename(t)
+
+    # If the model gave an explanatory sentence about a name like:
+    #   "Khurram can refer to ..."  or  '"Khurram" can refer to ...'
+    # or a short definition, return only the plain name or a short cleaned token.
+    token = _extract(t)
+    if token is not None:
+        return token
+
+    # Normalize multiple spaces introduced by replacements
+    if '  ' in t or '\t' in t:
+        t = _SPACES_RE.sub(' ', t)
+    return _trim(t, '"\'')
+
+
+def _trim(text: str, chars: str) -> str:
+    # Whitespace and `chars` in any order, so nothing a later pass would strip is left at the edges
+    while True:
+        trimmed = text.strip().strip(chars)
+        if trimmed == text:
+            return text
+        text = trimmed
+
+
+def _rename_once(text: str) -> str:
+    # Replace explicit model or vendor names (ChatGPT, OpenAI, GPT-4, etc.) with helpmespeak
+    t = _VENDOR_RE.sub('helpmespeak', text)
+    # Replace phrases like "my name is X", "I am X", "call me X" -> keep phrase but force name to helpmespeak
+    t = _SELF_NAME_RE.sub(r'\1 helpmespeak', t)
+    # Replace isolated occurrences of common assistant identifiers
+    t = _ASSISTANT_RE.sub('helpmespeak', t)
+    # Collapse repeated occurrences of the replacement (avoid "helpmespeak helpmespeak")
+    return _REPEATED_NAME_RE.sub(r'\1', t)
+
+
+def _rename(text: str) -> str:
+    # Collapsing "helpmespeak, helpmespeak" can put a new name after "call me": repeat until
+    # nothing changes. Replies without model names are settled by the first pass.
+    while True:
+        renamed = _rename_once(text)
+        if renamed == text:
+            return text
+        text = renamed
+
+
+def _extract(text: str) -> Optional[str]:
+    """The plain name or short token `text` boils down to, or None for an ordinary reply."""
+    token = None
+    while True:
+        m = _NAME_EXPLANATION_RE.match(text)
+        if not m:
+            m = _SHORT_REPLY_RE.match(text)
+            if not m or len(m.group(1).split()) > 6:
+                return token
+        # A cut-out token can itself read as a name explanation or hold a model name
+        token = _trim(_rename(_trim(m.group(1), '.,!?')), '.,!?"\'')
+        if token == text:
+            return token
+        text = token
+
+
+def sanitize_fragment(text: str) -> str:
+    """
+    Light, position-independent subset of sanitize_ai_reply for partial streamed text:
+    strips backslashes/backticks/hashes and rewrites model and assistant names.
+    """
+    t = text.translate(_STRIP_CHARS)
+    t = _VENDOR_RE.sub('helpmespeak', t)
+    t = _SELF_NAME_RE.sub(r'\1 helpmespeak', t)
+    t = _ASSISTANT_RE.sub('helpmespeak', t)
+    return _REPEATED_NAME_RE.sub(r'\1', t)
+
+
+class StreamingSanitizer:
+    """
+    Sanitizes a token stream incrementally. The last `window` characters are held back
+    (cut on whitespace) so names split across tokens, e.g. "Chat" + "GPT", are still caught.
+    The cut also moves back past phrases that are rewritten as a whole ("I'm" + " ChatGPT"),
+    so the emitted pieces join up to what sanitizing the held text at once would give.
+    """
+
+    def __init__(self, window: int = 48, max_cut_attempts: int = 8):
+        self.window = window
+        self.max_cut_attempts = max_cut_attempts
+        self._pending = ''
+
+    def feed(self, delta: str) -> str:
+        self._pending += delta
+        if len(self._pending) <= self.window:
+            return ''
+        pending = self._pending
+        whole = sanitize_fragment(pending)
+        end = len(pending) - self.window
+        for _ in range(self.max_cut_attempts):
+            cut = max(pending.rfind(' ', 0, end), pending.rfind('\n', 0, end))
+            if cut <= 0:
+                break
+            ready = sanitize_fragment(pending[:cut])
+            if ready + sanitize_fragment(pending[cut:]) == whole:
+                self._pending = pending[cut:]
+                return ready
+            end = cut
+        # No safe cut yet: hold the text until more arrives
+        return ''
+
+    def flush(self) -> str:
+        ready, self._pending = self._pending, ''
+        return sanitize_fragment(ready) if ready else ''
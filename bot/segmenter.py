@@ -0,0 +1,73 @@
+# bot/segmenter.py
+import re
+from typing import Iterator, Optional
+
+# Sentence ends: Latin/Devanagari/Arabic/Urdu marks need following whitespace (so "3.14" stays whole);
+# CJK full-width marks end a sentence on their own since those scripts don't use spaces.
+_SENTENCE_END_RE = re.compile(r'[.!?।॥؟۔]+(?=\s|$)\s*|[。！？]+\s*')
+_WORD_RE = re.compile(r'\S+\s*|\s+')
+
+
+def split_sentences(text: str) -> Iterator[str]:
+    """Yield sentences with their trailing whitespace, so ''.join() gives back the text."""
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        yield text[start:match.end()]
+        start = match.end()
+    if start < len(text):
+        yield text[start:]
+
+
+def _size_function(max_bytes: Optional[int], encoding: str):
+    if max_bytes is not None:
+        return lambda piece: len(piece.encode(encoding))
+    return len
+
+
+def _split_oversized(piece: str, limit: int, size) -> Iterator[str]:
+    # Words first; a single word over the budget (e.g. unspaced CJK) is cut per character
+    for word in _WORD_RE.findall(piece):
+        if size(word) <= limit:
+            yield word
+            continue
+        start, used = 0, 0
+        for i, ch in enumerate(word):
+            ch_size = size(ch)
+            if used + ch_size > limit and i > start:
+                yield word[start:i]
+                start, used = i, 0
+            used += ch_size
+        yield word[start:]
+
+
+def iter_chunks(text: str, max_chars: Optional[int] = None, max_bytes: Optional[int] = None, encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Split text into chunks no larger than max_chars characters or max_bytes encoded bytes,
+    breaking on sentence boundaries where possible, then on words, then on characters.
+    Runs in linear time: pieces are accumulated in a list and joined once per chunk.
+    """
+    limit = max_bytes if max_bytes is not None else max_chars
+    if not limit or limit <= 0:
+        raise ValueError("iter_chunks needs a positive max_chars or max_bytes")
+    size = _size_function(max_bytes, encoding)
+    if size(text) <= limit:
+        if text:
+            yield text
+        return
+
+    parts, used = [], 0
+    for sentence in split_sentences(text):
+        sentence_size = size(sentence)
+        pieces = (sentence,) if sentence_size <= limit else _split_oversized(sentence, limit, size)
+        for piece in pieces:
+            piece_size = sentence_size if piece is sentence else size(piece)
+            if parts and used + piece_size > limit:
+                chunk = ''.join(parts).strip()
+                if chunk:
+                    yield chunk
+                parts, used = [], 0
+            parts.append(piece)
+            used += piece_size
+    chunk = ''.join(parts).strip()
+    if chunk:
+        yield chunk
@@ -1,10 +1,29 @@
 # bot/serializers.py
 
+from django.conf import settings
 from rest_framework import serializers
 from .models import TranslationHistory
 
 class SmartTranslationRequestSerializer(serializers.Serializer):
     input = serializers.CharField(max_length=30000, required=True)
+    # Keeps multi-turn chat context; omit for stateless replies. Anonymous clients must send back
+    # the signed session_id a previous chat response returned (see bot.conversation.session_for)
+    session_id = serializers.CharField(max_length=128, required=False, allow_blank=True)
+
+class BatchTranslationRequestSerializer(serializers.Serializer):
+    texts = serializers.ListField(
+        child=serializers.CharField(max_length=30000, allow_blank=True, trim_whitespace=False),
+        min_length=1, max_length=500
+    )
+    target_languages = serializers.ListField(
+        child=serializers.CharField(max_length=20), min_length=1, max_length=20
+    )
+    source_language = serializers.CharField(max_length=20, required=False, default='auto')
+
+class DocumentTranslationRequestSerializer(serializers.Serializer):
+    text = serializers.CharField(max_length=getattr(settings, 'TRANSLATION_DOCUMENT_MAX_CHARS', 400000), trim_whitespace=False)
+    target_language = serializers.CharField(max_length=20)
+    source_language = serializers.CharField(max_length=20, required=False, default='auto')
 
 class TranslationResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField()
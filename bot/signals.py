@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dashboard.models import Phrase
+
+from .memory import get_translation_memory
+from .models import TranslationHistory
+from .phrasebook import get_phrasebook
+
+
+@receiver(post_save, sender=TranslationHistory)
+def remember_translation(sender, instance, created, **kwargs):
+    # Make a new translation reusable in this worker right away; other workers pick it up on refresh
+    if not created:
+        return
+    try:
+        get_translation_memory().add_result(instance.translation_result)
+    except Exception:
+        pass
+
+
+@receiver([post_save, post_delete], sender=Phrase)
+def invalidate_phrasebook(sender, **kwargs):
+    get_phrasebook().invalidate()
@@ -1,3 +1,765 @@
-from django.test import TestCase
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from dashboard.models import Category, Phrase
+
+from .cache import TranslationCache, normalize_text
+from .conversation import conversation_key, issue_session_id, load_context, purge_expired, record_turn, session_for
+from .languages import SUPPORTED_LANGUAGES, language_resolver
+from .langdetect import LocalLanguageDetector
+from .async_translator import AsyncAITranslatorChatbot, get_async_translator, reset_async_translator
+from .memory import TranslationMemory
+from .models import Conversation
+from .phrasebook import get_phrasebook
+from .sanitizer import sanitize_ai_reply
+from .segmenter import iter_chunks
+from .translator import AITranslatorChatbot, get_translator, reset_translator
+
+
+class NormalizeTextTests(SimpleTestCase):
+    def test_collapses_whitespace_and_composes(self):
+        self.assertEqual(normalize_text("  café \n\t au  lait "), "café au lait")
+
+    def test_keeps_case(self):
+        self.assertEqual(normalize_text("Hello"), "Hello")
+        self.assertNotEqual(normalize_text("US"), normalize_text("us"))
+
+    def test_cache_does_not_share_entries_across_case(self):
+        cache = TranslationCache(max_entries=10, ttl=60)
+        cache.set("hello", "fr", "bonjour")
+        self.assertIsNone(cache.get("Hello", "fr"))
+        self.assertEqual(cache.get(" hello ", "fr"), "bonjour")
+
+
+class LanguageResolverTests(SimpleTestCase):
+    def test_names_aliases_typos_and_endonyms(self):
+        for name, code in [
+            ("French", 'fr'), ("chinese (simplified)", 'zh-CN'), ("burmese", 'my'), ("spansh", 'es'),
+            ("japanese please", 'ja'), ("বাংলা", 'bn'), ("Español", 'es'), ("portugese", 'pt'),
+        ]:
+            with self.subTest(name=name):
+                self.assertEqual(language_resolver.resolve(name), code)
+
+    def test_country_names(self):
+        for name, code in [("turkey", 'tr'), ("Turkey", 'tr'), ("türkiye", 'tr'), ("germany", 'de'), ("Brazil", 'pt')]:
+            with self.subTest(name=name):
+                self.assertEqual(language_resolver.resolve(name), code)
+        self.assertEqual(language_resolver.resolve("turkmen"), 'tk')
+
+    def test_codes_only_in_structured_lookups(self):
+        for word, code in [("it", 'it'), ("my", 'my'), ("no", 'no'), ("so", 'so'), ("hi", 'hi')]:
+            with self.subTest(word=word):
+                self.assertIsNone(language_resolver.resolve(word))
+                self.assertEqual(language_resolver.resolve_exact(word), code)
+        self.assertEqual(language_resolver.resolve_exact("zh-cn"), 'zh-CN')
+        self.assertIsNone(language_resolver.resolve_exact("it", allow_codes=False))
+
+    def test_fallback_parse_does_not_read_words_as_codes(self):
+        translator = AITranslatorChatbot()
+        for text in ["We are all in it", "say hello in it", "I left the keys in my"]:
+            with self.subTest(text=text):
+                self.assertFalse(translator.fallback_parse(text)['is_translation_request'])
+        parsed = translator.fallback_parse("good morning in turkey")
+        self.assertEqual((parsed['text'], parsed['target_language_code']), ("good morning", 'tr'))
+
+
+class LocalIntentParserTests(SimpleTestCase):
+    LLM_RESULT = {'is_translation_request': False, 'text': None, 'target_language_code': None,
+                  'target_language_name': None, 'confidence': 0.5}
+
+    def setUp(self):
+        self.translator = AITranslatorChatbot()
+        patcher = mock.patch.object(self.translator, 'parse_with_ai', return_value=self.LLM_RESULT)
+        self.parse_with_ai = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertFastPath(self, text, expected_text, code):
+        self.parse_with_ai.reset_mock()
+        parsed = self.translator.parse_request(text)
+        self.parse_with_ai.assert_not_called()
+        self.assertTrue(parsed['is_translation_request'])
+        self.assertEqual((parsed['text'], parsed['target_language_code']), (expected_text, code))
+
+    def assertSentToLLM(self, text):
+        self.parse_with_ai.reset_mock()
+        self.assertIs(self.translator.parse_request(text), self.LLM_RESULT)
+        self.parse_with_ai.assert_called_once_with(text)
+
+    def test_translate_command(self):
+        self.assertFastPath("translate hello to French", "hello", 'fr')
+        self.assertFastPath("Please translate 'thank you' into German.", "thank you", 'de')
+        self.assertFastPath("translate to Spanish: good night", "good night", 'es')
+
+    def test_how_do_you_say(self):
+        self.assertFastPath("how do you say good morning in Spanish?", "good morning", 'es')
+
+    def test_text_containing_to_or_in_and_a_language(self):
+        self.assertFastPath("translate I want to go to the station to French", "I want to go to the station", 'fr')
+        self.assertFastPath("translate the bread in the oven to Italian", "the bread in the oven", 'it')
+        self.assertFastPath("how do you say I live in Berlin in German", "I live in Berlin", 'de')
+
+    def test_statements_about_languages_and_places_ask_the_llm(self):
+        for text in ["I live in Germany", "I am fluent in French", "good morning in Japanese", "translate hello"]:
+            with self.subTest(text=text):
+                self.assertSentToLLM(text)
+
+    def test_bengali(self):
+        self.assertFastPath("translate শুভ সকাল to English", "শুভ সকাল", 'en')
+        # Bengali command words are recognized as a translation request, but the target is left to the LLM
+        for text in ["বাংলায় অনুবাদ করো: good morning", "শুভ সকাল ইংরেজিতে অনুবাদ করো"]:
+            with self.subTest(text=text):
+                self.assertSentToLLM(text)
+
+    def test_plain_chat_skips_the_llm(self):
+        self.parse_with_ai.reset_mock()
+        parsed = self.translator.parse_request("what's the weather like today")
+        self.parse_with_ai.assert_not_called()
+        self.assertFalse(parsed['is_translation_request'])
+
+
+class TranslationMemoryTests(SimpleTestCase):
+    def setUp(self):
+        self.memory = TranslationMemory(max_entries=100, threshold=0.9)
+
+    def remember(self, text, translation):
+        self.memory.add(text, translation, 'en', 'fr')
+
+    def test_exact_and_near_match(self):
+        self.remember("Where is the train station?", "Où est la gare ?")
+        self.assertEqual(self.memory.lookup("Where is the train station?", 'fr')['match'], 'exact')
+        hit = self.memory.lookup("where is the train station", 'fr')
+        self.assertEqual(hit['match'], 'fuzzy')
+        self.assertEqual(hit['translated_text'], "Où est la gare ?")
+
+    def test_negation_must_match(self):
+        self.remember("I am allergic to peanuts and shellfish", "Je suis allergique aux arachides et aux crustacés")
+        self.assertIsNone(self.memory.lookup("I am not allergic to peanuts and shellfish", 'fr'))
+        self.remember("I don't want to go to the hospital today", "Je ne veux pas aller à l'hôpital aujourd'hui")
+        self.assertIsNone(self.memory.lookup("I do want to go to the hospital today", 'fr'))
+
+    def test_case_distinct_words_are_not_conflated(self):
+        self.remember("US", "États-Unis")
+        self.remember("Tell IT about the printer", "Prévenez le service informatique pour l'imprimante")
+        self.assertIsNone(self.memory.lookup("us", 'fr'))
+        self.assertIsNone(self.memory.lookup("tell it about the printer", 'fr'))
+        self.remember("us", "nous")
+        self.assertEqual(self.memory.lookup("US", 'fr')['translated_text'], "États-Unis")
+        self.assertEqual(self.memory.lookup("us", 'fr')['translated_text'], "nous")
+        self.assertEqual(self.memory.lookup("Tell IT about the printer!", 'fr')['match'], 'fuzzy')
+
+    def test_numbers_must_match(self):
+        self.remember("Please take me to room 1234 in terminal 2 at 10:30", "Emmenez-moi à la chambre 1234")
+        self.assertIsNone(self.memory.lookup("Please take me to room 1235 in terminal 2 at 10:30", 'fr'))
+        self.assertIsNone(self.memory.lookup("Please take me to room 1234 in terminal 3 at 10:30", 'fr'))
+        self.assertIsNone(self.memory.lookup("Please take me to room 1234 in terminal 2 at 10:50", 'fr'))
+        self.assertIsNotNone(self.memory.lookup("please take me to room 1234 in terminal 2 at 10:30!", 'fr'))
+
+    def test_refresh_runs_off_the_request_thread(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_refresh():
+            started.set()
+            release.wait(5)
+
+        with mock.patch.object(self.memory, 'refresh', side_effect=slow_refresh):
+            self.memory.maybe_refresh()
+            self.assertTrue(started.wait(5))
+            # A second call while the first load is running does not start another one
+            self.memory.maybe_refresh()
+            release.set()
+        self.assertIsNone(self.memory.lookup("anything", 'fr'))
+
+
+def _original_sanitize(text):
+    # AITranslatorChatbot.sanitize_ai_reply as it was before it moved to bot.sanitizer
+    if not text or not isinstance(text, str):
+        return text
+    t = text
+    try:
+        if re.search(r'\\u[0-9a-fA-F]{4}|\\x[0-9a-fA-F]{2}|\\n|\\t|\\r', t):
+            try:
+                t = bytes(t, 'utf-8').decode('unicode_escape')
+            except Exception:
+                t = t.replace('\\n', '\n').replace('\\r', '\n').replace('\\t', ' ').replace('\\"', '"').replace("\\'", "'")
+    except Exception:
+        t = t.replace('\\n', '\n').replace('\\t', ' ').replace('\\"', '"').replace("\\'", "'")
+    t = t.replace('\\', '')
+    for ch in ['`', '#']:
+        t = t.replace(ch, '')
+    t = re.sub(r'\n\s*\n+', '\n\n', t)
+    t = t.strip().strip('"\'')
+    t = re.sub(r'\b(ChatGPT|Chat GPT|OpenAI|GPT-4o-mini|GPT-4|GPT4|GPT-3\.5|GPT-3|gpt-4o-mini)\b',
+               'helpmespeak', t, flags=re.IGNORECASE)
+    t = re.sub(r'(?i)\b(my name is|i am|i\'m|call me|you can call me|you may call me)\b\s*[A-Za-z0-9_\-\'"]{0,60}',
+               lambda m: f"{m.group(1)} helpmespeak", t)
+    t = re.sub(r'(?i)\b(assistant|bot|virtual assistant)\b', 'helpmespeak', t)
+    t = re.sub(r'(?i)\b(helpmespeak)(?:[\s,;:.!?-]+\1)+\b', r'\1', t)
+    m = re.match(r'^\s*[\'"]?([A-Z\u00C0-\u017F][\w\-\']{0,60})[\'"]?\s*(?:can\s+refer|can\s+also\s+refer|may\s+refer|is\s+a\s+name|can\s+mean|refers\s+to|is\s+used\s+to|is\s+commonly)\b', t, flags=re.IGNORECASE)
+    if m:
+        return m.group(1).strip()
+    short_m = re.match(r'^\s*[\'"]?([^\'"\s][^\'"]{0,200})[\'"]?\s*[.?!]?\s*$', t)
+    if short_m and len(short_m.group(1).split()) <= 6:
+        return short_m.group(1).strip().strip('.,!?')
+    t = re.sub(r'[ \t]{2,}', ' ', t).strip()
+    return t
+
+
+class PhrasebookTests(TestCase):
+    def setUp(self):
+        self.phrasebook = get_phrasebook()
+        self.phrasebook.invalidate()
+        self.addCleanup(self.phrasebook.invalidate)
+        # Only the Phrase signals may rebuild the index during a test
+        patcher = mock.patch.object(self.phrasebook, 'max_age', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.phrase = Phrase.objects.create(
+            category=Category.objects.create(name="Shopping"),
+            translated_text={"english": "How much is this?", "french": "Combien ça coûte ?"},
+        )
+
+    def test_saving_a_phrase_invalidates_the_lookup(self):
+        self.assertEqual(self.phrasebook.lookup("how much is this", 'fr')['translated_text'], "Combien ça coûte ?")
+
+        self.phrase.translated_text = {"english": "How much is this?", "french": "C'est combien ?"}
+        self.phrase.save()
+
+        self.assertEqual(self.phrasebook.lookup("how much is this", 'fr')['translated_text'], "C'est combien ?")
+
+    def test_deleting_a_phrase_invalidates_the_lookup(self):
+        self.assertIsNotNone(self.phrasebook.lookup("How much is this?", 'fr'))
+        self.phrase.delete()
+        self.assertIsNone(self.phrasebook.lookup("How much is this?", 'fr'))
+
+
+class SanitizerEquivalenceTests(SimpleTestCase):
+    CASES = [
+        "'Khurram' can refer to a name.",
+        '"Khurram" can refer to a name.',
+        "Hello! I'm ChatGPT, your virtual assistant by OpenAI.",
+        "My name is GPT-4 and I am a bot bot bot.",
+        "Bonjour\\nle monde\\u00e9",
+        "`code` and ## headings\n\n\n\nwith   extra\tspaces and a much longer tail than six words here",
+        "\"Hola, ¿cómo estás?\"",
+        "  'nested \"quotes\"'  ",
+        "\\x41 broken \\u12",
+        "",
+        None,
+    ]
+    PIECES = [
+        "'", '"', "\\", "\\n", "\\u00e9", "\\x4", "`", "#", "\n", "\n\n\n", " ", "  ", "\t", ".", "!", "?",
+        "Khurram", "can refer to", "is a name", "I'm", "my name is", "call me", "ChatGPT", "OpenAI",
+        "gpt-4o-mini", "assistant", "bot", "helpmespeak", "hello", "world", "ça va", "مرحبا", "你好",
+    ]
+
+    REPLIES = [
+        "Sure! Here are a few ways to say thank you in Spanish:\n\n1. Gracias\n2. Muchas gracias\n3. Mil gracias\n\n"
+        "Use \"muchas gracias\" when you want to sound a little warmer.",
+        "I'm ChatGPT, an AI assistant developed by OpenAI. I can help you translate phrases, practice "
+        "conversations and explain grammar in more than a hundred languages.",
+        "### Tips for ordering food\n\n- Start with `Je voudrais` (I would like)\n- Add `s'il vous plaît`\n\n\n\n"
+        "Most waiters will switch to English if you hesitate, but trying French is appreciated.",
+        "The word \"Schadenfreude\" comes from German and describes pleasure at someone else's misfortune.\n"
+        "There is no single English word for it, so English speakers borrowed it.",
+        "Bonjour! Je suis votre assistant virtuel. Comment puis-je vous aider aujourd'hui ?",
+    ]
+
+    def test_matches_original_double_pass_on_known_replies(self):
+        # The chat views used to sanitize every reply twice; one pass now gives the same text
+        for text in self.CASES + self.REPLIES:
+            with self.subTest(text=text):
+                self.assertEqual(sanitize_ai_reply(text), _original_sanitize(_original_sanitize(text)))
+
+    def test_idempotent_on_random_replies(self):
+        rng = random.Random(1234)
+        for _ in range(3000):
+            text = ''.join(rng.choice(self.PIECES) for _ in range(rng.randint(1, 14)))
+            once = sanitize_ai_reply(text)
+            self.assertEqual(sanitize_ai_reply(once), once, repr(text))
+
+    def test_khurram_is_settled_in_one_pass(self):
+        self.assertEqual(sanitize_ai_reply("'Khurram' can refer to a name."), "Khurram")
+
+    def test_one_pass_is_faster_than_the_original_two(self):
+        replies = self.REPLIES * 20
+
+        def best_of(sanitize):
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                for text in replies:
+                    sanitize(text)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        single = best_of(sanitize_ai_reply)
+        double = best_of(lambda text: _original_sanitize(_original_sanitize(text)))
+        self.assertLess(single, double, f"one pass {single * 1e6 / len(replies):.1f}µs/reply, "
+                                        f"original two passes {double * 1e6 / len(replies):.1f}µs/reply")
+
+
+class IterChunksTests(SimpleTestCase):
+    LATIN = "The train leaves at 9.30 tomorrow. Please be on time! Where is platform four? It is next to the café. "
+    BENGALI = "আমি বাংলায় কথা বলি। আপনি কেমন আছেন? ট্রেন কখন ছাড়বে। স্টেশনটি কোথায়। "
+
+    def assertReassembles(self, chunks, text):
+        # Chunks are trimmed, so only whitespace at the cuts may be missing
+        position = 0
+        for chunk in chunks:
+            found = text.index(chunk, position)
+            self.assertEqual(text[position:found].strip(), '')
+            position = found + len(chunk)
+        self.assertEqual(text[position:].strip(), '')
+
+    def test_chunks_fit_the_limit_and_reassemble(self):
+        text = (self.LATIN + self.BENGALI) * 40 + "x" * 500 + " 中文句子。第二句！" * 30
+        for limits in ({'max_chars': 120}, {'max_chars': 37}, {'max_bytes': 200}, {'max_bytes': 64}):
+            with self.subTest(**limits):
+                chunks = list(iter_chunks(text, **limits))
+                size = (lambda c: len(c.encode('utf-8'))) if 'max_bytes' in limits else len
+                limit = next(iter(limits.values()))
+                self.assertTrue(all(0 < size(chunk) <= limit for chunk in chunks))
+                self.assertReassembles(chunks, text)
+
+    def test_breaks_on_latin_sentences(self):
+        chunks = list(iter_chunks(self.LATIN, max_chars=60))
+        self.assertEqual(chunks, [
+            "The train leaves at 9.30 tomorrow. Please be on time!",
+            "Where is platform four? It is next to the café.",
+        ])
+
+    def test_breaks_on_bengali_danda(self):
+        chunks = list(iter_chunks(self.BENGALI, max_chars=40))
+        self.assertEqual(chunks, ["আমি বাংলায় কথা বলি। আপনি কেমন আছেন?", "ট্রেন কখন ছাড়বে। স্টেশনটি কোথায়।"])
+
+    def test_overlong_token_is_cut(self):
+        self.assertEqual(list(iter_chunks("x" * 250, max_chars=100)), ["x" * 100, "x" * 100, "x" * 50])
+        # Byte budgets never cut inside a multi-byte character
+        chunks = list(iter_chunks("আ" * 50, max_bytes=100))
+        self.assertEqual(chunks, ["আ" * 33, "আ" * 17])
+
+    def test_empty_input(self):
+        self.assertEqual(list(iter_chunks("", max_chars=100)), [])
+        self.assertEqual(list(iter_chunks("   ", max_chars=2)), [])
+        with self.assertRaises(ValueError):
+            list(iter_chunks("text"))
+
+    def test_scales_linearly(self):
+        def best_of(text):
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                for _chunk in iter_chunks(text, max_bytes=5000):
+                    pass
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        unit = self.LATIN + self.BENGALI
+        small = best_of(unit * (256 * 1024 // len(unit)))
+        large = best_of(unit * (1024 * 1024 // len(unit)))
+        # 4x the input: about 4x the time when linear, 16x when quadratic
+        self.assertLess(large / small, 8, f"256 KiB {small * 1e3:.1f}ms, 1 MiB {large * 1e3:.1f}ms")
+
+
+class LocalLanguageDetectorTests(SimpleTestCase):
+    THRESHOLD = 0.8
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.detector = LocalLanguageDetector(SUPPORTED_LANGUAGES)
+
+    def assertDetected(self, text, code):
+        detected, confidence = self.detector.detect(text)
+        self.assertEqual(detected, code, text)
+        self.assertGreaterEqual(confidence, self.THRESHOLD, text)
+
+    def assertNotConfident(self, text):
+        detected, confidence = self.detector.detect(text)
+        self.assertLess(confidence, self.THRESHOLD, f"{text!r} -> {detected}")
+
+    def test_ordinary_latin_sentences_reach_the_threshold(self):
+        cases = [
+            ('en', "Where is the nearest train station?"),
+            ('en', "Thank you very much for your help"),
+            ('es', "¿Dónde está la estación de tren más cercana?"),
+            ('es', "Muchas gracias por su ayuda"),
+            ('fr', "Bonjour, comment allez-vous aujourd'hui ?"),
+            ('fr', "Je voudrais commander un café et un sandwich"),
+            ('de', "Ich möchte einen Kaffee und ein Sandwich bestellen"),
+            ('de', "Wo ist der nächste Bahnhof?"),
+            ('it', "Grazie mille per il suo aiuto"),
+            ('pt', "Muito obrigado pela sua ajuda"),
+            ('pt', "Onde fica a estação de trem mais próxima?"),
+            ('nl', "Kunt u mij helpen met mijn bagage alstublieft"),
+            ('tr', "Yardımınız için çok teşekkür ederim"),
+            ('pl', "Bardzo dziękuję za pomoc"),
+            ('vi', "Cảm ơn bạn rất nhiều vì đã giúp đỡ"),
+        ]
+        for code, text in cases:
+            with self.subTest(text=text):
+                self.assertDetected(text, code)
+
+    def test_unambiguous_scripts_reach_the_threshold(self):
+        cases = [
+            ('ja', "東京駅に行きたいです"),
+            ('zh-CN', "最近的火车站在哪里？"),
+            ('ko', "도와주셔서 감사합니다"),
+            ('hi', "आपकी मदद के लिए बहुत धन्यवाद"),
+            ('th', "สถานีรถไฟที่ใกล้ที่สุดอยู่ที่ไหน"),
+            ('el', "Πού είναι ο πλησιέστερος σιδηροδρομικός σταθμός;"),
+            ('ar', "كم سعر هذا"),
+            ('ar', "أين أقرب محطة قطار؟"),
+            ('ru', "Где находится ближайшая станция?"),
+            ('uk', "Де знаходиться найближча станція?"),
+            ('ur', "آپ کی مدد کا بہت شکریہ"),
+            ('fa', "خیلی ممنون از کمک شما"),
+        ]
+        for code, text in cases:
+            with self.subTest(text=text):
+                self.assertDetected(text, code)
+
+    def test_wrong_or_weak_guesses_stay_below_the_threshold(self):
+        for text in [
+            "O tempo está muito agradável esta tarde",  # Portuguese, close to Spanish
+            "OK", "ok", "Hi", "lol", "Uber", "Pizza", "iPhone",
+            "Potřebuji najít lékárnu poblíž hotelu",  # Czech, not modeled
+            "Hvor er den nærmeste togstation?",  # Danish, not modeled
+            "Onde está a estación de tren máis próxima?",  # Galician, not modeled
+            "Привет",  # Cyrillic without marker letters: too short to rule out other languages
+        ]:
+            with self.subTest(text=text):
+                self.assertNotConfident(text)
+
+    def test_no_letters(self):
+        self.assertEqual(self.detector.detect("1234 ?!"), (None, 0.0))
+
+
+class ConversationTests(TestCase):
+    def setUp(self):
+        self.anonymous = AnonymousUser()
+
+    def test_anonymous_clients_only_resume_issued_sessions(self):
+        issued = issue_session_id()
+        self.assertEqual(session_for(self.anonymous, issued), issued)
+        self.assertTrue(conversation_key(self.anonymous, issued).startswith('session:'))
+        # A client-chosen or tampered id gets no history and is replaced by a fresh signed one
+        for forged in ("my-session", issued[:-1] + ('A' if issued[-1] != 'A' else 'B')):
+            with self.subTest(session_id=forged):
+                self.assertIsNone(conversation_key(self.anonymous, forged))
+                replacement = session_for(self.anonymous, forged)
+                self.assertNotEqual(replacement, forged)
+                self.assertIsNotNone(conversation_key(self.anonymous, replacement))
+        self.assertIsNotNone(conversation_key(self.anonymous, session_for(self.anonymous, '')))
+
+    def test_signed_in_keys_fit_the_column(self):
+        user = get_user_model().objects.create(email='keys@example.com')
+        max_length = Conversation._meta.get_field('key').max_length
+        key = conversation_key(user, 's' * 128)
+        self.assertLessEqual(len(key), max_length)
+        self.assertNotEqual(key, conversation_key(user, 's' * 127))
+        self.assertEqual(conversation_key(user), f"user:{user.pk}:")
+        record_turn(key, "hello", "hi there")
+        self.assertEqual(len(load_context(key)), 2)
+
+    @override_settings(CONVERSATION_TTL=3600)
+    def test_expired_conversations_are_ignored_and_purged(self):
+        key = conversation_key(self.anonymous, issue_session_id())
+        record_turn(key, "hello", "hi there")
+        self.assertEqual(len(load_context(key)), 2)
+
+        Conversation.objects.filter(key=key).update(updated_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(load_context(key), [])
+        # A new turn on an expired conversation starts over
+        record_turn(key, "again", "welcome back")
+        self.assertEqual([m['content'] for m in load_context(key)], ["again", "welcome back"])
+
+        Conversation.objects.filter(key=key).update(updated_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(purge_expired(), 1)
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_anonymous_first_message_starts_a_session(self):
+        histories = []
+
+        def get_ai_reply(translator, user_input, history=None):
+            histories.append(history)
+            return "It is a given name"
+
+        with mock.patch.object(AITranslatorChatbot, 'get_ai_reply', get_ai_reply), \
+                mock.patch.object(AITranslatorChatbot, 'detect_language', lambda translator, text: 'en'):
+            first = self.client.post('/api/chat/', data={"input": "Who is Khurram?"}, content_type='application/json')
+            session_id = first.json()['session_id']
+            self.client.post(
+                '/api/chat/', data={"input": "Where does he live?", "session_id": session_id},
+                content_type='application/json',
+            )
+
+        self.assertEqual(histories[0], [])
+        self.assertEqual([message['content'] for message in histories[1]], ["Who is Khurram?", "It is a given name"])
+
+    def test_async_chat_authenticates_the_jwt(self):
+        response = self.client.post(
+            '/api/chat/async/', data={"input": "hello"}, content_type='application/json',
+            HTTP_AUTHORIZATION='Bearer not-a-token',
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+
+class AsyncChatViewTests(TestCase):
+    RAW_REPLY = "'Khurram' can refer to a name."
+
+    def setUp(self):
+        raw = self.RAW_REPLY
+
+        def get_ai_reply(translator, user_input, history=None):
+            return translator.finalize_ai_reply(raw)
+
+        async def aget_ai_reply(translator, user_input, history=None):
+            return translator.finalize_ai_reply(raw)
+
+        async def adetect_language(translator, text):
+            return 'en'
+
+        for target, name, replacement in [
+            (AITranslatorChatbot, 'get_ai_reply', get_ai_reply),
+            (AITranslatorChatbot, 'detect_language', lambda translator, text: 'en'),
+            (AsyncAITranslatorChatbot, 'aget_ai_reply', aget_ai_reply),
+            (AsyncAITranslatorChatbot, 'adetect_language', adetect_language),
+        ]:
+            patcher = mock.patch.object(target, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_same_reply_as_the_sync_view(self):
+        sync_reply = self.client.post('/api/chat/', data={"input": "Who is Khurram?"}, content_type='application/json')
+        async_reply = self.client.post('/api/chat/async/', data={"input": "Who is Khurram?"}, content_type='application/json')
+        self.assertEqual(sync_reply.status_code, 200)
+        self.assertEqual(async_reply.status_code, 200)
+        self.assertEqual(async_reply.json()['translation'], sync_reply.json()['translation'])
+        self.assertEqual(async_reply.json()['translation']['translated_text'], "Khurram")
+
+    def test_accepts_form_posts(self):
+        response = self.client.post('/api/chat/async/', data={"input": "Who is Khurram?"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['translation']['given_text'], "Who is Khurram?")
+
+    def test_malformed_json_is_a_parse_error(self):
+        response = self.client.post('/api/chat/async/', data='{"input": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+
+class ChatStreamViewTests(TestCase):
+    REPLY = ("Hello! I'm ChatGPT, a virtual assistant made by OpenAI. I can help you translate phrases "
+             "into many languages, and you can call me Chat GPT if you like. Ask me anything about grammar.")
+
+    def stream(self, chunk_size):
+        deltas = [self.REPLY[i:i + chunk_size] for i in range(0, len(self.REPLY), chunk_size)]
+        with mock.patch.object(AITranslatorChatbot, 'stream_ai_reply', lambda translator, text, history=None: iter(deltas)), \
+                mock.patch.object(AITranslatorChatbot, 'detect_language', lambda translator, text: 'en'):
+            response = self.client.post('/api/chat/stream/', data={"input": "Who are you?"}, content_type='application/json')
+            body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        self.assertTrue(body.endswith('\n\n'))
+        events = []
+        for frame in body[:-2].split('\n\n'):
+            event_line, data_line = frame.split('\n')
+            self.assertTrue(event_line.startswith('event: '))
+            self.assertTrue(data_line.startswith('data: '))
+            events.append((event_line[len('event: '):], json.loads(data_line[len('data: '):])))
+        return events
+
+    def test_tokens_join_up_to_the_done_text(self):
+        # Chunk sizes that cut "I'm" / "ChatGPT", "Chat" / "GPT" and "virtual" / "assistant" at different points
+        for chunk_size in (1, 2, 3, 5, 8, 13, 21):
+            with self.subTest(chunk_size=chunk_size):
+                events = self.stream(chunk_size)
+                names = [name for name, _ in events]
+                self.assertEqual(names[-1], 'done')
+                self.assertEqual(set(names[:-1]), {'token'})
+                streamed = ''.join(data['text'] for _, data in events[:-1])
+                done = events[-1][1]['translation']['translated_text']
+                self.assertEqual(streamed, done)
+                self.assertNotIn('ChatGPT', streamed)
+                self.assertNotIn('helpmespeak helpmespeak', streamed)
+
+
+class DocumentTranslationViewTests(TestCase):
+    SENTENCES = ["Chunk number %d is here." % i for i in range(8)]
+
+    def setUp(self):
+        self.translator = AITranslatorChatbot()
+        self.translator.translation_chunk_chars = 30
+        self.translator.translation_chunk_workers = 4
+        patcher = mock.patch('bot.views.get_translator', return_value=self.translator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_document(self, translate_chunk):
+        with mock.patch.object(self.translator, '_translate_single_chunk', side_effect=translate_chunk):
+            response = self.client.post('/api/translate/document/', data={
+                "text": ' '.join(self.SENTENCES), "target_language": 'fr',
+            }, content_type='application/json')
+            body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertTrue(body.endswith('\n'))
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_chunks_stream_in_document_order(self):
+        finished = []
+
+        def translate_chunk(text, target, source='auto'):
+            # Earlier chunks take longer, so the pool finishes them out of order
+            index = int(re.search(r'\d+', text).group())
+            time.sleep(0.01 * (8 - index))
+            finished.append(index)
+            return self.translator._build_chunk_result(text.upper(), 'en', target)
+
+        lines = self.post_document(translate_chunk)
+
+        self.assertNotEqual(finished, sorted(finished))
+        chunks, summary = lines[:-1], lines[-1]
+        self.assertEqual([line['type'] for line in chunks], ['chunk'] * 8)
+        self.assertEqual([line['index'] for line in chunks], list(range(8)))
+        self.assertEqual([line['translated_text'] for line in chunks], [sentence.upper() for sentence in self.SENTENCES])
+        self.assertTrue(all(line['success'] and line['error'] is None for line in chunks))
+        self.assertEqual(summary['type'], 'summary')
+        self.assertTrue(summary['success'])
+        self.assertEqual(summary['chunk_count'], 8)
+        self.assertEqual(summary['failed_chunks'], 0)
+        self.assertEqual(summary['characters'], sum(len(sentence) for sentence in self.SENTENCES))
+        self.assertEqual(summary['source_lang_code'], 'en')
+        self.assertEqual(summary['target_lang_code'], 'fr')
+
+    def test_failed_chunk_gets_its_own_line(self):
+        def translate_chunk(text, target, source='auto'):
+            if '3' in text:
+                return self.translator._translation_failure("Translation API failed: 503")
+            return self.translator._build_chunk_result(text.upper(), 'en', target)
+
+        lines = self.post_document(translate_chunk)
+
+        chunks, summary = lines[:-1], lines[-1]
+        self.assertEqual([line['index'] for line in chunks], list(range(8)))
+        self.assertFalse(chunks[3]['success'])
+        self.assertEqual(chunks[3]['error'], "Translation API failed: 503")
+        self.assertTrue(all(line['success'] for i, line in enumerate(chunks) if i != 3))
+        self.assertEqual(chunks[4]['translated_text'], self.SENTENCES[4].upper())
+        self.assertFalse(summary['success'])
+        self.assertEqual(summary['chunk_count'], 8)
+        self.assertEqual(summary['failed_chunks'], 1)
+
+
+class AsyncTranslationCacheTests(SimpleTestCase):
+    def test_shared_cache_calls_run_off_the_event_loop(self):
+        cache = TranslationCache(max_entries=10, ttl=60, shared_alias='default')
+        threads = {}
+        get, set_ = cache.get, cache.set
+
+        def record(name, method):
+            def call(*args, **kwargs):
+                threads[name] = threading.current_thread()
+                return method(*args, **kwargs)
+            return call
+
+        translator = AsyncAITranslatorChatbot()
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"data": {"translations": [{"translatedText": "bonjour", "detectedSourceLanguage": "en"}]}}
+
+        async def translate():
+            threads['loop'] = threading.current_thread()
+            return await translator._atranslate_single_chunk("hello", 'fr')
+
+        with mock.patch('bot.cache.get_translation_cache', return_value=cache), \
+                mock.patch('bot.translator.get_translation_cache', return_value=cache), \
+                mock.patch.object(cache, 'get', record('get', get)), \
+                mock.patch.object(cache, 'set', record('set', set_)), \
+                mock.patch('bot.async_translator.http_client.apost', mock.AsyncMock(return_value=response)):
+            result = async_to_sync(translate)()
+
+        self.assertEqual(result['translated_text'], "bonjour")
+        self.assertIsNot(threads['get'], threads['loop'])
+        self.assertIsNot(threads['set'], threads['loop'])
+
+
+class TranslateBatchTests(SimpleTestCase):
+    def setUp(self):
+        self.translator = AITranslatorChatbot()
+        self.translator.translation_batch_max_chars = 20
+        cache_patcher = mock.patch('bot.translator.get_translation_cache', return_value=TranslationCache(max_entries=10, ttl=60))
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+    def test_long_texts_share_the_pool_with_the_batches(self):
+        threads = {}
+
+        def translate_multi(texts, target, source='auto'):
+            threads['multi'] = threading.current_thread().name
+            return [self.translator._build_chunk_result(text.upper(), 'en', target) for text in texts]
+
+        def translate_text(text, target, source='auto'):
+            threads['long'] = threading.current_thread().name
+            return self.translator._single_chunk_result(self.translator._build_chunk_result(text.upper(), 'en', target))
+
+        long_text = "a sentence well over the twenty character limit"
+        with mock.patch.object(self.translator, '_translate_multi', side_effect=translate_multi), \
+                mock.patch.object(self.translator, 'translate_text', side_effect=translate_text):
+            batch = self.translator.translate_batch(["hello", long_text], ['fr'])
+
+        self.assertTrue(threads['long'].startswith('translate-batch'))
+        self.assertTrue(threads['multi'].startswith('translate-batch'))
+        texts = [result['translations'][0]['translation']['translated_text'] for result in batch['results']]
+        self.assertEqual(texts, ["HELLO", long_text.upper()])
+        self.assertEqual(batch['api_calls'], 2)
+
+    def test_failed_request_fails_every_text(self):
+        with mock.patch('bot.translator.http_client.post', side_effect=OSError("down")):
+            results = self.translator._translate_multi(["one", "two"], 'fr')
+        self.assertEqual(results, [self.translator._translation_failure("Translation failed: down")] * 2)
+
+
+class TranslatorSingletonTests(SimpleTestCase):
+    def setUp(self):
+        for reset in (reset_translator, reset_async_translator):
+            reset()
+            self.addCleanup(reset)
+
+    def test_one_instance_per_process(self):
+        for get in (get_translator, get_async_translator):
+            with self.subTest(get=get.__name__):
+                instances = []
+                threads = [threading.Thread(target=lambda: instances.append(get())) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(len({id(instance) for instance in instances}), 1)
+                self.assertIs(get(), instances[0])
+        self.assertIsInstance(get_async_translator(), AsyncAITranslatorChatbot)
+        self.assertIsNot(get_async_translator(), get_translator())
+
+    def test_reset_builds_a_fresh_instance(self):
+        for get, reset in ((get_translator, reset_translator), (get_async_translator, reset_async_translator)):
+            with self.subTest(get=get.__name__):
+                first = get()
+                reset()
+                self.assertIsNot(get(), first)
+
+    def test_missing_key_is_retried_on_the_next_call(self):
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': ''}):
+            with self.assertRaises(ValueError):
+                get_translator()
+        self.assertIsInstance(get_translator(), AITranslatorChatbot)
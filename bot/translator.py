@@ -2,14 +2,48 @@
 import os
 import json
 import re
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional, Dict, List
+from collections import deque
+from typing import Optional, Dict, Iterator, List, Tuple
 from openai import OpenAI
 from dotenv import load_dotenv
+from django.conf import settings
+
+from myproject import http_client
+
+from .cache import get_translation_cache
+from .intent import LocalIntentParser, record_path
+from .langdetect import LocalLanguageDetector, record_detection
+from .languages import SUPPORTED_LANGUAGES, language_resolver
+from .memory import get_translation_memory
+from .phrasebook import get_phrasebook
+from .sanitizer import sanitize_ai_reply
+from .segmenter import iter_chunks
 
 load_dotenv()
 
+
+# Structured-output schema for the combined intent + extraction call in parse_with_ai
+TRANSLATION_REQUEST_SCHEMA = {
+    "name": "translation_request",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "is_translation_request": {"type": "boolean"},
+            "target_language_code": {"type": ["string", "null"]},
+            "target_language_name": {"type": ["string", "null"]},
+            "text": {"type": ["string", "null"]},
+            "confidence": {"type": "number"}
+        },
+        "required": ["is_translation_request", "target_language_code", "target_language_name", "text", "confidence"],
+        "additionalProperties": False
+    }
+}
+
+
 class AITranslatorChatbot:
     def __init__(self):
         try:
@@ -25,171 +59,98 @@ class AITranslatorChatbot:
             self.max_translation_chars = 30000
             self.openai_input_limit = 30000
             self.max_openai_tokens = 2048
+            # Long texts are split into chunks of this size and translated concurrently
+            self.translation_chunk_chars = getattr(settings, 'TRANSLATION_CHUNK_CHARS', 5000)
+            self.translation_chunk_workers = getattr(settings, 'TRANSLATION_CHUNK_WORKERS', 4)
+            # Google v2 accepts up to 128 `q` segments per request; keep the body well under its size limit
+            self.translation_batch_max_segments = getattr(settings, 'TRANSLATION_BATCH_MAX_SEGMENTS', 128)
+            self.translation_batch_max_chars = getattr(settings, 'TRANSLATION_BATCH_MAX_CHARS', 30000)
+
+            self.supported_languages = SUPPORTED_LANGUAGES
+            self.intent_parser = LocalIntentParser(SUPPORTED_LANGUAGES, language_resolver)
+            # Local parses at or above this confidence skip the OpenAI intent call
+            self.intent_fast_path_confidence = getattr(settings, 'INTENT_FAST_PATH_CONFIDENCE', 0.9)
+            self.language_detector = LocalLanguageDetector(SUPPORTED_LANGUAGES)
+            # Local detections at or above this confidence skip the Google detect call
+            self.local_detect_confidence = getattr(settings, 'LANGUAGE_DETECT_LOCAL_CONFIDENCE', 0.8)
+            # Past translations (TranslationHistory) are reused before calling Google
+            self.translation_memory_enabled = getattr(settings, 'TRANSLATION_MEMORY_ENABLED', True)
+            # Curated dashboard phrases are served as-is, ahead of the memory and Google
+            self.phrasebook_enabled = getattr(settings, 'PHRASEBOOK_ENABLED', True)
 
-            self.supported_languages = {
-                'af': 'Afrikaans', 'ak': 'Twi', 'am': 'Amharic', 'ar': 'Arabic', 'as': 'Assamese', 'ay': 'Aymara',
-                'az': 'Azerbaijani', 'bm': 'Bambara', 'be': 'Belarusian', 'bn': 'Bengali', 'bho': 'Bhojpuri',
-                'bs': 'Bosnian', 'bg': 'Bulgarian', 'ca': 'Catalan', 'ceb': 'Cebuano', 'ny': 'Chichewa',
-                'zh': 'Chinese', 'zh-CN': 'Chinese (Simplified)', 'zh-TW': 'Chinese (Traditional)', 'co': 'Corsican',
-                'hr': 'Croatian', 'cs': 'Czech', 'da': 'Danish', 'dv': 'Dhivehi', 'doi': 'Dogri', 'nl': 'Dutch',
-                'en': 'English', 'eo': 'Esperanto', 'et': 'Estonian', 'ee': 'Ewe', 'fil': 'Filipino', 'fi': 'Finnish',
-                'fr': 'French', 'fy': 'Frisian', 'gl': 'Galician', 'ka': 'Georgian', 'de': 'German', 'el': 'Greek',
-                'gn': 'Guarani', 'gu': 'Gujarati', 'ht': 'Haitian Creole', 'ha': 'Hausa', 'haw': 'Hawaiian',
-                'he': 'Hebrew', 'hi': 'Hindi', 'hmn': 'Hmong', 'hu': 'Hungarian', 'is': 'Icelandic', 'ig': 'Igbo',
-                'ilo': 'Ilocano', 'id': 'Indonesian', 'ga': 'Irish', 'it': 'Italian', 'ja': 'Japanese', 'jw': 'Javanese',
-                'kn': 'Kannada', 'kk': 'Kazakh', 'km': 'Khmer', 'rw': 'Kinyarwanda', 'gom': 'Konkani', 'ko': 'Korean',
-                'kri': 'Krio', 'ku': 'Kurdish (Kurmanji)', 'ckb': 'Kurdish (Sorani)', 'ky': 'Kyrgyz', 'lo': 'Lao',
-                'la': 'Latin', 'lv': 'Latvian', 'ln': 'Lingala', 'lt': 'Lithuanian', 'lg': 'Luganda', 'lb': 'Luxembourgish',
-                'mk': 'Macedonian', 'mai': 'Maithili', 'mg': 'Malagasy', 'ms': 'Malay', 'ml': 'Malayalam',
-                'mt': 'Maltese', 'mi': 'Maori', 'mr': 'Marathi', 'mni-Mtei': 'Meiteilon (Manipuri)', 'lus': 'Mizo',
-                'mn': 'Mongolian', 'my': 'Myanmar (Burmese)', 'ne': 'Nepali', 'no': 'Norwegian', 'or': 'Odia (Oriya)',
-                'om': 'Oromo', 'ps': 'Pashto', 'fa': 'Persian', 'pl': 'Polish', 'pt': 'Portuguese', 'pa': 'Punjabi',
-                'qu': 'Quechua', 'ro': 'Romanian', 'ru': 'Russian', 'sm': 'Samoan', 'sa': 'Sanskrit',
-                'gd': 'Scots Gaelic', 'nso': 'Sepedi', 'sr': 'Serbian', 'st': 'Sesotho', 'sn': 'Shona',
-                'sd': 'Sindhi', 'si': 'Sinhala', 'sk': 'Slovak', 'sl': 'Slovenian', 'so': 'Somali', 'es': 'Spanish',
-                'su': 'Sundanese', 'sw': 'Swahili', 'sv': 'Swedish', 'tg': 'Tajik', 'ta': 'Tamil', 'tt': 'Tatar',
-                'te': 'Telugu', 'th': 'Thai', 'ti': 'Tigrinya', 'ts': 'Tsonga', 'tr': 'Turkish', 'tk': 'Turkmen',
-                'uk': 'Ukrainian', 'ur': 'Urdu', 'ug': 'Uyghur', 'uz': 'Uzbek', 'vi': 'Vietnamese', 'cy': 'Welsh',
-                'xh': 'Xhosa', 'yi': 'Yiddish', 'yo': 'Yoruba', 'zu': 'Zulu', 'br': 'Breton', 'oc': 'Occitan',
-                'kmr': 'Northern Kurdish', 'sc': 'Sardinian', 'kl': 'Greenlandic', 'sq': 'Albanian', 'hy': 'Armenian',
-                'eu': 'Basque', 'rm': 'Romansh', 'fur': 'Friulian', 'lad': 'Ladino', 'yue': 'Cantonese', 'wuu': 'Shanghainese',
-                'hak': 'Hakka', 'nan': 'Min Nan', 'gan': 'Gan', 'cdo': 'Min Dong', 'hsn': 'Xiang', 'bo': 'Tibetan',
-                'dz': 'Dzongkha', 'hil': 'Hiligaynon', 'war': 'Waray', 'pam': 'Pampangan', 'bik': 'Bikol', 'pag': 'Pangasinan',
-                'smn': 'Inari Sami', 'se': 'Northern Sami', 'sms': 'Skolt Sami', 'sma': 'Southern Sami', 'smj': 'Lule Sami',
-                'ba': 'Bashkir', 'cv': 'Chuvash', 'sah': 'Yakut', 'ce': 'Chechen', 'av': 'Avar', 'os': 'Ossetic',
-                'kbd': 'Kabardian', 'ady': 'Adyghe', 'lez': 'Lezghian', 'tab': 'Tabasaran', 'kum': 'Kumyk', 'dar': 'Dargwa',
-                'inh': 'Ingush', 'tut': 'Altaic', 'sux': 'Sumerian', 'akk': 'Akkadian', 'xal': 'Kalmyk'
-            }
-
-            self.conversation_history = []
-            
         except Exception as e:
             raise ValueError(f"Initialization failed: {str(e)}")
     
-    def get_normal_reply(self, user_input: str) -> str:
-        # Use OpenAI for normal replies, but sanitize any assistant/model names into "helpmespeak"
+    def get_normal_reply(self, user_input: str, history: Optional[List[Dict]] = None) -> str:
+        # Use OpenAI for normal replies; get_ai_reply has already sanitized assistant/model names into "helpmespeak"
         try:
-            ai_reply = self.get_ai_reply(user_input)
+            ai_reply = self.get_ai_reply(user_input, history=history)
             if ai_reply:
-                try:
-                    return self.sanitize_ai_reply(ai_reply)
-                except Exception:
-                    return ai_reply
+                return ai_reply
         except Exception:
             pass
         return f"I received your message: {user_input}"
     
-    def get_ai_reply(self, user_input: str, temperature: float = 0.6, max_tokens: int = 512) -> str:
+    def get_ai_reply(self, user_input: str, temperature: float = 0.6, max_tokens: int = 512, history: Optional[List[Dict]] = None) -> str:
         """
         Return a normal conversational reply from OpenAI. Falls back to None on errors.
+        `history` holds earlier conversation messages (see bot.conversation.load_context).
         """
         try:
             response = self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful, concise assistant."},
-                    {"role": "user", "content": user_input}
-                ],
+                messages=self._chat_messages(user_input, history),
                 max_tokens=max_tokens,
                 temperature=temperature
             )
-            content = response.choices[0].message.content.strip()
-            # strip code fences if any
-            if content.startswith("```") and content.endswith("```"):
-                # remove first and last fence
-                parts = content.split("\n")
-                if len(parts) >= 3:
-                    content = "\n".join(parts[1:-1]).strip()
-
-            # sanitize names: ensure any model/assistant name becomes "helpmespeak"
-            try:
-                content = self.sanitize_ai_reply(content)
-            except Exception:
-                pass
-
-            return content
+            return self.finalize_ai_reply(response.choices[0].message.content)
         except Exception:
             return None
 
-    def sanitize_ai_reply(self, text: str) -> str:
+    def stream_ai_reply(self, user_input: str, temperature: float = 0.6, max_tokens: int = 512, history: Optional[List[Dict]] = None):
         """
-        Replace occurrences of model/assistant names in AI reply with 'helpmespeak',
-        while keeping other parts of the reply intact. Also clean formatting:
-        - convert escaped newlines to real newlines
-        - remove backslashes, backticks, hashes and stray escape chars
-        - collapse duplicate helpmespeak tokens
+        Yield the raw text deltas of a normal conversational reply as OpenAI produces them.
+        Raises on API errors; callers decide how to fall back.
         """
-        if not text or not isinstance(text, str):
-            return text
-
-        t = text
-
-        # Try to unescape JSON/unicode style escapes so "\n" becomes an actual newline, etc.
-        # Only attempt unicode_escape when the text actually contains escape sequences
-        try:
-            if re.search(r'\\u[0-9a-fA-F]{4}|\\x[0-9a-fA-F]{2}|\\n|\\t|\\r', t):
-                # decode escaped sequences like "\n", "\u09A6" safely
-                try:
-                    t = bytes(t, 'utf-8').decode('unicode_escape')
-                except Exception:
-                    # final safe fallbacks
-                    t = t.replace('\\n', '\n').replace('\\r', '\n').replace('\\t', ' ').replace('\\"', '"').replace("\\'", "'")
-            else:
-                # no escaped sequences — leave original unicode intact
-                t = t
-        except Exception:
-            t = t.replace('\\n', '\n').replace('\\t', ' ').replace('\\"', '"').replace("\\'", "'")
-
-        # Remove stray backslashes left-over
-        t = t.replace('\\', '')
-
-        # Remove characters the user asked not to include
-        for ch in ['`', '#']:
-            t = t.replace(ch, '')
-
-        # Normalize repeated blank lines to max two
-        t = re.sub(r'\n\s*\n+', '\n\n', t)
-
-        # Trim surrounding whitespace and quotes
-        t = t.strip().strip('"\'')
-
-        # Replace explicit model or vendor names (ChatGPT, OpenAI, GPT-4, etc.) with helpmespeak
-        t = re.sub(r'\b(ChatGPT|Chat GPT|OpenAI|GPT-4o-mini|GPT-4|GPT4|GPT-3\.5|GPT-3|gpt-4o-mini)\b',
-                   'helpmespeak', t, flags=re.IGNORECASE)
-
-        # Replace phrases like "my name is X", "I am X", "call me X" -> keep phrase but force name to helpmespeak
-        def _name_replacer(m):
-            prefix = m.group(1)
-            return f"{prefix} helpmespeak"
-        t = re.sub(r'(?i)\b(my name is|i am|i\'m|call me|you can call me|you may call me)\b\s*[A-Za-z0-9_\-\'"]{0,60}',
-                   _name_replacer, t)
-
-        # Replace isolated occurrences of common assistant identifiers
-        t = re.sub(r'(?i)\b(assistant|bot|virtual assistant)\b', 'helpmespeak', t)
-
-        # Collapse repeated occurrences of the replacement (avoid "helpmespeak helpmespeak")
-        try:
-            t = re.sub(r'(?i)\b(helpmespeak)(?:[\s,;:.!?-]+\1)+\b', r'\1', t)
-        except Exception:
-            pass
+        stream = self.openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=self._chat_messages(user_input, history),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _chat_messages(self, user_input: str, history: Optional[List[Dict]] = None) -> List[Dict]:
+        return [
+            {"role": "system", "content": "You are a helpful, concise assistant."},
+            *(history or []),
+            {"role": "user", "content": user_input}
+        ]
 
-        # If the model gave an explanatory sentence about a name like:
-        #   "Khurram can refer to ..."  or  '"Khurram" can refer to ...'
-        # or a short definition, return only the plain name or a short cleaned token.
+    def finalize_ai_reply(self, content: str) -> str:
+        """Strip code fences and sanitize a complete OpenAI reply."""
+        content = content.strip()
+        # strip code fences if any
+        if content.startswith("```") and content.endswith("```"):
+            # remove first and last fence
+            parts = content.split("\n")
+            if len(parts) >= 3:
+                content = "\n".join(parts[1:-1]).strip()
+
+        # sanitize names: ensure any model/assistant name becomes "helpmespeak"
         try:
-            m = re.match(r'^\s*[\'"]?([A-Z\u00C0-\u017F][\w\-\']{0,60})[\'"]?\s*(?:can\s+refer|can\s+also\s+refer|may\s+refer|is\s+a\s+name|can\s+mean|refers\s+to|is\s+used\s+to|is\s+commonly)\b', t, flags=re.IGNORECASE)
-            if m:
-                return m.group(1).strip()
-            short_m = re.match(r'^\s*[\'"]?([^\'"\s][^\'"]{0,200})[\'"]?\s*[.?!]?\s*$', t)
-            if short_m and len(short_m.group(1).split()) <= 6:
-                return short_m.group(1).strip().strip('.,!?')
+            content = self.sanitize_ai_reply(content)
         except Exception:
             pass
 
-        # Normalize multiple spaces introduced by replacements
-        t = re.sub(r'[ \t]{2,}', ' ', t).strip()
+        return content
 
-        return t
+    def sanitize_ai_reply(self, text: str) -> str:
+        """Replace model/assistant names with 'helpmespeak' and clean formatting (see bot.sanitizer)."""
+        return sanitize_ai_reply(text)
 
     def smart_text_extraction(self, user_input: str, target_language: str) -> str:
         extraction_prompt = f"""You are a smart text extractor for translation requests. Your job is to identify and extract ONLY the main content that needs to be translated, removing all command words, language specifications, and instructions.
@@ -275,137 +236,209 @@ Respond with ONLY the extracted text, nothing else. If no text to translate is f
         return cleaned_text if cleaned_text else user_input.strip()
 
     def detect_language(self, text: str) -> str:
+        local_code, local_confidence = self.language_detector.detect(text)
+        if local_code and local_confidence >= self.local_detect_confidence:
+            record_detection('local')
+            return local_code
         try:
-            detection_text = text[:500] if len(text) > 500 else text
-            url = f"https://translation.googleapis.com/language/translate/v2/detect?key={self.google_api_key}"
-            data = {'q': detection_text}
-            response = requests.post(url, data=data)
+            url, data = self._detect_request(text)
+            response = http_client.post(url, endpoint='google.detect', data=data)
             if response.status_code == 200:
-                result = response.json()
-                detected_language = result['data']['detections'][0][0]['language']
-                confidence = result['data']['detections'][0][0]['confidence']
-                return detected_language if confidence > 0.3 and detected_language in self.supported_languages else 'auto'
-            return 'auto'
+                return self._read_detection(response.json())
         except Exception:
-            return 'auto'
+            pass
+        return self._offline_detection(local_code, local_confidence)
+
+    def _detect_request(self, text: str) -> tuple:
+        detection_text = text[:500] if len(text) > 500 else text
+        url = f"https://translation.googleapis.com/language/translate/v2/detect?key={self.google_api_key}"
+        return url, {'q': detection_text}
+
+    def _read_detection(self, result: dict) -> str:
+        record_detection('google')
+        detected_language = result['data']['detections'][0][0]['language']
+        confidence = result['data']['detections'][0][0]['confidence']
+        return detected_language if confidence > 0.3 and detected_language in self.supported_languages else 'auto'
+
+    def _offline_detection(self, local_code: Optional[str], local_confidence: float) -> str:
+        # Google unreachable or failing: a reasonable local guess beats 'auto'
+        if local_code and local_confidence > 0.3:
+            record_detection('local_offline')
+            return local_code
+        return 'auto'
 
     def split_text_into_chunks(self, text: str, max_chars: int) -> List[str]:
-        if len(text) <= max_chars:
-            return [text]
-        chunks = []
-        current_chunk = ""
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        for sentence in sentences:
-            if len(sentence) > max_chars:
-                words = sentence.split()
-                temp_sentence = ""
-                for word in words:
-                    if len(temp_sentence + word + " ") <= max_chars:
-                        temp_sentence += word + " "
-                    else:
-                        if temp_sentence:
-                            chunks.append(temp_sentence.strip())
-                        temp_sentence = word + " "
-                if temp_sentence:
-                    if len(current_chunk + temp_sentence) <= max_chars:
-                        current_chunk += temp_sentence
-                    else:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        current_chunk = temp_sentence
-            else:
-                if len(current_chunk + sentence) <= max_chars:
-                    current_chunk += sentence + " "
-                else:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = sentence + " "
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        return chunks
+        """Split on sentence boundaries (including ।, 。 and ؟) into chunks of at most max_chars (see bot.segmenter)."""
+        return list(iter_chunks(text, max_chars=max_chars))
 
     def translate_text(self, text: str, target_language_code: str, source_language_code: str = 'auto') -> dict:
         try:
-            if len(text) > self.max_translation_chars:
-                text_chunks = self.split_text_into_chunks(text, self.max_translation_chars)
-                translated_chunks = []
-                source_language = None
-                for chunk in text_chunks:
-                    chunk_result = self._translate_single_chunk(chunk, target_language_code, source_language_code)
-                    if not chunk_result['success']:
-                        return chunk_result
-                    translated_chunks.append(chunk_result['translated_text'])
-                    if source_language is None:
-                        source_language = chunk_result['source_language']
-                full_translation = ' '.join(translated_chunks)
-                return {
-                    'success': True,
-                    'translated_text': full_translation,
-                    'source_language': source_language,
-                    'target_language': self.supported_languages.get(target_language_code, target_language_code),
-                    'source_lang_code': chunk_result['source_lang_code'],
-                    'target_lang_code': target_language_code,
-                    'chunked': True,
-                    'chunk_count': len(text_chunks)
-                }
+            if len(text) > self.translation_chunk_chars:
+                text_chunks = self.split_text_into_chunks(text, self.translation_chunk_chars)
+                chunk_results, parallelism, failure = self._translate_chunks(text_chunks, target_language_code, source_language_code)
+                if failure:
+                    return failure
+                return self._join_chunk_results(chunk_results, target_language_code, parallelism)
             else:
-                result = self._translate_single_chunk(text, target_language_code, source_language_code)
-                if result['success']:
-                    result['chunked'] = False
-                    result['chunk_count'] = 1
-                return result
+                return self._single_chunk_result(self._translate_single_chunk(text, target_language_code, source_language_code))
         except Exception as e:
-            return {
-                'success': False,
-                'error': f"Translation failed: {str(e)}",
-                'translated_text': None,
-                'source_language': None,
-                'target_language': None
+            return self._translation_failure(f"Translation failed: {str(e)}")
+
+    def _join_chunk_results(self, chunk_results: List[dict], target_language_code: str, parallelism: int) -> dict:
+        first = chunk_results[0]
+        return {
+            'success': True,
+            'translated_text': ' '.join(r['translated_text'] for r in chunk_results),
+            'source_language': first['source_language'],
+            'target_language': self.supported_languages.get(target_language_code, target_language_code),
+            'source_lang_code': first['source_lang_code'],
+            'target_lang_code': target_language_code,
+            'chunked': True,
+            'chunk_count': len(chunk_results),
+            'parallelism': parallelism
+        }
+
+    def _single_chunk_result(self, result: dict) -> dict:
+        if result['success']:
+            result['chunked'] = False
+            result['chunk_count'] = 1
+            result['parallelism'] = 1
+        return result
+
+    def _translation_failure(self, error: str) -> dict:
+        return {
+            'success': False,
+            'error': error,
+            'translated_text': None,
+            'source_language': None,
+            'target_language': None
+        }
+
+    def _translate_chunks(self, chunks: List[str], target_language_code: str, source_language_code: str = 'auto'):
+        """
+        Translate chunks concurrently on a bounded pool and return (results_in_order, parallelism, failure).
+        The first failed chunk cancels every chunk that has not started yet.
+        """
+        parallelism = max(1, min(self.translation_chunk_workers, len(chunks)))
+        results = [None] * len(chunks)
+        executor = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='translate-chunk')
+        try:
+            futures = {
+                executor.submit(self._translate_single_chunk, chunk, target_language_code, source_language_code): index
+                for index, chunk in enumerate(chunks)
             }
+            for future in as_completed(futures):
+                result = future.result()
+                if not result['success']:
+                    return None, parallelism, result
+                results[futures[future]] = result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results, parallelism, None
+
+    def iter_translate_document(self, text: str, target_language_code: str, source_language_code: str = 'auto') -> Iterator[Tuple[str, dict]]:
+        """
+        Yield (chunk, result) for each chunk of a long document, in document order, as soon as the
+        chunk and all chunks before it are translated. Chunks are produced lazily and at most
+        translation_chunk_workers are in flight, so memory stays bounded by the window, not the document.
+        """
+        window = max(1, self.translation_chunk_workers)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix='translate-document')
+        try:
+            for chunk in iter_chunks(text, max_chars=self.translation_chunk_chars):
+                pending.append((chunk, executor.submit(self._translate_single_chunk, chunk, target_language_code, source_language_code)))
+                if len(pending) >= window:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            while pending:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        finally:
+            # Also runs when the client disconnects and the generator is closed early
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def _translate_single_chunk(self, text: str, target_language_code: str, source_language_code: str = 'auto') -> dict:
+        cached = self._cached_chunk(text, target_language_code, source_language_code)
+        if cached is not None:
+            return cached
         try:
-            url = f"https://translation.googleapis.com/language/translate/v2?key={self.google_api_key}"
-            data = {
-                'q': text,
-                'target': target_language_code,
-                'format': 'text'
-            }
-            if source_language_code != 'auto':
-                data['source'] = source_language_code
-            response = requests.post(url, data=data)
+            url, data = self._translate_request(text, target_language_code, source_language_code)
+            response = http_client.post(url, endpoint='google.translate', data=data)
             if response.status_code == 200:
-                result = response.json()
-                translated_text = result['data']['translations'][0]['translatedText']
-                detected_source = result['data']['translations'][0].get('detectedSourceLanguage', source_language_code if source_language_code != 'auto' else 'en')
-                return {
-                    'success': True,
-                    'translated_text': translated_text,
-                    'source_language': self.supported_languages.get(detected_source, detected_source),
-                    'target_language': self.supported_languages.get(target_language_code, target_language_code),
-                    'source_lang_code': detected_source,
-                    'target_lang_code': target_language_code
-                }
-            return {
-                'success': False,
-                'error': f"Translation API failed: {response.status_code}",
-                'translated_text': None,
-                'source_language': None,
-                'target_language': None
-            }
+                return self._read_translation(response.json(), text, target_language_code, source_language_code)
+            return self._translation_failure(f"Translation API failed: {response.status_code}")
         except Exception as e:
-            return {
-                'success': False,
-                'error': f"Translation failed: {str(e)}",
-                'translated_text': None,
-                'source_language': None,
-                'target_language': None
-            }
+            return self._translation_failure(f"Translation failed: {str(e)}")
+
+    def _cached_chunk(self, text: str, target_language_code: str, source_language_code: str = 'auto') -> Optional[dict]:
+        cached = get_translation_cache().get(text, target_language_code, source_language_code)
+        if cached is None:
+            return None
+        return self._build_chunk_result(cached['translated_text'], cached['detected_source'], target_language_code)
+
+    def _translate_request(self, text: str, target_language_code: str, source_language_code: str = 'auto') -> tuple:
+        url = f"https://translation.googleapis.com/language/translate/v2?key={self.google_api_key}"
+        data = {
+            'q': text,
+            'target': target_language_code,
+            'format': 'text'
+        }
+        if source_language_code != 'auto':
+            data['source'] = source_language_code
+        return url, data
+
+    def _read_translation(self, result: dict, text: str, target_language_code: str, source_language_code: str = 'auto') -> dict:
+        translated_text = result['data']['translations'][0]['translatedText']
+        detected_source = result['data']['translations'][0].get('detectedSourceLanguage', source_language_code if source_language_code != 'auto' else 'en')
+        get_translation_cache().set(text, target_language_code, {
+            'translated_text': translated_text,
+            'detected_source': detected_source
+        }, source_language_code)
+        return self._build_chunk_result(translated_text, detected_source, target_language_code)
+
+    def _build_chunk_result(self, translated_text: str, detected_source: str, target_language_code: str) -> dict:
+        return {
+            'success': True,
+            'translated_text': translated_text,
+            'source_language': self.supported_languages.get(detected_source, detected_source),
+            'target_language': self.supported_languages.get(target_language_code, target_language_code),
+            'source_lang_code': detected_source,
+            'target_lang_code': target_language_code
+        }
+
+    def parse_request(self, user_input: str) -> Dict:
+        """
+        Parse a chat message, using the local rule-based parser when it is confident
+        and falling back to parse_with_ai (OpenAI) only for ambiguous inputs.
+        """
+        local_result = self.intent_parser.parse(user_input)
+        if local_result['confidence'] >= self.intent_fast_path_confidence:
+            record_path('local')
+            return local_result
+        record_path('llm')
+        return self.parse_with_ai(user_input)
+
+    def needs_ai_parse(self, user_input: str) -> bool:
+        """True when parse_request would have to call OpenAI for this message."""
+        return self.intent_parser.parse(user_input)['confidence'] < self.intent_fast_path_confidence
 
     def parse_with_ai(self, user_input: str) -> Dict:
+        """
+        Detect intent, target language and the text to translate with a single
+        JSON-schema-constrained OpenAI call. Falls back to fallback_parse on any error.
+        """
+        try:
+            response = self.openai_client.chat.completions.create(**self._parse_completion_kwargs(user_input))
+            return self._read_parse(response.choices[0].message.content, user_input)
+        except Exception:
+            record_path('llm_fallback')
+            return self.fallback_parse(user_input)
+
+    def _parse_completion_kwargs(self, user_input: str) -> dict:
         parsing_input = user_input[:self.openai_input_limit] + "..." if len(user_input) > self.openai_input_limit else user_input
         language_list = ", ".join([f"{name}={code}" for code, name in sorted(self.supported_languages.items(), key=lambda x: x[1])])
-        prompt = f"""You are a translation request parser. Analyze the user input and determine if it's a translation request and what the target language should be.
+        prompt = f"""You are a translation request parser. Analyze the user input, determine if it's a translation request and what the target language should be, and extract the text that needs to be translated.
 
 User Input: "{parsing_input}"
 
@@ -416,68 +449,71 @@ Instructions:
 2. Identify the target language.
 3. Handle typos in language names.
 4. Support all Google Translate languages.
+5. For translation requests, put ONLY the content to translate in "text": remove command words (translate, traduire, অনুবাদ, ترجم, ...), language specifications ("to Spanish", "in zulu", ...) and instruction words ("please", "can you", ...). Keep all content sentences and their original meaning.
+6. For anything else, set "text", "target_language_code" and "target_language_name" to null.
 
 Examples:
-- "I live in Bangladesh in Zulu" → is_translation_request: true, target: Zulu (zu)
-- "hello world in Hawaiian" → is_translation_request: true, target: Hawaiian (haw)
-- "translate hello to Yoruba" → is_translation_request: true, target: Yoruba (yo)
-- "I live in Bangladesh" → is_translation_request: false
-
-Respond in JSON:
-{{
-    "is_translation_request": true/false,
-    "target_language_code": "language code or null",
-    "target_language_name": "full language name or null",
-    "confidence": 0.0-1.0
-}}"""
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a translation request parser. Always respond in valid JSON format only."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_openai_tokens,
-                temperature=0.1
+- "I live in Bangladesh in Zulu" → is_translation_request: true, target: Zulu (zu), text: "I live in Bangladesh"
+- "hello world in Hawaiian" → is_translation_request: true, target: Hawaiian (haw), text: "hello world"
+- "translate hello to Yoruba" → is_translation_request: true, target: Yoruba (yo), text: "hello"
+- "how do you say thank you in german" → is_translation_request: true, target: German (de), text: "thank you"
+- "I live in Bangladesh" → is_translation_request: false"""
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": "You are a translation request parser. Always respond in valid JSON format only."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": self.max_openai_tokens,
+            "temperature": 0.1,
+            "response_format": {"type": "json_schema", "json_schema": TRANSLATION_REQUEST_SCHEMA}
+        }
+
+    def _read_parse(self, content: str, user_input: str) -> Dict:
+        result = self._load_json_object(content)
+        confidence = result.get('confidence')
+        if not isinstance(confidence, (int, float)):
+            confidence = None
+        if result.get('is_translation_request', False):
+            target_code = (
+                language_resolver.resolve_exact(result.get('target_language_code') or '')
+                or language_resolver.resolve(result.get('target_language_name') or '')
             )
-            ai_response = response.choices[0].message.content.strip()
-            if ai_response.startswith('```json'):
-                ai_response = ai_response[7:-3]
-            result = json.loads(ai_response.strip())
-            if result.get('is_translation_request', False):
-                target_code = result.get('target_language_code', '').lower().strip()
-                if target_code and target_code in self.supported_languages:
-                    target_language_name = self.supported_languages[target_code]
-                    extracted_text = self.smart_text_extraction(user_input, target_language_name)
-                    if extracted_text and extracted_text.strip():
-                        return {
-                            'is_translation_request': True,
-                            'text': extracted_text,
-                            'target_language_code': target_code,
-                            'target_language_name': target_language_name,
-                            'confidence': result.get('confidence', 0.8)
-                        }
-                target_name = result.get('target_language_name', '').lower().strip()
-                for code, name in self.supported_languages.items():
-                    if target_name and (target_name in name.lower() or name.lower().startswith(target_name)):
-                        extracted_text = self.smart_text_extraction(user_input, name)
-                        if extracted_text and extracted_text.strip():
-                            return {
-                                'is_translation_request': True,
-                                'text': extracted_text,
-                                'target_language_code': code,
-                                'target_language_name': name,
-                                'confidence': result.get('confidence', 0.7)
-                            }
-            return {
-                'is_translation_request': False,
-                'text': None,
-                'target_language_code': None,
-                'target_language_name': None,
-                'confidence': result.get('confidence', 0.5)
-            }
-        except Exception:
-            return self.fallback_parse(user_input)
+            if target_code:
+                extracted_text = (result.get('text') or '').strip().strip('"\'').strip()
+                if not extracted_text or extracted_text == "NO_TEXT_FOUND":
+                    extracted_text = self.fallback_text_extraction(user_input)
+                if extracted_text:
+                    return {
+                        'is_translation_request': True,
+                        'text': extracted_text,
+                        'target_language_code': target_code,
+                        'target_language_name': self.supported_languages[target_code],
+                        'confidence': confidence if confidence is not None else 0.8
+                    }
+        return {
+            'is_translation_request': False,
+            'text': None,
+            'target_language_code': None,
+            'target_language_name': None,
+            'confidence': confidence if confidence is not None else 0.5
+        }
+
+    def _load_json_object(self, content: str) -> dict:
+        """Parse a JSON object from a model reply, tolerating code fences and surrounding prose."""
+        content = (content or '').strip()
+        if content.startswith('```'):
+            content = re.sub(r'^```[a-zA-Z]*\s*|\s*```$', '', content)
+        try:
+            result = json.loads(content)
+        except ValueError:
+            start, end = content.find('{'), content.rfind('}')
+            if start == -1 or end <= start:
+                raise
+            result = json.loads(content[start:end + 1])
+        if not isinstance(result, dict):
+            raise ValueError("Expected a JSON object")
+        return result
 
     def fallback_parse(self, user_input: str) -> Dict:
         user_input_lower = user_input.lower().strip()
@@ -494,59 +530,10 @@ Respond in JSON:
                 'confidence': 0.8
             }
         implicit_match = re.search(r'^(.+?)\s+in\s+([a-zA-Z\s]+)', user_input_lower)
-        lang_mapping = {
-            'spanish': 'es', 'span ish': 'es', 'spansh': 'es', 'english': 'en', 'engl ish': 'en', 'englsh': 'en',
-            'french': 'fr', 'fren ch': 'fr', 'frnch': 'fr', 'german': 'de', 'germ an': 'de', 'germn': 'de',
-            'italian': 'it', 'ital ian': 'it', 'portuguese': 'pt', 'port uguese': 'pt', 'russian': 'ru',
-            'russ ian': 'ru', 'chinese': 'zh', 'chin ese': 'zh', 'japanese': 'ja', 'japan ese': 'ja', 'japan': 'ja',
-            'korean': 'ko', 'kor ean': 'ko', 'arabic': 'ar', 'arab ic': 'ar', 'hindi': 'hi', 'hind i': 'hi',
-            'bengali': 'bn', 'beng ali': 'bn', 'dutch': 'nl', 'du tch': 'nl', 'swedish': 'sv', 'swed ish': 'sv',
-            'norwegian': 'no', 'norw egian': 'no', 'urdu': 'ur', 'ur du': 'ur', 'tamil': 'ta', 'tam il': 'ta',
-            'telugu': 'te', 'tel ugu': 'te', 'creole': 'ht', 'haitian creole': 'ht', 'haitian': 'ht', 'zulu': 'zu',
-            'zu lu': 'zu', 'yoruba': 'yo', 'yor uba': 'yo', 'swahili': 'sw', 'swah ili': 'sw', 'hawaiian': 'haw',
-            'hawai ian': 'haw', 'esperanto': 'eo', 'esper anto': 'eo', 'afrikaans': 'af', 'afrik aans': 'af',
-            'albanian': 'sq', 'alban ian': 'sq', 'amharic': 'am', 'amhar ic': 'am', 'armenian': 'hy',
-            'armen ian': 'hy', 'azerbaijani': 'az', 'azerbaij ani': 'az', 'basque': 'eu', 'bas que': 'eu',
-            'belarusian': 'be', 'belaru sian': 'be', 'bosnian': 'bs', 'bosn ian': 'bs', 'bulgarian': 'bg',
-            'bulgar ian': 'bg', 'catalan': 'ca', 'catal an': 'ca', 'cebuano': 'ceb', 'cebu ano': 'ceb',
-            'croatian': 'hr', 'croat ian': 'hr', 'czech': 'cs', 'cz ech': 'cs', 'danish': 'da', 'dan ish': 'da',
-            'estonian': 'et', 'eston ian': 'et', 'filipino': 'tl', 'filip ino': 'tl', 'finnish': 'fi',
-            'finn ish': 'fi', 'georgian': 'ka', 'georg ian': 'ka', 'greek': 'el', 'gre ek': 'el',
-            'gujarati': 'gu', 'gujar ati': 'gu', 'hausa': 'ha', 'haus a': 'ha', 'hebrew': 'he', 'hebr ew': 'he',
-            'hungarian': 'hu', 'hungar ian': 'hu', 'icelandic': 'is', 'icel andic': 'is', 'igbo': 'ig',
-            'ig bo': 'ig', 'indonesian': 'id', 'indones ian': 'id', 'irish': 'ga', 'ir ish': 'ga',
-            'javanese': 'jw', 'javan ese': 'jw', 'kannada': 'kn', 'kann ada': 'kn', 'kazakh': 'kk',
-            'kaz akh': 'kk', 'khmer': 'km', 'khm er': 'km', 'kurdish': 'ku', 'kurd ish': 'ku', 'kyrgyz': 'ky',
-            'kyrg yz': 'ky', 'lao': 'lo', 'la o': 'lo', 'latin': 'la', 'lat in': 'la', 'latvian': 'lv',
-            'latv ian': 'lv', 'lithuanian': 'lt', 'lithuan ian': 'lt', 'luxembourgish': 'lb',
-            'luxemb ourgish': 'lb', 'macedonian': 'mk', 'macedon ian': 'mk', 'malagasy': 'mg',
-            'malag asy': 'mg', 'malay': 'ms', 'mal ay': 'ms', 'malayalam': 'ml', 'malaya lam': 'ml',
-            'maltese': 'mt', 'malt ese': 'mt', 'maori': 'mi', 'mao ri': 'mi', 'marathi': 'mr',
-            'marath i': 'mr', 'mongolian': 'mn', 'mongol ian': 'mn', 'myanmar': 'my', 'myan mar': 'my',
-            'burmese': 'my', 'nepali': 'ne', 'nep ali': 'ne', 'persian': 'fa', 'pers ian': 'fa',
-            'polish': 'pl', 'pol ish': 'pl', 'punjabi': 'pa', 'punj abi': 'pa', 'romanian': 'ro',
-            'roman ian': 'ro', 'samoan': 'sm', 'samo an': 'sm', 'sanskrit': 'sa', 'sanskr it': 'sa',
-            'serbian': 'sr', 'serb ian': 'sr', 'sinhala': 'si', 'sinh ala': 'si', 'slovak': 'sk',
-            'slov ak': 'sk', 'slovenian': 'sl', 'sloven ian': 'sl', 'somali': 'so', 'som ali': 'so',
-            'sundanese': 'su', 'sundan ese': 'su', 'tajik': 'tg', 'taj ik': 'tg', 'tatar': 'tt',
-            'tat ar': 'tt', 'thai': 'th', 'th ai': 'th', 'turkish': 'tr', 'turk ish': 'tr',
-            'turkmen': 'tk', 'turkm en': 'tk', 'ukrainian': 'uk', 'ukrain ian': 'uk', 'uyghur': 'ug',
-            'uygh ur': 'ug', 'uzbek': 'uz', 'uzb ek': 'uz', 'vietnamese': 'vi', 'vietnam ese': 'vi',
-            'welsh': 'cy', 'wel sh': 'cy', 'xhosa': 'xh', 'xhos a': 'xh', 'yiddish': 'yi', 'yidd ish': 'yi'
-        }
         if implicit_match:
             text_part = implicit_match.group(1).strip()
             lang_part = implicit_match.group(2).strip()
-            lang_key = lang_part.replace(' ', '')
-            target_code = lang_mapping.get(lang_key) or lang_mapping.get(lang_part)
-            if not target_code:
-                for code, name in self.supported_languages.items():
-                    if lang_key and (lang_key in name.lower().replace(' ', '') or name.lower().replace(' ', '').startswith(lang_key[:4])):
-                        target_code = code
-                        break
-                    if lang_part and (lang_part in name.lower() or name.lower().startswith(lang_part[:4])):
-                        target_code = code
-                        break
+            target_code = language_resolver.resolve(lang_part)
             if target_code and target_code in self.supported_languages:
                 extracted_text = text_part.strip()
                 return {
@@ -560,16 +547,7 @@ Respond in JSON:
         if explicit_match and any(keyword in explicit_match.group(1) for keyword in translation_keywords):
             text_part = explicit_match.group(1).strip()
             lang_part = explicit_match.group(2).strip() if explicit_match.group(2) else None
-            lang_key = lang_part.replace(' ', '') if lang_part else ''
-            target_code = lang_mapping.get(lang_key) or lang_mapping.get(lang_part)
-            if not target_code:
-                for code, name in self.supported_languages.items():
-                    if lang_key and (lang_key in name.lower().replace(' ', '') or name.lower().replace(' ', '').startswith(lang_key[:4])):
-                        target_code = code
-                        break
-                    if lang_part and (lang_part in name.lower() or name.lower().startswith(lang_part[:4])):
-                        target_code = code
-                        break
+            target_code = language_resolver.resolve(lang_part or '')
             if target_code and target_code in self.supported_languages:
                 extracted_text = self.smart_text_extraction(text_part, self.supported_languages[target_code])
                 if not extracted_text or extracted_text.strip() == "":
@@ -588,19 +566,7 @@ Respond in JSON:
             lang_match = re.search(r'(?:to|in|into)\s+([a-zA-Z\s]+)$', user_input_lower)
             if lang_match:
                 lang_part = lang_match.group(1).strip()
-                # try to resolve language
-                lang_key = lang_part.replace(' ', '')
-                target_code = None
-                # check mapping shortcuts first
-                target_code = lang_mapping.get(lang_key) or lang_mapping.get(lang_part)
-                if not target_code:
-                    for code, name in self.supported_languages.items():
-                        if lang_key and (lang_key in name.lower().replace(' ', '') or name.lower().replace(' ', '').startswith(lang_key[:4])):
-                            target_code = code
-                            break
-                        if lang_part and (lang_part in name.lower() or name.lower().startswith(lang_part[:4])):
-                            target_code = code
-                            break
+                target_code = language_resolver.resolve(lang_part)
                 if target_code and target_code in self.supported_languages:
                     extracted_text = self.smart_text_extraction(user_input, self.supported_languages[target_code])
                     if not extracted_text or extracted_text.strip() == "":
@@ -670,7 +636,35 @@ Respond in JSON:
         if not text or not text.strip():
             return self.create_json_output("", "", "", "", "", "", False, "No text provided to translate")
         clean_text = text.strip()
-        translation_result = self.translate_text(clean_text, target_language_code)
+        translation_result = self._stored_translation(clean_text, target_language_code)
+        if translation_result is None:
+            translation_result = self.translate_text(clean_text, target_language_code)
+        return self._format_translation_result(clean_text, translation_result, target_language_code, target_language_name)
+
+    def _stored_translation(self, clean_text: str, target_language_code: str) -> Optional[dict]:
+        """
+        Answer without Google when possible: a curated dashboard Phrase first, then the
+        translation memory of past results. Both may read the database.
+        """
+        if self.phrasebook_enabled:
+            curated = get_phrasebook().lookup(clean_text, target_language_code)
+            if curated is not None:
+                result = self._single_chunk_result(self._build_chunk_result(curated['translated_text'], curated['source_code'], target_language_code))
+                result['from_phrasebook'] = True
+                return result
+        if self.translation_memory_enabled:
+            memory = get_translation_memory()
+            memory.maybe_refresh()
+            hit = memory.lookup(clean_text, target_language_code)
+            if hit is not None:
+                result = self._single_chunk_result(self._build_chunk_result(hit['translated_text'], hit['source_code'] or 'auto', target_language_code))
+                result['from_memory'] = True
+                result['memory_match'] = hit['match']
+                result['memory_similarity'] = hit['similarity']
+                return result
+        return None
+
+    def _format_translation_result(self, clean_text: str, translation_result: dict, target_language_code: str, target_language_name: str) -> dict:
         if translation_result['success']:
             source_lang = translation_result['source_language']
             target_lang = translation_result['target_language']
@@ -680,11 +674,142 @@ Respond in JSON:
             json_output = self.create_json_output(
                 original_text, translated_text, source_lang, target_lang, source_code, target_language_code
             )
+            json_output['translation']['from_memory'] = translation_result.get('from_memory', False)
+            if translation_result.get('from_phrasebook', False):
+                json_output['translation']['from_phrasebook'] = True
+            if translation_result.get('from_memory', False):
+                json_output['translation']['memory_match'] = translation_result['memory_match']
+                json_output['translation']['memory_similarity'] = translation_result['memory_similarity']
             if translation_result.get('chunked', False):
                 json_output['translation']['chunked'] = True
                 json_output['translation']['chunk_count'] = translation_result.get('chunk_count', 1)
+                json_output['translation']['parallelism'] = translation_result.get('parallelism', 1)
             return self.sanitize_json_output(json_output)
         return self.create_json_output(clean_text, "", "Unknown", target_language_name, "auto", target_language_code, False, translation_result['error'])
 
+    def translate_batch(self, texts: List[str], target_language_codes: List[str], source_language_code: str = 'auto') -> dict:
+        """
+        Translate many texts into one or more target languages with as few Google calls as possible.
+        Texts are packed into multi-`q` requests bounded by translation_batch_max_segments and
+        translation_batch_max_chars. Results keep input order and use the process_translation shape.
+        """
+        cache = get_translation_cache()
+        clean_texts = [(t or '').strip() for t in texts]
+        resolved = {}  # (text, target) -> single-chunk result dict
+        jobs = []  # (target, [texts]) per Google request
+        long_texts = []  # (target, text) too long to share a request
+        api_calls = 0
+
+        for target in dict.fromkeys(target_language_codes):
+            if target not in self.supported_languages:
+                continue
+            batch, batch_chars = [], 0
+            for text in dict.fromkeys(clean_texts):
+                if not text or (text, target) in resolved:
+                    continue
+                if len(text) > self.translation_batch_max_chars:
+                    # Too long to share a request; goes through the regular chunked path on the same pool
+                    long_texts.append((target, text))
+                    continue
+                cached = cache.get(text, target, source_language_code)
+                if cached is not None:
+                    resolved[(text, target)] = self._build_chunk_result(cached['translated_text'], cached['detected_source'], target)
+                    continue
+                if batch and (len(batch) >= self.translation_batch_max_segments or batch_chars + len(text) > self.translation_batch_max_chars):
+                    jobs.append((target, batch))
+                    batch, batch_chars = [], 0
+                batch.append(text)
+                batch_chars += len(text)
+            if batch:
+                jobs.append((target, batch))
+
+        if jobs or long_texts:
+            api_calls += len(jobs)
+            parallelism = max(1, min(self.translation_chunk_workers, len(jobs) + len(long_texts)))
+            with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='translate-batch') as executor:
+                # Long texts first: they take the most requests
+                long_futures = [
+                    (target, text, executor.submit(self.translate_text, text, target, source_language_code))
+                    for target, text in long_texts
+                ]
+                batch_futures = [
+                    (target, batch, executor.submit(self._translate_multi, batch, target, source_language_code))
+                    for target, batch in jobs
+                ]
+                for target, text, future in long_futures:
+                    resolved[(text, target)] = future.result()
+                    api_calls += resolved[(text, target)].get('chunk_count', 1)
+                for target, batch, future in batch_futures:
+                    for text, result in zip(batch, future.result()):
+                        resolved[(text, target)] = result
+
+        results = []
+        for index, text in enumerate(clean_texts):
+            translations = []
+            for target in target_language_codes:
+                target_name = self.supported_languages.get(target, target)
+                if target not in self.supported_languages:
+                    translations.append(self.create_json_output(text, "", "Unknown", target_name, "auto", target, False, f"Unsupported target language: {target}"))
+                elif not text:
+                    translations.append(self.create_json_output("", "", "", "", "", "", False, "No text provided to translate"))
+                else:
+                    translations.append(self._format_translation_result(text, resolved[(text, target)], target, target_name))
+            results.append({'index': index, 'translations': translations})
+        return {'results': results, 'api_calls': api_calls}
+
+    def _translate_multi(self, texts: List[str], target_language_code: str, source_language_code: str = 'auto') -> List[dict]:
+        """Translate several texts in one Google v2 request using repeated `q` parameters."""
+        cache = get_translation_cache()
+        try:
+            url = f"https://translation.googleapis.com/language/translate/v2?key={self.google_api_key}"
+            data = [('q', text) for text in texts]
+            data += [('target', target_language_code), ('format', 'text')]
+            if source_language_code != 'auto':
+                data.append(('source', source_language_code))
+            response = http_client.post(url, endpoint='google.translate.batch', data=data)
+            if response.status_code != 200:
+                error = f"Translation API failed: {response.status_code}"
+            else:
+                translations = response.json()['data']['translations']
+                results = []
+                for text, item in zip(texts, translations):
+                    detected_source = item.get('detectedSourceLanguage', source_language_code if source_language_code != 'auto' else 'en')
+                    cache.set(text, target_language_code, {
+                        'translated_text': item['translatedText'],
+                        'detected_source': detected_source
+                    }, source_language_code)
+                    results.append(self._build_chunk_result(item['translatedText'], detected_source, target_language_code))
+                if len(results) == len(texts):
+                    return results
+                error = "Translation API returned fewer results than requested"
+        except Exception as e:
+            error = f"Translation failed: {str(e)}"
+        return [self._translation_failure(error) for _ in texts]
+
     def get_supported_languages(self) -> List[Dict]:
-        return [{"code": code, "name": name} for code, name in self.supported_languages.items()]
\ No newline at end of file
+        return [{"code": code, "name": name} for code, name in self.supported_languages.items()]
+
+
+_translator = None
+_translator_lock = threading.Lock()
+
+
+def get_translator() -> AITranslatorChatbot:
+    """
+    Return the process-wide translator, building it on first use.
+    The instance (and its OpenAI client connection pool) is shared by every request in the worker.
+    Raises ValueError if the API keys are missing; the next call will try again.
+    """
+    global _translator
+    if _translator is None:
+        with _translator_lock:
+            if _translator is None:
+                _translator = AITranslatorChatbot()
+    return _translator
+
+
+def reset_translator():
+    """Drop the shared translator so the next get_translator() call builds a fresh one (used by tests)."""
+    global _translator
+    with _translator_lock:
+        _translator = None
@@ -1,7 +1,12 @@
 from django.urls import path
-from .views import ChatView, LanguagesView
+from .views import ChatView, ChatStreamView, AsyncChatView, LanguagesView, BotStatsView, BatchTranslationView, DocumentTranslationView
 
 urlpatterns = [
     path('chat/', ChatView.as_view(), name='chat'),
+    path('chat/stream/', ChatStreamView.as_view(), name='chat-stream'),
+    path('chat/async/', AsyncChatView.as_view(), name='chat-async'),
+    path('translate/batch/', BatchTranslationView.as_view(), name='translate-batch'),
+    path('translate/document/', DocumentTranslationView.as_view(), name='translate-document'),
     path('languages/', LanguagesView.as_view(), name='languages'),
+    path('bot/stats/', BotStatsView.as_view(), name='bot-stats'),
 ]
\ No newline at end of file
@@ -1,20 +1,109 @@
 from rest_framework.views import APIView
+from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework import exceptions, status
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from .serializers import (
     SmartTranslationRequestSerializer,
+    BatchTranslationRequestSerializer,
+    DocumentTranslationRequestSerializer,
     TranslationResponseSerializer,
     SupportedLanguagesSerializer
 )
-from .translator import AITranslatorChatbot
+from .translator import get_translator
+from .async_translator import get_async_translator
+from .concurrency import RequestScope, estimate_tokens, fanout_stats, record_speculation, speculation_stats
+from .conversation import conversation_key, load_context, record_turn, session_for
 from .models import TranslationHistory
+from datetime import datetime
+from .cache import get_translation_cache
+from .memory import get_translation_memory
+from .phrasebook import get_phrasebook
+from .intent import path_stats
+from .langdetect import detection_stats
+from .sanitizer import StreamingSanitizer
+from authentication.permissions import IsAdmin
+from myproject import http_client
+from tts_app.audio_cache import get_audio_cache
+from tts_app.voices import get_voice_catalog
+from asgiref.sync import sync_to_async
+import asyncio
+import json
 import re
+import time
+
+def has_explicit_marker(user_input):
+    return bool(
+        re.search(r'\b(?:to|in|into)\s+[A-Za-z]+', user_input, flags=re.IGNORECASE)
+        or any(kw in user_input.lower() for kw in ['translate', 'অনুবাদ', 'traduire', 'ترجم', 'how do you say'])
+    )
+
+
+def is_translation(user_input, parsed_request):
+    # Ensure translation only proceeds when user explicitly specified a target language
+    if not parsed_request or not parsed_request.get('is_translation_request', False):
+        return False
+    # Treat as normal chat if no explicit target language/keyword present
+    return has_explicit_marker(user_input)
+
+
+def fallback_reply(user_input):
+    return f"I received your message: {user_input}"
+
+
+def remember_turn(key, user_input, reply):
+    # Fallback echoes carry nothing worth sending back to the model next turn
+    if key and reply and reply != fallback_reply(user_input):
+        record_turn(key, user_input, reply)
+
+
+def chat_output(translator, user_input, reply, source_code, session_id=None):
+    # Build translation-style JSON where translated_text holds the chat reply.
+    source_code = source_code or 'auto'
+    source_name = translator.supported_languages.get(source_code, 'Unknown') if source_code != 'auto' else 'Unknown'
+    output = translator.create_json_output(
+        original_text=user_input,
+        translated_text=reply,
+        source_language=source_name,
+        target_language=None,
+        source_code=source_code,
+        target_code=None,
+        success=True,
+        error=None
+    )
+    if session_id:
+        # Sent back on the next message to continue this conversation
+        output['session_id'] = session_id
+    return output
+
+
+def read_api_request(request, authenticate=True):
+    """
+    (user, data) of a plain Django request as the APIView endpoints see them: authenticated by
+    the REST_FRAMEWORK authenticators (JWT), body parsed by its parsers (JSON, form, multipart).
+    Raises the same APIExceptions. `authenticate=False` is for endpoints with no authentication_classes.
+    """
+    api_request = Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES] if authenticate else [],
+    )
+    return api_request.user, api_request.data
+
 
 class ChatView(APIView):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         try:
-            self.translator = AITranslatorChatbot()
+            # Shared per-worker instance; keeps the OpenAI connection pool warm between requests
+            self.translator = get_translator()
             self.error = None
         except ValueError as e:
             self.translator = None
@@ -27,76 +116,348 @@ class ChatView(APIView):
         serializer = SmartTranslationRequestSerializer(data=request.data)
         if serializer.is_valid():
             user_input = serializer.validated_data['input']
-            parsed_request = self.translator.parse_with_ai(user_input)
-
-            # Ensure translation only proceeds when user explicitly specified a target language
-            if parsed_request.get('is_translation_request', False):
-                explicit_marker = bool(
-                    re.search(r'\b(?:to|in|into)\s+[A-Za-z]+', user_input, flags=re.IGNORECASE)
-                    or any(kw in user_input.lower() for kw in ['translate', 'অনুবাদ', 'traduire', 'ترجم', 'how do you say'])
-                )
-                if not explicit_marker:
-                    # Treat as normal chat if no explicit target language/keyword present
-                    reply = self.translator.get_normal_reply(user_input)
-                    # Build translation-style JSON where translated_text holds the chat reply.
-                    source_code = self.translator.detect_language(user_input) or 'auto'
-                    source_name = self.translator.supported_languages.get(source_code, 'Unknown') if source_code != 'auto' else 'Unknown'
-                    json_output = self.translator.create_json_output(
-                        original_text=user_input,
-                        translated_text=reply,
-                        source_language=source_name,
-                        target_language=None,
-                        source_code=source_code,
-                        target_code=None,
-                        success=True,
-                        error=None
-                    )
-                    return Response(json_output, status=status.HTTP_200_OK)
+            session_id = session_for(request.user, serializer.validated_data.get('session_id'))
+            key = conversation_key(request.user, session_id)
+            history = load_context(key)
+            scope = RequestScope()
+            # Speculative mode: start the normal reply while OpenAI parses the intent
+            reply = scope.submit(self.translator.get_normal_reply, user_input, history) if self.speculate(user_input) else None
+            parsed_request = self.parse(user_input)
 
             # 🔹 Translation request
-            if parsed_request.get('is_translation_request', False):
-                text = parsed_request.get('text')
-                target_code = parsed_request.get('target_language_code')
-                target_name = parsed_request.get('target_language_name')
-                if not text or not target_code:
-                    return Response({"error": "Could not parse text or target language"}, status=status.HTTP_400_BAD_REQUEST)
-
-                result = self.translator.process_translation(text, target_code, target_name)
-                response_serializer = TranslationResponseSerializer(data=result)
-                if response_serializer.is_valid():
-                    TranslationHistory.objects.create(
-                        user_input=user_input,
-                        parsed_request=parsed_request,
-                        translation_result=result
-                    )
-                    return Response(response_serializer.validated_data, status=status.HTTP_200_OK)
-                return Response(response_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-            # 🔹 Normal chat (no translation intent)
+            if is_translation(user_input, parsed_request):
+                if reply is not None:
+                    self.discard_speculation(reply, user_input)
+                payload, status_code = self.translate(user_input, parsed_request)
+                return Response(payload, status=status_code)
+
+            # 🔹 Normal chat (no translation intent): source detection runs on the pool while the
+            # reply is fetched in this thread, so the pool size never caps concurrent OpenAI calls
+            source_code = scope.submit(self.translator.detect_language, user_input)
+            if reply is not None:
+                record_speculation('used')
+                reply = scope.result(reply, fallback_reply(user_input))
             else:
-                reply = self.translator.get_normal_reply(user_input)
-                source_code = self.translator.detect_language(user_input) or 'auto'
-                source_name = self.translator.supported_languages.get(source_code, 'Unknown') if source_code != 'auto' else 'Unknown'
-                json_output = self.translator.create_json_output(
-                    original_text=user_input,
-                    translated_text=reply,
-                    source_language=source_name,
-                    target_language=None,
-                    source_code=source_code,
-                    target_code=None,
-                    success=True,
-                    error=None
-                )
-                return Response(json_output, status=status.HTTP_200_OK)
+                reply = self.translator.get_normal_reply(user_input, history)
+            remember_turn(key, user_input, reply)
+            return Response(chat_output(
+                self.translator, user_input, reply, scope.result(source_code, 'auto'), session_id
+            ), status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def speculate(self, user_input):
+        # Only worth it when parsing needs an OpenAI round trip; most such messages end up as chat
+        if not getattr(settings, 'CHAT_SPECULATIVE_REPLY', False):
+            return False
+        if not has_explicit_marker(user_input) or not self.translator.needs_ai_parse(user_input):
+            return False
+        record_speculation('started')
+        return True
+
+    def discard_speculation(self, future, user_input):
+        if future.cancel():
+            record_speculation('cancelled')
+        else:
+            # Already running: OpenAI bills it either way, so count it once it finishes
+            future.add_done_callback(lambda f: record_speculation(
+                'wasted', estimate_tokens(user_input, f.result() if not f.exception() else '')
+            ))
+
+    def parse(self, user_input):
+        # Without an explicit marker the message is normal chat whatever the parser says, so skip it
+        if not has_explicit_marker(user_input):
+            return None
+        return self.translator.parse_request(user_input)
+
+    def translate(self, user_input, parsed_request):
+        text = parsed_request.get('text')
+        target_code = parsed_request.get('target_language_code')
+        target_name = parsed_request.get('target_language_name')
+        if not text or not target_code:
+            return {"error": "Could not parse text or target language"}, status.HTTP_400_BAD_REQUEST
+
+        result = self.translator.process_translation(text, target_code, target_name)
+        response_serializer = TranslationResponseSerializer(data=result)
+        if response_serializer.is_valid():
+            TranslationHistory.objects.create(
+                user_input=user_input,
+                parsed_request=parsed_request,
+                translation_result=result
+            )
+            return response_serializer.validated_data, status.HTTP_200_OK
+        return response_serializer.errors, status.HTTP_400_BAD_REQUEST
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n"
+
+
+class ChatStreamView(ChatView):
+    """
+    Server-Sent Events variant of ChatView. Normal chat replies are sent as `token` events
+    while OpenAI generates them; the final `done` event carries the same JSON as /api/chat/.
+    """
+
+    def post(self, request):
+        if not self.translator:
+            return Response({"error": self.error}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        serializer = SmartTranslationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user_input = serializer.validated_data['input']
+        parsed_request = self.parse(user_input)
+        if is_translation(user_input, parsed_request):
+            events = self.translation_events(user_input, parsed_request)
+        else:
+            session_id = session_for(request.user, serializer.validated_data.get('session_id'))
+            key = conversation_key(request.user, session_id)
+            events = self.chat_events(user_input, key, load_context(key), session_id)
+
+        response = StreamingHttpResponse(events, content_type='text/event-stream; charset=utf-8')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def translation_events(self, user_input, parsed_request):
+        payload, status_code = self.translate(user_input, parsed_request)
+        yield sse_event('done' if status_code == status.HTTP_200_OK else 'error', payload)
+
+    def chat_events(self, user_input, key=None, history=None, session_id=None):
+        # Source detection runs while the reply streams
+        scope = RequestScope()
+        source_code = scope.submit(self.translator.detect_language, user_input)
+        sanitizer = StreamingSanitizer()
+        parts = []
+        try:
+            for delta in self.translator.stream_ai_reply(user_input, history=history):
+                parts.append(delta)
+                ready = sanitizer.feed(delta)
+                if ready:
+                    yield sse_event('token', {"text": ready})
+            tail = sanitizer.flush()
+            if tail:
+                yield sse_event('token', {"text": tail})
+            reply = self.translator.finalize_ai_reply(''.join(parts))
+        except Exception:
+            reply = None
+        remember_turn(key, user_input, reply)
+        yield sse_event('done', chat_output(
+            self.translator, user_input, reply or fallback_reply(user_input), scope.result(source_code, 'auto'), session_id
+        ))
+
+
+async def close_loop_clients():
+    # Under WSGI each async request runs on its own event loop: close the clients bound to it
+    try:
+        await get_async_translator().aclose_openai_client()
+    except ValueError:
+        pass
+    await http_client.aclose_client()
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncChatView(View):
+    """
+    Native async ChatView for ASGI deployments. Same requests (JWT, JSON or form bodies) and
+    response JSON as /api/chat/, but OpenAI and Google calls are awaited, so a worker is not
+    blocked while they run.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            if not isinstance(request, ASGIRequest):
+                await close_loop_clients()
+
+    async def post(self, request):
+        try:
+            translator = get_async_translator()
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        try:
+            # Same authentication and parsers as /api/chat/, so a signed-in user gets the same conversation
+            user, data = await sync_to_async(read_api_request)(request)
+        except exceptions.APIException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+            return JsonResponse(detail, status=e.status_code)
+
+        serializer = SmartTranslationRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user_input = serializer.validated_data['input']
+        session_id = session_for(user, serializer.validated_data.get('session_id'))
+        key = conversation_key(user, session_id)
+        history = await sync_to_async(load_context)(key)
+        speculation = None
+        if has_explicit_marker(user_input):
+            if getattr(settings, 'CHAT_SPECULATIVE_REPLY', False) and translator.needs_ai_parse(user_input):
+                # Speculative mode: start the normal reply while OpenAI parses the intent
+                speculation = asyncio.ensure_future(translator.aget_normal_reply(user_input, history))
+                record_speculation('started')
+            parsed_request = await translator.aparse_request(user_input)
+        else:
+            parsed_request = None
+
+        # 🔹 Translation request
+        if is_translation(user_input, parsed_request):
+            if speculation is not None:
+                # Cancelling closes the in-flight OpenAI request
+                if speculation.done():
+                    record_speculation('wasted', estimate_tokens(user_input, speculation.result()))
+                else:
+                    speculation.cancel()
+                    record_speculation('cancelled')
+            text = parsed_request.get('text')
+            target_code = parsed_request.get('target_language_code')
+            target_name = parsed_request.get('target_language_name')
+            if not text or not target_code:
+                return JsonResponse({"error": "Could not parse text or target language"}, status=status.HTTP_400_BAD_REQUEST)
+
+            result = await translator.aprocess_translation(text, target_code, target_name)
+            response_serializer = TranslationResponseSerializer(data=result)
+            if response_serializer.is_valid():
+                await TranslationHistory.objects.acreate(
+                    user_input=user_input,
+                    parsed_request=parsed_request,
+                    translation_result=result
+                )
+                return self.respond(response_serializer.validated_data)
+            return self.respond(response_serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        # 🔹 Normal chat (no translation intent): reply and source detection run concurrently
+        if speculation is not None:
+            record_speculation('used')
+        reply, source_code = await RequestScope().agather(
+            (speculation or translator.aget_normal_reply(user_input, history), fallback_reply(user_input)),
+            (translator.adetect_language(user_input), 'auto'),
+        )
+        await sync_to_async(remember_turn)(key, user_input, reply)
+        return self.respond(chat_output(translator, user_input, reply, source_code, session_id))
+
+    def respond(self, data, status_code=status.HTTP_200_OK):
+        return JsonResponse(data, status=status_code, json_dumps_params={'ensure_ascii': False})
+
+
+class BatchTranslationView(APIView):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            self.translator = get_translator()
+            self.error = None
+        except ValueError as e:
+            self.translator = None
+            self.error = str(e)
+
+    def post(self, request):
+        if not self.translator:
+            return Response({"error": self.error}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        serializer = BatchTranslationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        batch = self.translator.translate_batch(
+            serializer.validated_data['texts'],
+            serializer.validated_data['target_languages'],
+            serializer.validated_data['source_language'] or 'auto'
+        )
+        return Response({
+            "success": True,
+            "timestamp": datetime.now().isoformat(),
+            "results": batch['results'],
+            "api_calls": batch['api_calls'],
+        }, status=status.HTTP_200_OK)
+
+
+class DocumentTranslationView(APIView):
+    """
+    Streams the translation of a long document as NDJSON: one `chunk` line per chunk in
+    document order as soon as it is ready, then a final `summary` line.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            self.translator = get_translator()
+            self.error = None
+        except ValueError as e:
+            self.translator = None
+            self.error = str(e)
+
+    def post(self, request):
+        if not self.translator:
+            return Response({"error": self.error}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        serializer = DocumentTranslationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        target = serializer.validated_data['target_language']
+        if target not in self.translator.supported_languages:
+            return Response({"error": f"Unsupported target language: {target}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = self.ndjson_lines(
+            serializer.validated_data['text'],
+            target,
+            serializer.validated_data['source_language'] or 'auto'
+        )
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson; charset=utf-8')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def ndjson_lines(self, text, target, source):
+        started = time.perf_counter()
+        chunk_count = failed = characters = 0
+        source_code = None
+        for index, (chunk, result) in enumerate(self.translator.iter_translate_document(text, target, source)):
+            chunk_count += 1
+            characters += len(chunk)
+            if result['success']:
+                source_code = source_code or result['source_lang_code']
+            else:
+                failed += 1
+            yield ndjson_line({
+                "type": "chunk",
+                "index": index,
+                "success": result['success'],
+                "translated_text": result['translated_text'],
+                "source_lang_code": result.get('source_lang_code'),
+                "error": result.get('error'),
+            })
+        yield ndjson_line({
+            "type": "summary",
+            "success": chunk_count > 0 and failed == 0,
+            "timestamp": datetime.now().isoformat(),
+            "chunk_count": chunk_count,
+            "failed_chunks": failed,
+            "characters": characters,
+            "source_language": self.translator.supported_languages.get(source_code, source_code) if source_code else None,
+            "source_lang_code": source_code,
+            "target_language": self.translator.supported_languages[target],
+            "target_lang_code": target,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+
+
+def ndjson_line(data):
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
 
 class LanguagesView(APIView):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         try:
-            self.translator = AITranslatorChatbot()
+            # Shared per-worker instance; keeps the OpenAI connection pool warm between requests
+            self.translator = get_translator()
             self.error = None
         except ValueError as e:
             self.translator = None
@@ -108,3 +469,21 @@ class LanguagesView(APIView):
         languages = self.translator.get_supported_languages()
         serializer = SupportedLanguagesSerializer(languages, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class BotStatsView(APIView):
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response({
+            "translation_cache": get_translation_cache().stats(),
+            "translation_memory": get_translation_memory().stats(),
+            "phrasebook": get_phrasebook().stats(),
+            "outbound_http": http_client.stats(),
+            "intent_paths": path_stats(),
+            "language_detection": detection_stats(),
+            "request_fanout": fanout_stats(),
+            "speculation": speculation_stats(),
+            "tts_voice_catalog": get_voice_catalog().stats(),
+            "tts_audio_cache": get_audio_cache().stats(),
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,221 @@
+# myproject/http_client.py
+"""
+Shared outbound HTTP client for the Google Translate / Detect / TTS APIs.
+
+One requests.Session per process keeps a keep-alive connection pool per host,
+so repeat calls skip the TCP+TLS handshake. Every call gets connect/read
+timeouts, 429/5xx responses are retried with jittered exponential backoff
+(or the server's Retry-After, up to OUTBOUND_HTTP_MAX_RETRY_AFTER), and
+per-endpoint latency is recorded for the stats endpoint.
+
+The async variants (arequest/aget/apost) do the same on an httpx.AsyncClient
+for the native async views served over ASGI.
+"""
+import asyncio
+import random
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_metrics = {}
+_metrics_lock = threading.Lock()
+# httpx.AsyncClient pools are bound to the event loop that created them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def max_retry_after() -> float:
+    return getattr(settings, 'OUTBOUND_HTTP_MAX_RETRY_AFTER', 10.0)
+
+
+class CappedRetry(Retry):
+    """Retry that obeys Retry-After only up to OUTBOUND_HTTP_MAX_RETRY_AFTER, so one 429 can't park a worker."""
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, max_retry_after())
+
+
+def _build_session() -> requests.Session:
+    retry = CappedRetry(
+        total=getattr(settings, 'OUTBOUND_HTTP_RETRIES', 3),
+        connect=getattr(settings, 'OUTBOUND_HTTP_RETRIES', 3),
+        read=0,
+        status_forcelist=RETRY_STATUSES,
+        # Translate/Detect/Synthesize are safe to repeat even though they are POSTs
+        allowed_methods=frozenset({'GET', 'POST'}),
+        backoff_factor=getattr(settings, 'OUTBOUND_HTTP_BACKOFF', 0.3),
+        backoff_jitter=getattr(settings, 'OUTBOUND_HTTP_BACKOFF_JITTER', 0.3),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, 'OUTBOUND_HTTP_POOL_HOSTS', 10),
+        pool_maxsize=getattr(settings, 'OUTBOUND_HTTP_POOL_MAXSIZE', 20),
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session():
+    """Close the pooled session and clear metrics (used by tests and after settings changes)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+    _async_clients.clear()
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def default_timeout() -> tuple:
+    return (
+        getattr(settings, 'OUTBOUND_HTTP_CONNECT_TIMEOUT', 3.05),
+        getattr(settings, 'OUTBOUND_HTTP_READ_TIMEOUT', 15),
+    )
+
+
+def _record(endpoint: str, elapsed_ms: float, failed: bool):
+    with _metrics_lock:
+        m = _metrics.get(endpoint)
+        if m is None:
+            m = _metrics[endpoint] = {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        m['count'] += 1
+        m['total_ms'] += elapsed_ms
+        if elapsed_ms > m['max_ms']:
+            m['max_ms'] = elapsed_ms
+        if failed:
+            m['errors'] += 1
+
+
+def _endpoint_label(url: str, endpoint: Optional[str]) -> str:
+    if endpoint is not None:
+        return endpoint
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def request(method: str, url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the pooled session.
+    `endpoint` labels the call in the latency metrics; it defaults to host + path.
+    """
+    endpoint = _endpoint_label(url, endpoint)
+    kwargs.setdefault('timeout', default_timeout())
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = get_session().request(method, url, **kwargs)
+        failed = response.status_code >= 400
+        return response
+    finally:
+        _record(endpoint, (time.perf_counter() - started) * 1000, failed)
+
+
+def get(url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+    return request('GET', url, endpoint=endpoint, **kwargs)
+
+
+def post(url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+    return request('POST', url, endpoint=endpoint, **kwargs)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        connect_timeout, read_timeout = default_timeout()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=getattr(settings, 'OUTBOUND_HTTP_ASYNC_MAX_CONNECTIONS', 100),
+                max_keepalive_connections=getattr(settings, 'OUTBOUND_HTTP_POOL_MAXSIZE', 20),
+            ),
+            # Transport retries cover connection failures; status retries are handled in arequest
+            transport=httpx.AsyncHTTPTransport(retries=getattr(settings, 'OUTBOUND_HTTP_RETRIES', 3)),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_client():
+    """
+    Close the running loop's async client. For event loops that end with the request, such as
+    async views served under WSGI, where the client would otherwise be left with open connections.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _retry_delay(attempt: int, response: httpx.Response) -> float:
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(float(retry_after), max_retry_after())
+    backoff = getattr(settings, 'OUTBOUND_HTTP_BACKOFF', 0.3) * (2 ** attempt)
+    return min(backoff, 120) + random.uniform(0, getattr(settings, 'OUTBOUND_HTTP_BACKOFF_JITTER', 0.3))
+
+
+async def arequest(method: str, url: str, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+    """Async counterpart of request(): same retry policy and metrics, on the loop's httpx client."""
+    endpoint = _endpoint_label(url, endpoint)
+    retries = getattr(settings, 'OUTBOUND_HTTP_RETRIES', 3)
+    client = get_async_client()
+    started = time.perf_counter()
+    failed = True
+    try:
+        for attempt in range(retries + 1):
+            response = await client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                break
+            await asyncio.sleep(_retry_delay(attempt, response))
+        failed = response.status_code >= 400
+        return response
+    finally:
+        _record(endpoint, (time.perf_counter() - started) * 1000, failed)
+
+
+async def aget(url: str, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+    return await arequest('GET', url, endpoint=endpoint, **kwargs)
+
+
+async def apost(url: str, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+    return await arequest('POST', url, endpoint=endpoint, **kwargs)
+
+
+def stats() -> Dict:
+    with _metrics_lock:
+        snapshot = {name: dict(m) for name, m in _metrics.items()}
+    for m in snapshot.values():
+        m['avg_ms'] = round(m['total_ms'] / m['count'], 2) if m['count'] else 0.0
+        m['total_ms'] = round(m['total_ms'], 2)
+        m['max_ms'] = round(m['max_ms'], 2)
+    return snapshot
@@ -0,0 +1,142 @@
+# myproject/media.py
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+_BLOCK_SIZE = 64 * 1024
+
+
+def _etag(file_stat: os.stat_result) -> str:
+    # Tracks the file itself: TTS audio named by its request hash can be evicted and synthesized
+    # again with different bytes under the same name, and then gets a new mtime and ETag.
+    # Cache hits only move the atime (AudioCache's LRU clock), so popular files keep theirs.
+    return f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+
+
+def _cache_control() -> str:
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def parse_range(header: str, size: int):
+    """
+    (start, end) inclusive for a single `bytes=` range, None to serve the whole file
+    (no header, or forms we don't split such as multiple ranges), or False if unsatisfiable.
+    """
+    match = _RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+        if int(last) == 0:
+            return False
+    if start >= size:
+        return False
+    return start, end
+
+
+def _read_range(file_path: str, start: int, length: int):
+    with open(file_path, 'rb') as media_file:
+        media_file.seek(start)
+        while length > 0:
+            block = media_file.read(min(_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _offload(path: str, file_path: str, content_type: str):
+    """Hand the transfer to the front proxy, which also takes care of Range; None when not configured."""
+    accel = getattr(settings, 'MEDIA_ACCEL', '')
+    if accel == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        # nginx decodes the URI it is handed: quote spaces, '%', '?' and non-ASCII names
+        response['X-Accel-Redirect'] = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/') + quote(path)
+        return response
+    if accel == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = file_path
+        return response
+    return None
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT with strong ETags, conditional GET, single byte ranges and
+    MEDIA_CACHE_MAX_AGE caching. With MEDIA_ACCEL set, the bytes are sent by nginx
+    (X-Accel-Redirect) or Apache/lighttpd (X-Sendfile) instead of the worker.
+    """
+    try:
+        file_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(file_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("Media file not found")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("Media file not found")
+
+    etag = _etag(file_stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(file_stat.st_mtime),
+        'Cache-Control': _cache_control(),
+        'Accept-Ranges': 'bytes',
+    }
+    # 304 Not Modified / 412 Precondition Failed
+    response = get_conditional_response(request, etag=etag, last_modified=int(file_stat.st_mtime))
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(file_path)
+        content_type = content_type or 'application/octet-stream'
+        response = (
+            _offload(path, file_path, content_type)
+            or _file_response(request, file_path, file_stat.st_size, etag, content_type)
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response.setdefault(header, value)
+    return response
+
+
+def _file_response(request, file_path: str, size: int, etag: str, content_type: str):
+    # A stale If-Range validator means the client's partial copy is outdated: send it all
+    if_range = request.headers.get('If-Range')
+    byte_range = parse_range(request.headers.get('Range'), size) if not if_range or if_range == etag else None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = str(size)
+        else:
+            # FileResponse uses wsgi.file_wrapper (sendfile) where the server supports it
+            response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        body = () if request.method == 'HEAD' else _read_range(file_path, start, length)
+        response = StreamingHttpResponse(body, status=206, content_type=content_type)
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Content-Length'] = str(length)
+    return response
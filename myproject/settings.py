@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 import environ
@@ -175,6 +176,12 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Media is served by myproject.media.serve_media. Set MEDIA_ACCEL to "nginx" (X-Accel-Redirect to an
+# internal location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or "sendfile" (Apache/lighttpd X-Sendfile)
+# so the proxy sends the bytes; otherwise workers stream them. Clients revalidate after MEDIA_CACHE_MAX_AGE.
+MEDIA_ACCEL = env("MEDIA_ACCEL", default="")
+MEDIA_ACCEL_PREFIX = env("MEDIA_ACCEL_PREFIX", default="/protected-media/")
+MEDIA_CACHE_MAX_AGE = env.int("MEDIA_CACHE_MAX_AGE", default=60 * 60)
 
 # ------------------------------
 # Email
@@ -218,6 +225,99 @@ if not GOOGLE_API_KEY:
 else:
     print(f"SUCCESS: GOOGLE_API_KEY loaded: {GOOGLE_API_KEY[:4]}...{GOOGLE_API_KEY[-4:]}")
 
+# ------------------------------
+# Cache & Translation cache
+# ------------------------------
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+TRANSLATION_CACHE_SIZE = env.int("TRANSLATION_CACHE_SIZE", default=5000)
+TRANSLATION_CACHE_TTL = env.int("TRANSLATION_CACHE_TTL", default=60 * 60 * 24)
+# Share translations between workers through CACHES["default"] (e.g. redis/memcached)
+TRANSLATION_CACHE_SHARED = env.bool("TRANSLATION_CACHE_SHARED", default=False)
+
+# Translation memory over TranslationHistory: exact and near-match (trigram Dice >= threshold)
+# reuse of past translations before calling Google; new rows are picked up every REFRESH seconds
+TRANSLATION_MEMORY_ENABLED = env.bool("TRANSLATION_MEMORY_ENABLED", default=True)
+TRANSLATION_MEMORY_SIZE = env.int("TRANSLATION_MEMORY_SIZE", default=50000)
+TRANSLATION_MEMORY_THRESHOLD = env.float("TRANSLATION_MEMORY_THRESHOLD", default=0.9)
+TRANSLATION_MEMORY_MAX_CHARS = env.int("TRANSLATION_MEMORY_MAX_CHARS", default=500)
+TRANSLATION_MEMORY_REFRESH = env.int("TRANSLATION_MEMORY_REFRESH", default=60)
+
+# Curated dashboard phrases answer chat and TTS translations directly; the index is dropped
+# when a Phrase is saved and rebuilt at least every MAX_AGE seconds for the other workers
+PHRASEBOOK_ENABLED = env.bool("PHRASEBOOK_ENABLED", default=True)
+PHRASEBOOK_MAX_AGE = env.int("PHRASEBOOK_MAX_AGE", default=300)
+
+# Long documents are split into chunks and translated in parallel
+TRANSLATION_CHUNK_CHARS = env.int("TRANSLATION_CHUNK_CHARS", default=5000)
+TRANSLATION_CHUNK_WORKERS = env.int("TRANSLATION_CHUNK_WORKERS", default=4)
+
+# Batch endpoint packing limits for multi-q Google Translate requests
+TRANSLATION_BATCH_MAX_SEGMENTS = env.int("TRANSLATION_BATCH_MAX_SEGMENTS", default=128)
+TRANSLATION_BATCH_MAX_CHARS = env.int("TRANSLATION_BATCH_MAX_CHARS", default=30000)
+
+# Streaming document endpoint (NDJSON); memory is bounded by the in-flight chunks, not the document.
+# Keep the UTF-8 body under DATA_UPLOAD_MAX_MEMORY_SIZE (2.5MB by default)
+TRANSLATION_DOCUMENT_MAX_CHARS = env.int("TRANSLATION_DOCUMENT_MAX_CHARS", default=400000)
+
+# Chat messages the local intent parser is at least this sure about skip the OpenAI parse call
+INTENT_FAST_PATH_CONFIDENCE = env.float("INTENT_FAST_PATH_CONFIDENCE", default=0.9)
+# Offline script / n-gram detection at or above this confidence skips the Google detect call
+LANGUAGE_DETECT_LOCAL_CONFIDENCE = env.float("LANGUAGE_DETECT_LOCAL_CONFIDENCE", default=0.8)
+
+# Side calls of one chat request (source detection, a speculative reply) run on a shared pool
+# alongside the reply, which stays in the request thread; waits give up at the deadline (seconds)
+CHAT_FANOUT_WORKERS = env.int("CHAT_FANOUT_WORKERS", default=16)
+CHAT_REQUEST_DEADLINE = env.float("CHAT_REQUEST_DEADLINE", default=20.0)
+# Start the normal-chat reply alongside the OpenAI intent parse; discarded replies are counted in /api/bot/stats/
+CHAT_SPECULATIVE_REPLY = env.bool("CHAT_SPECULATIVE_REPLY", default=False)
+
+# Multi-turn chat memory (keyed by user / session_id): the newest turns are kept verbatim, older
+# ones are folded into a short rolling summary. The prompt context is capped at the token budget.
+CONVERSATION_MAX_TURNS = env.int("CONVERSATION_MAX_TURNS", default=12)
+CONVERSATION_TOKEN_BUDGET = env.int("CONVERSATION_TOKEN_BUDGET", default=1200)
+CONVERSATION_SUMMARY_CHARS = env.int("CONVERSATION_SUMMARY_CHARS", default=1500)
+CONVERSATION_SUMMARY_LINE_CHARS = env.int("CONVERSATION_SUMMARY_LINE_CHARS", default=160)
+# Conversations idle this long (seconds, 0 = never) are ignored and deleted by `manage.py purge_conversations`
+CONVERSATION_TTL = env.int("CONVERSATION_TTL", default=60 * 60 * 24 * 30)
+
+# ------------------------------
+# Outbound HTTP (Google Translate / TTS)
+# ------------------------------
+OUTBOUND_HTTP_CONNECT_TIMEOUT = env.float("OUTBOUND_HTTP_CONNECT_TIMEOUT", default=3.05)
+OUTBOUND_HTTP_READ_TIMEOUT = env.float("OUTBOUND_HTTP_READ_TIMEOUT", default=15.0)
+OUTBOUND_HTTP_RETRIES = env.int("OUTBOUND_HTTP_RETRIES", default=3)
+OUTBOUND_HTTP_BACKOFF = env.float("OUTBOUND_HTTP_BACKOFF", default=0.3)
+OUTBOUND_HTTP_BACKOFF_JITTER = env.float("OUTBOUND_HTTP_BACKOFF_JITTER", default=0.3)
+# Longest Retry-After (seconds) obeyed before a retry; longer waits are cut to this
+OUTBOUND_HTTP_MAX_RETRY_AFTER = env.float("OUTBOUND_HTTP_MAX_RETRY_AFTER", default=10.0)
+OUTBOUND_HTTP_POOL_HOSTS = env.int("OUTBOUND_HTTP_POOL_HOSTS", default=10)
+OUTBOUND_HTTP_POOL_MAXSIZE = env.int("OUTBOUND_HTTP_POOL_MAXSIZE", default=20)
+# Async views (ASGI) share one httpx pool per event loop; this caps concurrent sockets
+OUTBOUND_HTTP_ASYNC_MAX_CONNECTIONS = env.int("OUTBOUND_HTTP_ASYNC_MAX_CONNECTIONS", default=100)
+
+# ------------------------------
+# Text-to-speech
+# ------------------------------
+# Google's voice list is cached per worker and refetched in the background after TTL seconds;
+# the on-disk copy lets restarted workers skip the cold fetch. It is only a cache, so it lives in the
+# system temp dir by default, outside the source tree; empty disables it
+TTS_VOICE_CATALOG_TTL = env.int("TTS_VOICE_CATALOG_TTL", default=60 * 60 * 12)
+TTS_VOICE_CATALOG_PATH = env(
+    "TTS_VOICE_CATALOG_PATH", default=os.path.join(tempfile.gettempdir(), "helpmespeak", "tts_voices.json")
+)
+# Text over Google's 5000-byte TTS limit is split on sentences and synthesized with up to this many parallel calls
+TTS_CHUNK_WORKERS = env.int("TTS_CHUNK_WORKERS", default=4)
+# Synthesized audio lives in MEDIA_ROOT/tts/ keyed by request hash; a background pass every EVICT_INTERVAL
+# seconds drops least recently used files above MAX_BYTES and files unused for MAX_AGE seconds (0 = no limit)
+TTS_AUDIO_MAX_BYTES = env.int("TTS_AUDIO_MAX_BYTES", default=1024 * 1024 * 1024)
+TTS_AUDIO_MAX_AGE = env.int("TTS_AUDIO_MAX_AGE", default=60 * 60 * 24 * 30)
+TTS_AUDIO_EVICT_INTERVAL = env.int("TTS_AUDIO_EVICT_INTERVAL", default=300)
+# Hits refresh a file's last-use time (its atime) at most this often
+TTS_AUDIO_TOUCH_INTERVAL = env.int("TTS_AUDIO_TOUCH_INTERVAL", default=60)
+
 # ------------------------------
 # Google & Apple OAuth
 # ------------------------------
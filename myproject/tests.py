@@ -0,0 +1,165 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+from urllib.parse import quote
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+from urllib3.response import HTTPResponse
+
+from tts_app.audio_cache import AudioCache
+
+from . import http_client
+from .media import parse_range
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_no_header_serves_everything(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('', 100))
+
+    def test_closed_range(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=10-10', 100), (10, 10))
+        # An end past the file is clamped to the last byte
+        self.assertEqual(parse_range('bytes=90-200', 100), (90, 99))
+
+    def test_open_ended_range(self):
+        self.assertEqual(parse_range('bytes=40-', 100), (40, 99))
+        self.assertEqual(parse_range('bytes=99-', 100), (99, 99))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        # Asking for more than the file holds returns all of it
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+        self.assertIs(parse_range('bytes=-0', 100), False)
+
+    def test_multiple_ranges_serve_everything(self):
+        self.assertIsNone(parse_range('bytes=0-9,20-29', 100))
+        self.assertIsNone(parse_range('bytes=0-9, -5', 100))
+
+    def test_out_of_range_is_unsatisfiable(self):
+        self.assertIs(parse_range('bytes=100-', 100), False)
+        self.assertIs(parse_range('bytes=150-160', 100), False)
+        self.assertIs(parse_range('bytes=0-', 0), False)
+
+    def test_malformed_ranges_serve_everything(self):
+        for header in ('bytes=9-0', 'bytes=-', 'items=0-9', 'bytes=a-b', 'bytes 0-9'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 100))
+
+
+class ServeMediaTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.path = os.path.join(self.media_root, 'clip.mp3')
+        self.write(b'0123456789' * 10)
+
+    def write(self, data, mtime_ns=None):
+        with open(self.path, 'wb') as media_file:
+            media_file.write(data)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_range_request(self):
+        response = self.client.get('/media/clip.mp3', HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 95-99/100')
+        self.assertEqual(b''.join(response.streaming_content), b'56789')
+
+        response = self.client.get('/media/clip.mp3', HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_etag_changes_when_the_file_is_rewritten(self):
+        self.write(b'a' * 100, mtime_ns=1_700_000_000_000_000_000)
+        first = self.client.get('/media/clip.mp3')
+        self.assertNotIn('immutable', first['Cache-Control'])
+        etag = first['ETag']
+        self.assertEqual(self.client.get('/media/clip.mp3', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Same name and size, different bytes (e.g. TTS audio synthesized again after eviction)
+        self.write(b'b' * 100, mtime_ns=1_700_000_100_000_000_000)
+        second = self.client.get('/media/clip.mp3', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], etag)
+
+    def test_audio_cache_hits_keep_the_etag(self):
+        cache = AudioCache(self.media_root, touch_interval=60)
+        key = 'd' * 64
+        name = cache.put(key, b'x' * 100)
+        path = cache.path_for(key)
+        long_ago = time.time() - 3600
+        os.utime(path, (long_ago, long_ago))
+        etag = self.client.get(f'/media/{name}')['ETag']
+
+        # An old file: the hit refreshes its last-use time for the LRU
+        self.assertEqual(cache.get(key), name)
+        self.assertGreater(os.stat(path).st_atime, long_ago + 60)
+        response = self.client.get(f'/media/{name}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    @override_settings(MEDIA_ACCEL='nginx', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_nginx_offload_quotes_the_path(self):
+        name = 'voix été/50% off?.mp3'
+        os.makedirs(os.path.join(self.media_root, 'voix été'))
+        with open(os.path.join(self.media_root, name), 'wb') as media_file:
+            media_file.write(b'audio')
+        response = self.client.get('/media/' + quote(name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/voix%20%C3%A9t%C3%A9/50%25%20off%3F.mp3')
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(OUTBOUND_HTTP_BACKOFF=0.5, OUTBOUND_HTTP_BACKOFF_JITTER=0.3, OUTBOUND_HTTP_MAX_RETRY_AFTER=10)
+class RetryDelayTests(SimpleTestCase):
+    def delay(self, attempt, headers=None):
+        with mock.patch('myproject.http_client.random.uniform', return_value=0.0):
+            return http_client._retry_delay(attempt, httpx.Response(429, headers=headers or {}))
+
+    def test_exponential_backoff_is_capped(self):
+        self.assertEqual([self.delay(attempt) for attempt in range(4)], [0.5, 1.0, 2.0, 4.0])
+        self.assertEqual(self.delay(20), 120)
+        with mock.patch('myproject.http_client.random.uniform', return_value=0.3) as uniform:
+            http_client._retry_delay(0, httpx.Response(503))
+        uniform.assert_called_once_with(0, 0.3)
+
+    def test_retry_after_is_obeyed_up_to_the_cap(self):
+        self.assertEqual(self.delay(0, {'Retry-After': '3'}), 3.0)
+        self.assertEqual(self.delay(0, {'Retry-After': '3600'}), 10.0)
+        # Not a number of seconds: back off as usual
+        self.assertEqual(self.delay(1, {'Retry-After': 'soon'}), 1.0)
+
+    def test_session_retry_after_is_capped(self):
+        http_client.reset_session()
+        self.addCleanup(http_client.reset_session)
+        retry = http_client.get_session().get_adapter('https://translation.googleapis.com').max_retries
+        self.assertIsInstance(retry, http_client.CappedRetry)
+        self.assertEqual(retry.get_retry_after(HTTPResponse(status=429, headers={'Retry-After': '3600'})), 10.0)
+        self.assertEqual(retry.get_retry_after(HTTPResponse(status=429, headers={'Retry-After': '2'})), 2.0)
+        self.assertIsNone(retry.get_retry_after(HTTPResponse(status=503)))
+        # urllib3 copies the policy on every retry; the copies keep the cap
+        self.assertIsInstance(retry.increment('POST', '/v2', HTTPResponse(status=429)), http_client.CappedRetry)
+
+
+class ResetSessionTests(SimpleTestCase):
+    def test_closes_the_session_and_clears_metrics(self):
+        http_client.reset_session()
+        self.addCleanup(http_client.reset_session)
+        session = http_client.get_session()
+        self.assertIs(http_client.get_session(), session)
+        http_client._record('google.translate', 12.0, failed=False)
+        self.assertIn('google.translate', http_client.stats())
+
+        with mock.patch.object(session, 'close') as close:
+            http_client.reset_session()
+        close.assert_called_once_with()
+        self.assertEqual(http_client.stats(), {})
+        self.assertIsNot(http_client.get_session(), session)
@@ -1,8 +1,9 @@
 from django.contrib import admin
-from django.urls import path, include
+import re
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from tts_app.views import home  # Import the home view
+from myproject.media import serve_media
 
 # এই লাইনটা যোগ করুন (যদি আগে না থাকে)
 from pathlib import Path
@@ -22,8 +23,8 @@ urlpatterns = [
     # allauth routes
     path('accounts/', include('allauth.urls')),  
 
-    path('', home),
-]
+    # TTS audio and profile images (Range / ETag / X-Accel-Redirect aware, also outside DEBUG)
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path('', home),
+]
\ No newline at end of file
@@ -0,0 +1,327 @@
+# tts_app/audio_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so every process runs its own eviction
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCache:
+    """
+    Synthesized speech stored under MEDIA_ROOT by a hash of the TTS request (cleaned text,
+    voice, speaking rate, pitch, encoding), so repeating a phrase returns the file Google
+    already produced instead of synthesizing it again. The file path is derived from the
+    key, so the directory itself is the index: files are written under a temporary name
+    and renamed into place, and concurrent writers of the same key leave one complete file.
+
+    Files are sharded by hash prefix (tts/ab/cd/<key>.mp3) to keep directories small. The
+    store is capped at `max_bytes` (and optionally `max_age` seconds since last use) by an
+    eviction pass that drops the least recently used files. Last use is the file atime,
+    bumped on hits at most every `touch_interval` seconds, so all workers share one LRU order;
+    the mtime is left alone so it (and the media ETag built from it) only changes on a rewrite.
+    Temporary files count against the cap too, and ones left by crashed writers (untouched
+    for `stale_tmp_age` seconds) are deleted. Only the process holding an exclusive lock on
+    <directory>/.evict.lock runs the eviction passes; the others retry each interval.
+    """
+
+    def __init__(self, root: str, directory: str = 'tts', extension: str = 'mp3',
+                 max_bytes: int = 0, max_age: int = 0, touch_interval: int = 60, stale_tmp_age: int = 600):
+        self.root = str(root)
+        self.directory = directory
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.touch_interval = touch_interval
+        self.stale_tmp_age = stale_tmp_age
+        # key -> [size, last_used]; rebuilt from disk by every eviction pass
+        self._entries = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._evictor = None
+        self._evictor_lock_file = None
+        self._counters = {
+            'hits': 0, 'misses': 0, 'stores': 0,
+            'evictions': 0, 'evicted_bytes': 0, 'eviction_passes': 0, 'stale_tmp_removed': 0,
+        }
+
+    @staticmethod
+    def key_for(payload: dict) -> str:
+        # Canonical JSON of the whole synthesize request: any setting that changes the audio changes the key
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def name_for(self, key: str) -> str:
+        """Path of the audio file relative to MEDIA_ROOT (and MEDIA_URL)."""
+        return f"{self.directory}/{key[:2]}/{key[2:4]}/{key}.{self.extension}"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, self.name_for(key))
+
+    def _legacy_path(self, key: str) -> str:
+        # Unsharded layout used before the store was size-capped
+        return os.path.join(self.root, self.directory, f"{key}.{self.extension}")
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _track(self, key: str, size: int, last_used: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = [size, last_used]
+                self._bytes += size
+            else:
+                self._bytes += size - entry[0]
+                entry[0], entry[1] = size, max(entry[1], last_used)
+
+    def _untrack(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[0]
+
+    def _stat(self, key: str) -> Optional[os.stat_result]:
+        path = self.path_for(key)
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            pass
+        legacy_path = self._legacy_path(key)
+        if not os.path.isfile(legacy_path):
+            return None
+        try:
+            # Move a file from the old flat layout into its shard on first use
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(legacy_path, path)
+            return os.stat(path)
+        except OSError:
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """Name of the stored audio for `key`, or None if it has not been synthesized yet (or was evicted)."""
+        stat = self._stat(key)
+        if stat is None:
+            self._untrack(key)
+            self._count('misses')
+            return None
+        now = time.time()
+        if now - stat.st_atime >= self.touch_interval:
+            try:
+                os.utime(self.path_for(key), (now, stat.st_mtime))
+            except OSError:
+                pass
+        self._track(key, stat.st_size, now)
+        self._count('hits')
+        return self.name_for(key)
+
+    def put(self, key: str, audio_data: bytes) -> str:
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as audio_file:
+                audio_file.write(audio_data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._track(key, len(audio_data), time.time())
+        self._count('stores')
+        logger.info(f"Audio file saved: {path}")
+        return self.name_for(key)
+
+    def _scan(self) -> Iterator[Tuple[os.DirEntry, os.stat_result]]:
+        stack = [os.path.join(self.root, self.directory)]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry, entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+    def rescan(self) -> List[Tuple[str, int]]:
+        """
+        Rebuild the index from disk so files written or evicted by other workers are accounted for.
+        Returns (path, size) of the temporary files abandoned by crashed writers.
+        """
+        suffix = f".{self.extension}"
+        stale_before = time.time() - self.stale_tmp_age
+        entries, total, stale = {}, 0, []
+        for dir_entry, stat in self._scan():
+            size = stat.st_size
+            if dir_entry.name.endswith('.tmp'):
+                # Writes in progress use disk space too; untouched for a while means the writer died
+                total += size
+                if stat.st_mtime < stale_before:
+                    stale.append((dir_entry.path, size))
+            elif dir_entry.name.endswith(suffix):
+                entries[dir_entry.name[:-len(suffix)]] = [size, stat.st_atime]
+                total += size
+        with self._lock:
+            # Hits not yet written back to the atime still count as recent use
+            for key, entry in entries.items():
+                known = self._entries.get(key)
+                if known is not None:
+                    entry[1] = max(entry[1], known[1])
+            self._entries, self._bytes = entries, total
+        return stale
+
+    def _remove_stale(self, stale: List[Tuple[str, int]]) -> int:
+        removed = removed_bytes = 0
+        for path, size in stale:
+            try:
+                os.remove(path)
+                removed += 1
+                removed_bytes += size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove stale audio temp file {path}: {e}")
+        with self._lock:
+            self._bytes -= removed_bytes
+            self._counters['stale_tmp_removed'] += removed
+        return removed
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            os.remove(self._legacy_path(key))
+
+    def evict(self) -> int:
+        """
+        Delete abandoned temp files, files past max_age, then least recently used ones until
+        under 90% of max_bytes. Returns audio files removed.
+        """
+        self._remove_stale(self.rescan())
+        now = time.time()
+        with self._lock:
+            ordered = sorted(self._entries.items(), key=lambda item: item[1][1])
+            total = self._bytes
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for key, (size, last_used) in ordered:
+            expired = self.max_age and now - last_used > self.max_age
+            over_budget = self.max_bytes and total > target
+            if not expired and not over_budget:
+                break
+            victims.append((key, size))
+            total -= size
+
+        removed = removed_bytes = 0
+        for key, size in victims:
+            try:
+                self._remove(key)
+                removed += 1
+                removed_bytes += size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not evict audio file {key}: {e}")
+                continue
+            self._untrack(key)
+        with self._lock:
+            self._counters['eviction_passes'] += 1
+            self._counters['evictions'] += removed
+            self._counters['evicted_bytes'] += removed_bytes
+        if removed:
+            logger.info(f"Evicted {removed} audio files ({removed_bytes} bytes)")
+        return removed
+
+    def acquire_evictor_lock(self) -> bool:
+        """Whether this process runs the eviction passes: the one holding an exclusive flock on the lock file."""
+        if fcntl is None or self._evictor_lock_file is not None:
+            return True
+        path = os.path.join(self.root, self.directory, '.evict.lock')
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lock_file = open(path, 'a')
+        except OSError as e:
+            logger.warning(f"Could not open audio eviction lock {path}: {e}")
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Another worker evicts; if it exits, the lock is released and we take over
+            lock_file.close()
+            return False
+        # Held, and kept open, for the life of the process
+        self._evictor_lock_file = lock_file
+        return True
+
+    def start_evictor(self, interval: int):
+        """Run evict() every `interval` seconds on a daemon thread (once per process, passes only while holding the lock)."""
+        if interval <= 0 or not (self.max_bytes or self.max_age):
+            return
+        with self._lock:
+            if self._evictor is not None:
+                return
+            self._evictor = threading.Thread(target=self._evict_forever, args=(interval,), name='tts-audio-evictor', daemon=True)
+        self._evictor.start()
+
+    def _evict_forever(self, interval: int):
+        while True:
+            try:
+                if self.acquire_evictor_lock():
+                    self.evict()
+            except Exception as e:
+                logger.error(f"Audio eviction pass failed: {str(e)}")
+            time.sleep(interval)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            files, total = len(self._entries), self._bytes
+        lookups = counters['hits'] + counters['misses']
+        return {
+            **counters,
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            'files': files,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'max_age': self.max_age,
+            # Only the evicting process rescans, so the others' files/bytes lag behind
+            'evictor': fcntl is None or self._evictor_lock_file is not None,
+        }
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    """Return the process-wide TTS audio store rooted at MEDIA_ROOT, starting its eviction thread on first use."""
+    global _audio_cache
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache(
+                    settings.MEDIA_ROOT,
+                    max_bytes=getattr(settings, 'TTS_AUDIO_MAX_BYTES', 0),
+                    max_age=getattr(settings, 'TTS_AUDIO_MAX_AGE', 0),
+                    touch_interval=getattr(settings, 'TTS_AUDIO_TOUCH_INTERVAL', 60),
+                )
+                _audio_cache.start_evictor(getattr(settings, 'TTS_AUDIO_EVICT_INTERVAL', 300))
+    return _audio_cache
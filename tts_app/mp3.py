@@ -0,0 +1,95 @@
+# tts_app/mp3.py
+from typing import Iterator, List, Optional, Tuple
+
+# Bitrates in kbps by (MPEG-1?, layer); index 0 is "free format", which we do not split
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits: 0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1
+_SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+
+def frame_length(header: bytes) -> Optional[int]:
+    """Byte length of the MPEG audio frame starting with this 4-byte header, or None if it is not one."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def _id3v2_length(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    # Sync-safe size (7 bits per byte), plus the header and an optional footer
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) of each audio frame, skipping ID3 tags and resyncing past junk bytes."""
+    position = _id3v2_length(data)
+    end = len(data) - 128 if data[-128:-125] == b'TAG' else len(data)
+    while position + 4 <= end:
+        length = frame_length(data[position:position + 4])
+        if length and position + length <= end:
+            yield position, position + length
+            position += length
+        else:
+            next_sync = data.find(b'\xff', position + 1, end)
+            if next_sync < 0:
+                return
+            position = next_sync
+
+
+def _is_info_frame(frame: bytes) -> bool:
+    # Xing/Info (LAME) and VBRI frames carry no audio, only the length of the file they start;
+    # after concatenation they would report the first segment's duration
+    return b'Xing' in frame[:64] or b'Info' in frame[:64] or frame[36:40] == b'VBRI'
+
+
+def concat_mp3(segments: List[bytes]) -> bytes:
+    """
+    Join MP3 files into one stream by copying their audio frames, without decoding or
+    re-encoding. Tags and per-file info frames are dropped; a segment that does not parse
+    as MP3 is appended unchanged.
+    """
+    if len(segments) == 1:
+        return segments[0]
+    parts = []
+    for segment in segments:
+        frames = list(iter_frames(segment))
+        if not frames:
+            parts.append(segment)
+            continue
+        first_start, first_end = frames[0]
+        if _is_info_frame(segment[first_start:first_end]):
+            frames = frames[1:]
+        # Copy runs of back-to-back frames as one slice
+        run_start, run_end = None, None
+        for start, end in frames:
+            if start != run_end:
+                if run_start is not None:
+                    parts.append(segment[run_start:run_end])
+                run_start = start
+            run_end = end
+        if run_start is not None:
+            parts.append(segment[run_start:run_end])
+    return b''.join(parts)
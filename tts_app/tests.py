@@ -1,3 +1,249 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .audio_cache import AudioCache, fcntl
+from .mp3 import concat_mp3, frame_length, iter_frames
+from .views import TTS_AUDIO_BLOCK_SIZE, AsyncTranslateAndTTSView
+from .voices import VoiceCatalog, language_prefixes, voice_config
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417 bytes per frame, 418 with the padding bit
+MPEG1_HEADER = b'\xff\xfb\x90\x00'
+MPEG1_PADDED_HEADER = b'\xff\xfb\x92\x00'
+
+
+def frame(marker: int = 0, header: bytes = MPEG1_HEADER, body: bytes = b'') -> bytes:
+    length = frame_length(header)
+    payload = body + bytes([marker]) * (length - 4 - len(body))
+    return header + payload
+
+
+def id3v2(payload_size: int) -> bytes:
+    # Sync-safe size: 7 bits per byte
+    size = bytes((payload_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b'ID3\x03\x00\x00' + size + b'\x00' * payload_size
+
+
+class FrameLengthTests(SimpleTestCase):
+    def test_mpeg1_layer3(self):
+        self.assertEqual(frame_length(MPEG1_HEADER), 417)
+        self.assertEqual(frame_length(MPEG1_PADDED_HEADER), 418)
+
+    def test_mpeg2_layer3(self):
+        # 64 kbps, 22.05 kHz: 72 * 64000 // 22050
+        self.assertEqual(frame_length(b'\xff\xf3\x80\x00'), 208)
+
+    def test_rejects_non_frames(self):
+        for header in (b'\x00\x00\x00\x00', b'\xff\xfb\x90', b'\xff\xfb\x00\x00', b'\xff\xfb\xf0\x00',
+                       b'\xff\xfb\x9c\x00', b'\xff\xe9\x90\x00', b'\xff\xf9\x90\x00'):
+            with self.subTest(header=header):
+                self.assertIsNone(frame_length(header))
+
+
+class IterFramesTests(SimpleTestCase):
+    def test_frames_are_back_to_back(self):
+        data = frame(1) + frame(2, MPEG1_PADDED_HEADER) + frame(3)
+        self.assertEqual(list(iter_frames(data)), [(0, 417), (417, 835), (835, 1252)])
+
+    def test_skips_id3v2_tag(self):
+        tag = id3v2(300)
+        data = tag + frame(1) + frame(2)
+        self.assertEqual(list(iter_frames(data)), [(310, 727), (727, 1144)])
+
+    def test_skips_id3v2_footer_and_id3v1_tag(self):
+        tag = bytearray(id3v2(20))
+        tag[5] |= 0x10  # footer present
+        data = bytes(tag) + b'3DI' + b'\x00' * 7 + frame(1) + b'TAG' + b'\x00' * 125
+        self.assertEqual(list(iter_frames(data)), [(40, 457)])
+
+    def test_resyncs_past_junk(self):
+        data = frame(1) + b'\x00\xff\x00junk' + frame(2)
+        self.assertEqual(list(iter_frames(data)), [(0, 417), (424, 841)])
+
+    def test_truncated_last_frame_is_dropped(self):
+        data = frame(1) + frame(2)[:200]
+        self.assertEqual(list(iter_frames(data)), [(0, 417)])
+
+
+class ConcatMp3Tests(SimpleTestCase):
+    def test_single_segment_is_returned_unchanged(self):
+        segment = id3v2(10) + frame(1)
+        self.assertIs(concat_mp3([segment]), segment)
+
+    def test_joins_audio_frames_of_each_chunk(self):
+        first = id3v2(50) + frame(1) + frame(2)
+        second = id3v2(70) + frame(3) + b'junk' + frame(4)
+        third = frame(5, MPEG1_PADDED_HEADER)
+        joined = concat_mp3([first, second, third])
+        self.assertEqual(joined, frame(1) + frame(2) + frame(3) + frame(4) + frame(5, MPEG1_PADDED_HEADER))
+        self.assertEqual(len(list(iter_frames(joined))), 5)
+
+    def test_drops_info_frames(self):
+        info = frame(0, body=b'\x00' * 32 + b'Info')
+        xing = frame(0, body=b'\x00' * 32 + b'Xing')
+        joined = concat_mp3([info + frame(1), xing + frame(2)])
+        self.assertEqual(joined, frame(1) + frame(2))
+
+    def test_non_mp3_segment_is_appended_as_is(self):
+        self.assertEqual(concat_mp3([frame(1), b'not audio']), frame(1) + b'not audio')
+
+
+class AudioCacheEvictionTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache = AudioCache(self.root, max_bytes=1000, stale_tmp_age=600)
+        # Files written by another worker, so only their atimes tell when they were last used
+        self.writer = AudioCache(self.root)
+
+    def store(self, key, size, age):
+        self.writer.put(key, b'x' * size)
+        used = time.time() - age
+        os.utime(self.writer.path_for(key), (used, used))
+
+    def write_tmp(self, name, size, age):
+        path = os.path.join(self.root, 'tts', name)
+        with open(path, 'wb') as tmp_file:
+            tmp_file.write(b'x' * size)
+        os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def test_evicts_least_recently_used_down_to_ninety_percent(self):
+        for index, age in enumerate([500, 400, 300, 200, 100]):
+            self.store(f"{index:064x}", 300, age)
+        # 1500 bytes against a 900 byte target: the two oldest go
+        self.assertEqual(self.cache.evict(), 2)
+        self.assertEqual(self.cache.stats()['bytes'], 900)
+        remaining = [key for key in (f"{index:064x}" for index in range(5)) if self.cache.get(key)]
+        self.assertEqual(remaining, [f"{2:064x}", f"{3:064x}", f"{4:064x}"])
+
+    def test_max_age_expires_old_files(self):
+        cache = AudioCache(self.root, max_age=3600)
+        self.store('a' * 64, 1, age=7200)
+        self.store('b' * 64, 1, age=60)
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get('a' * 64))
+        self.assertIsNotNone(cache.get('b' * 64))
+
+    def test_stale_temp_files_are_counted_and_removed(self):
+        os.makedirs(os.path.join(self.root, 'tts'), exist_ok=True)
+        stale = self.write_tmp('crashed.mp3.1.2.tmp', 700, age=3600)
+        fresh = self.write_tmp('writing.mp3.1.3.tmp', 200, age=0)
+        self.store('c' * 64, 300, age=10)
+        # 1200 bytes on disk: the abandoned write goes first, which is enough to fit the cap
+        self.assertEqual(self.cache.evict(), 0)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+        stats = self.cache.stats()
+        self.assertEqual(stats['stale_tmp_removed'], 1)
+        self.assertEqual(stats['bytes'], 500)
+
+    def test_one_process_owns_eviction(self):
+        if fcntl is None:
+            self.skipTest("flock is not available on this platform")
+        other = AudioCache(self.root, max_bytes=1000)
+        self.assertTrue(self.cache.acquire_evictor_lock())
+        self.assertFalse(other.acquire_evictor_lock())
+        self.cache._evictor_lock_file.close()
+        # The owner went away: the next one to try takes over
+        self.assertTrue(other.acquire_evictor_lock())
+        other._evictor_lock_file.close()
+
+
+VOICES = [
+    {'name': 'en-US-Standard-A', 'languageCodes': ['en-US'], 'ssmlGender': 'MALE'},
+    {'name': 'en-US-Chirp3-HD-Charon', 'languageCodes': ['en-US'], 'ssmlGender': 'MALE'},
+    {'name': 'en-GB-Neural2-A', 'languageCodes': ['en-GB'], 'ssmlGender': 'FEMALE'},
+    {'name': 'en-GB-Chirp3-HD-Aoede', 'languageCodes': ['en-GB'], 'ssmlGender': 'FEMALE'},
+    {'name': 'en-US-Chirp3-HD-Kore', 'languageCodes': ['en-US'], 'ssmlGender': 'FEMALE'},
+    {'name': 'fr-FR-Standard-B', 'languageCodes': ['fr-FR'], 'ssmlGender': 'MALE'},
+    {'name': 'fr-CA-Neural2-A', 'languageCodes': ['fr-CA'], 'ssmlGender': 'FEMALE'},
+    {'name': 'bn-IN-Standard-A', 'languageCodes': ['bn-IN']},
+    {'name': 'cmn-CN-Chirp3-HD-Leda', 'languageCodes': ['cmn-CN', 'cmn-Hans-CN'], 'ssmlGender': 'FEMALE'},
+    {'name': 'yue-HK-Standard-A', 'languageCodes': ['yue-HK'], 'ssmlGender': 'FEMALE'},
+]
+
+
+def scan_for_voice(voices, language_code):
+    # The per-request scan the index replaced
+    matching = [voice for voice in voices if any(code.startswith(language_code) for code in voice['languageCodes'])]
+    if not matching:
+        return None
+    for voice in matching:
+        if 'Chirp3-HD' in voice.get('name', '') and voice.get('ssmlGender') == 'FEMALE':
+            return voice_config(voice)
+    return voice_config(matching[0])
+
+
+class VoiceCatalogTests(SimpleTestCase):
+    def test_index_picks_the_same_voice_as_the_scan(self):
+        catalog = VoiceCatalog()
+        catalog._install(VOICES, time.time())
+        codes = {prefix for voice in VOICES for code in voice['languageCodes'] for prefix in language_prefixes(code)}
+        for language_code in sorted(codes) + ['de', 'de-DE']:
+            with self.subTest(language_code=language_code):
+                self.assertEqual(catalog.voice_for(language_code), scan_for_voice(VOICES, language_code))
+
+    def test_lookups_ignore_case(self):
+        catalog = VoiceCatalog()
+        catalog._install(VOICES, time.time())
+        self.assertEqual(catalog.voice_for('EN-gb')['name'], 'en-GB-Chirp3-HD-Aoede')
+
+
+class AsyncAudioResponseTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.audio = bytes(range(256)) * (TTS_AUDIO_BLOCK_SIZE // 256 * 2 + 3)
+        with open(os.path.join(self.media_root, 'speech.mp3'), 'wb') as audio_file:
+            audio_file.write(self.audio)
+        self.view = AsyncTranslateAndTTSView()
+        self.view.request = RequestFactory().post('/api/tts/async/')
+
+    def respond(self, speech_file):
+        with mock.patch.object(self.view, 'speech_file', mock.AsyncMock(return_value=speech_file)):
+            return async_to_sync(self.view.audio_response)("hola", 'es', False)
+
+    async def collect(self, response):
+        return [block async for block in response.streaming_content]
+
+    def test_streams_the_file_in_blocks(self):
+        response = self.respond(('speech.mp3', None))
+        self.assertEqual(response['Content-Type'], 'audio/mpeg')
+        self.assertEqual(response['Content-Length'], str(len(self.audio)))
+        blocks = async_to_sync(self.collect)(response)
+        self.assertEqual(len(blocks), 3)
+        self.assertTrue(all(len(block) <= TTS_AUDIO_BLOCK_SIZE for block in blocks))
+        self.assertEqual(b''.join(blocks), self.audio)
+
+    def test_missing_file_is_a_json_error(self):
+        response = self.respond(('evicted.mp3', None))
+        self.assertEqual(response.status_code, 502)
+
+
+class AsyncTTSRequestTests(SimpleTestCase):
+    def post_both(self, **kwargs):
+        sync = self.client.post('/tts/translatetts/', **kwargs)
+        async_ = self.client.post('/tts/translatetts/async/', **kwargs)
+        return sync, async_
+
+    def test_bad_requests_match_the_sync_view(self):
+        for kwargs in (
+            {'data': '{"text": ', 'content_type': 'application/json'},
+            {'data': {"lang": "fr"}, 'content_type': 'application/json'},
+            {'data': {"text": "hello"}},
+            {'data': 'text=hello', 'content_type': 'text/plain'},
+        ):
+            with self.subTest(**kwargs):
+                sync, async_ = self.post_both(**kwargs)
+                self.assertIn(sync.status_code, (400, 415))
+                self.assertEqual(async_.status_code, sync.status_code)
+                self.assertEqual(async_.json(), sync.json())
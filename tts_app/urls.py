@@ -1,10 +1,11 @@
 # tts_app/urls.py
 from django.urls import path
-from .views import TranslateAndTTSAPIView
+from .views import TranslateAndTTSAPIView, AsyncTranslateAndTTSView
 
 
 urlpatterns = [
     path("translatetts", TranslateAndTTSAPIView.as_view(), name="translate-tts"),  # slash optional
     path("translatetts/", TranslateAndTTSAPIView.as_view()),  # slash version
+    path("translatetts/async", AsyncTranslateAndTTSView.as_view(), name="translate-tts-async"),
+    path("translatetts/async/", AsyncTranslateAndTTSView.as_view()),
 ]
-
@@ -1,86 +1,208 @@
 import os
-import uuid
+import html
 import base64
 import requests
+import httpx
 import re
 import logging
+import asyncio
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from rest_framework import exceptions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.conf import settings
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+
+from bot.cache import acache_call, get_translation_cache
+from bot.phrasebook import get_phrasebook
+from bot.segmenter import iter_chunks
+from bot.views import read_api_request
+from myproject import http_client
+
+from .audio_cache import get_audio_cache
+from .mp3 import concat_mp3
+from .voices import get_voice_catalog
 
 logger = logging.getLogger(__name__)
 
-@method_decorator(csrf_exempt, name='dispatch')
-class TranslateAndTTSAPIView(APIView):
-    authentication_classes = []
-    permission_classes = []
+TRANSLATE_API_URL = "https://translation.googleapis.com/language/translate/v2"
+TTS_SYNTHESIZE_URL = "https://texttospeech.googleapis.com/v1/text:synthesize"
+# Google TTS rejects input over 5000 bytes; longer text is synthesized in chunks
+TTS_MAX_INPUT_BYTES = 5000
+# Longest percent-encoded translation sent in the X-Translated-Text header of audio responses
+TTS_AUDIO_HEADER_TEXT_MAX = 2048
+# Read size when streaming audio files from the async view
+TTS_AUDIO_BLOCK_SIZE = 64 * 1024
+
+
+class TTSPipelineMixin:
+    """Request building and response handling shared by the sync and async translate + TTS views."""
 
     def clean_text_for_tts(self, text: str) -> str:
-        """Clean text for TTS by removing problematic characters and limiting length."""
+        """Clean text for TTS by removing problematic characters."""
         # Remove underscores and excessive punctuation, preserve Bengali script
         cleaned_text = re.sub(r'[_;]', ' ', text)  # Replace underscores and semicolons with spaces
         cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()  # Normalize spaces
-        # Limit to 5000 characters (Google TTS limit)
-        max_chars = 5000
-        if len(cleaned_text) > max_chars:
-            logger.warning(f"Text truncated from {len(cleaned_text)} to {max_chars} characters")
-            cleaned_text = cleaned_text[:max_chars]
         return cleaned_text
 
-    def get_best_voice_for_language(self, language_code: str) -> dict | None:
-        """Get the Chirp3-HD female voice for a language, or fallback to any available voice."""
-        try:
-            url = f"https://texttospeech.googleapis.com/v1/voices?key={settings.GOOGLE_API_KEY}"
-            logger.debug(f"Fetching voices for language: {language_code}")
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            voices = data.get('voices', [])
-
-            # Filter voices for the target language
-            matching_voices = [
-                voice for voice in voices
-                if any(lang_code.startswith(language_code) for lang_code in voice['languageCodes'])
-            ]
-
-            logger.debug(f"Matching voices for {language_code}: {len(matching_voices)} found")
-
-            if not matching_voices:
-                logger.warning(f"No voices found for language: {language_code}")
-                return None
-
-            # Priority: Chirp3-HD Female only
-            for voice in matching_voices:
-                if 'Chirp3-HD' in voice.get('name', '') and voice.get('ssmlGender') == 'FEMALE':
-                    logger.info(f"Selected voice: {voice['name']}, Type: Chirp3-HD, Gender: FEMALE")
-                    return {
-                        'name': voice['name'],
-                        'language_code': voice['languageCodes'][0],
-                        'gender': voice['ssmlGender'],
-                        'type': 'Chirp3-HD'
-                    }
-
-            # Fallback to first available voice
-            voice = matching_voices[0]
+    def tts_chunks(self, cleaned_text: str) -> list:
+        """Split text into sentence-aligned pieces within Google's per-request byte limit."""
+        chunks = list(iter_chunks(cleaned_text, max_bytes=TTS_MAX_INPUT_BYTES)) or [cleaned_text]
+        if len(chunks) > 1:
+            logger.info(f"Synthesizing {len(cleaned_text)} characters in {len(chunks)} chunks")
+        return chunks
+
+    def phrasebook_translation(self, text: str, lang_code: str) -> str | None:
+        """Curated dashboard Phrase translation for the text, if one exists (may read the database)."""
+        if not getattr(settings, 'PHRASEBOOK_ENABLED', True):
+            return None
+        curated = get_phrasebook().lookup(text, lang_code)
+        return curated['translated_text'] if curated else None
+
+    def clean_translation(self, translated_text: str) -> str:
+        # 🔥 এখানে HTML entity decode করবে
+        translated_text = html.unescape(translated_text)
+
+        # 🔥 এখানে সব ধরনের কোটেশন রিমুভ করবে
+        for q in ['"', '“', '”', '‟', '„']:
+            translated_text = translated_text.replace(q, '')
+        return translated_text
+
+    def select_voice(self, language_code: str) -> dict | None:
+        """Pick the Chirp3-HD female voice for a language from the cached voice catalog, or fallback to any available voice."""
+        voice = get_voice_catalog().voice_for(language_code)
+        if voice is None:
+            logger.warning(f"No voices found for language: {language_code}")
+            return None
+        if voice['type'] == 'Chirp3-HD' and voice['gender'] == 'FEMALE':
+            logger.info(f"Selected voice: {voice['name']}, Type: Chirp3-HD, Gender: FEMALE")
+        else:
             logger.warning(f"No Chirp3-HD Female voice found for {language_code}. Using fallback: {voice['name']}")
-            return {
-                'name': voice['name'],
-                'language_code': voice['languageCodes'][0],
-                'gender': voice.get('ssmlGender', 'NEUTRAL'),
-                'type': 'Chirp3-HD' if 'Chirp3-HD' in voice['name'] else (
-                    'Neural2' if 'Neural2' in voice['name'] else 'Standard'
-                )
+        return voice
+
+    def synthesize_payload(self, cleaned_text: str, voice_config: dict) -> dict:
+        return {
+            "input": {"text": cleaned_text},
+            "voice": {
+                "languageCode": voice_config['language_code'],
+                "name": voice_config['name']
+            },
+            "audioConfig": {
+                "audioEncoding": "MP3",
+                "pitch": 0.0,
+                "speakingRate": 0.9
             }
+        }
+
+    def audio_url(self, file_name: str) -> str:
+        audio_url = self.request.build_absolute_uri(settings.MEDIA_URL + file_name)
+        logger.info(f"Audio URL: {audio_url}")
+        return audio_url
+
+    def cached_audio(self, cache_key: str) -> str | None:
+        """Media file of audio already synthesized for the same request, if any."""
+        file_name = get_audio_cache().get(cache_key)
+        if file_name is not None:
+            logger.debug(f"TTS audio cache hit: {file_name}")
+        return file_name
+
+    def decode_audio(self, result: dict) -> bytes | None:
+        audio_content = result.get('audioContent')
+        if not audio_content:
+            logger.error("No audio content received from TTS API")
+            return None
+        return base64.b64decode(audio_content)
+
+    def save_audio(self, segments: list, cache_key: str) -> str:
+        """Join the MP3 segments of one text, store them in the audio cache and return the media file name."""
+        return get_audio_cache().put(cache_key, concat_mp3(segments))
+
+    def wants_audio(self, data) -> bool:
+        """`response_type=audio` (body or query string) returns the MP3 itself instead of JSON with its URL."""
+        response_type = data.get("response_type") or self.request.GET.get("response_type") or "json"
+        return str(response_type).lower() == "audio"
 
+    def audio_path(self, file_name: str) -> str:
+        return os.path.join(settings.MEDIA_ROOT, file_name)
+
+    def add_audio_headers(self, response, file_name: str, translated_text: str, lang_code: str, from_phrasebook: bool):
+        """Translation metadata for `response_type=audio`; text headers are percent-encoded UTF-8."""
+        response['Content-Disposition'] = f'inline; filename="{os.path.basename(file_name)}"'
+        response['Content-Language'] = lang_code
+        response['X-Audio-Url'] = self.request.build_absolute_uri(settings.MEDIA_URL + file_name)
+        response['X-From-Phrasebook'] = 'true' if from_phrasebook else 'false'
+        exposed = ['Content-Language', 'X-Audio-Url', 'X-From-Phrasebook']
+        encoded_text = quote(translated_text, safe='')
+        # Long texts would overflow proxy header buffers; clients can ask for JSON instead
+        if len(encoded_text) <= TTS_AUDIO_HEADER_TEXT_MAX:
+            response['X-Translated-Text'] = encoded_text
+            exposed.append('X-Translated-Text')
+        response['Access-Control-Expose-Headers'] = ', '.join(exposed)
+        return response
+
+    def tts_http_error(self, language_code: str, error: Exception, response) -> str:
+        error_message = f"TTS error for {language_code}: {str(error)}"
+        if response is not None and response.status_code == 400:
+            error_message += " (Possibly due to unsupported characters or invalid voice)"
+            try:
+                error_details = response.json()
+                logger.error(f"TTS error details: {error_details}")
+            except ValueError:
+                pass
+        logger.error(error_message)
+        return f"not found audio ({error_message})"
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TranslateAndTTSAPIView(TTSPipelineMixin, APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get_best_voice_for_language(self, language_code: str) -> dict | None:
+        """Get the Chirp3-HD female voice for a language, or fallback to any available voice."""
+        try:
+            # Fetched once per worker and refreshed in the background, not per request
+            get_voice_catalog().ensure_loaded()
+            return self.select_voice(language_code)
         except Exception as e:
             logger.error(f"Error getting voice for {language_code}: {str(e)}")
             return None
 
+    def synthesize_chunk(self, text: str, voice_config: dict) -> bytes | None:
+        url = f"{TTS_SYNTHESIZE_URL}?key={settings.GOOGLE_API_KEY}"
+        payload = self.synthesize_payload(text, voice_config)
+        headers = {"Content-Type": "application/json"}
+        logger.debug(f"TTS request payload: {payload}")
+        response = http_client.post(url, endpoint='google.tts.synthesize', headers=headers, json=payload)
+        response.raise_for_status()
+        return self.decode_audio(response.json())
+
+    def synthesize(self, chunks: list, voice_config: dict) -> list | None:
+        """MP3 audio for each chunk in order (one Google call per chunk, run in parallel), or None if any came back empty."""
+        parallelism = max(1, min(getattr(settings, 'TTS_CHUNK_WORKERS', 4), len(chunks)))
+        if parallelism == 1:
+            segments = [self.synthesize_chunk(chunk, voice_config) for chunk in chunks]
+        else:
+            executor = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='tts-chunk')
+            try:
+                segments = list(executor.map(lambda chunk: self.synthesize_chunk(chunk, voice_config), chunks))
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+        return None if any(segment is None for segment in segments) else segments
+
     def text_to_speech(self, text: str, language_code: str) -> str | None:
         """Convert text to speech using Google TTS API with Chirp3-HD female voice preference."""
+        file_name, error = self.speech_file(text, language_code)
+        return self.audio_url(file_name) if file_name else error
+
+    def speech_file(self, text: str, language_code: str) -> tuple:
+        """(media file name, None) for the text's audio, synthesized on a cache miss, or (None, error message)."""
         try:
             # Clean text for TTS
             cleaned_text = self.clean_text_for_tts(text)
@@ -90,63 +212,39 @@ class TranslateAndTTSAPIView(APIView):
             voice_config = self.get_best_voice_for_language(language_code)
             if not voice_config:
                 logger.warning(f"No voice available for {language_code}")
-                return f"not found audio (No voice available for {language_code})"
-
-            # Create media directory if it doesn't exist
-            os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
-            file_name = f"{uuid.uuid4()}_{language_code}.mp3"
-            file_path = os.path.join(settings.MEDIA_ROOT, file_name)
-
-            # Prepare TTS request
-            url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={settings.GOOGLE_API_KEY}"
-            payload = {
-                "input": {"text": cleaned_text},
-                "voice": {
-                    "languageCode": voice_config['language_code'],
-                    "name": voice_config['name']
-                },
-                "audioConfig": {
-                    "audioEncoding": "MP3",
-                    "pitch": 0.0,
-                    "speakingRate": 0.9
-                }
-            }
-            headers = {"Content-Type": "application/json"}
-            logger.debug(f"TTS request payload: {payload}")
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
+                return None, f"not found audio (No voice available for {language_code})"
 
-            result = response.json()
-            audio_content = result.get('audioContent')
-            if not audio_content:
-                logger.error("No audio content received from TTS API")
-                return "not found audio (No audio content received)"
+            # Prepare TTS request; an identical earlier request already has its audio on disk
+            payload = self.synthesize_payload(cleaned_text, voice_config)
+            cache_key = get_audio_cache().key_for(payload)
+            file_name = self.cached_audio(cache_key)
+            if file_name:
+                return file_name, None
 
-            # Save audio file
-            audio_data = base64.b64decode(audio_content)
-            with open(file_path, 'wb') as audio_file:
-                audio_file.write(audio_data)
-            logger.info(f"Audio file saved: {file_path}")
+            segments = self.synthesize(self.tts_chunks(cleaned_text), voice_config)
+            if segments is None:
+                return None, "not found audio (No audio content received)"
 
-            # Return the audio URL
-            audio_url = self.request.build_absolute_uri(settings.MEDIA_URL + file_name)
-            logger.info(f"Audio URL: {audio_url}")
-            return audio_url
+            # Save audio file
+            return self.save_audio(segments, cache_key), None
 
         except requests.exceptions.HTTPError as e:
-            error_message = f"TTS error for {language_code}: {str(e)}"
-            if response.status_code == 400:
-                error_message += " (Possibly due to unsupported characters or invalid voice)"
-                try:
-                    error_details = response.json()
-                    logger.error(f"TTS error details: {error_details}")
-                except ValueError:
-                    pass
-            logger.error(error_message)
-            return f"not found audio ({error_message})"
+            return None, self.tts_http_error(language_code, e, e.response)
         except Exception as e:
             logger.error(f"TTS error for {language_code}: {str(e)}")
-            return f"not found audio (TTS error: {str(e)})"
+            return None, f"not found audio (TTS error: {str(e)})"
+
+    def audio_response(self, translated_text: str, lang_code: str, from_phrasebook: bool):
+        """The MP3 as the response body (`response_type=audio`), metadata in headers; JSON error if there is no audio."""
+        file_name, error = self.speech_file(translated_text, lang_code)
+        if file_name:
+            try:
+                response = FileResponse(open(self.audio_path(file_name), 'rb'), content_type='audio/mpeg')
+                return self.add_audio_headers(response, file_name, translated_text, lang_code, from_phrasebook)
+            except FileNotFoundError:
+                # Evicted between lookup and open
+                error = "not found audio (Audio file was removed)"
+        return Response({"error": error, "translated_text": translated_text, "from_phrasebook": from_phrasebook}, status=502)
 
     def post(self, request):
         text = request.data.get("text")
@@ -158,7 +256,6 @@ class TranslateAndTTSAPIView(APIView):
             return Response({"error": "No language selected."}, status=400)
 
         # Google Translate API
-        API_URL = "https://translation.googleapis.com/language/translate/v2"
         try:
             API_KEY = settings.GOOGLE_API_KEY
             logger.debug(f"Using GOOGLE_API_KEY: {API_KEY[:4]}...{API_KEY[-4:]}")
@@ -167,23 +264,26 @@ class TranslateAndTTSAPIView(APIView):
             return Response({"error": "GOOGLE_API_KEY not configured in settings."}, status=500)
 
         try:
-            payload = {"q": text, "target": lang_code}
-            headers = {"Content-Type": "application/json"}
-            logger.debug(f"Translation request payload: {payload}")
-            response = requests.post(f"{API_URL}?key={API_KEY}", json=payload, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            result = response.json()
-            translated_text = result["data"]["translations"][0]["translatedText"]
-
-            # 🔥 এখানে HTML entity decode করবে
-            import html
-            translated_text = html.unescape(translated_text)
-
-            # 🔥 এখানে সব ধরনের কোটেশন রিমুভ করবে
-            for q in ['"', '“', '”', '‟', '„']:
-                translated_text = translated_text.replace(q, '')
+            cache = get_translation_cache()
+            translated_text = self.phrasebook_translation(text, lang_code)
+            from_phrasebook = translated_text is not None
+            if from_phrasebook:
+                logger.debug(f"Phrasebook hit for target {lang_code}")
+            else:
+                translated_text = cache.get(text, lang_code, namespace="html")
+            if translated_text is None:
+                payload = {"q": text, "target": lang_code}
+                headers = {"Content-Type": "application/json"}
+                logger.debug(f"Translation request payload: {payload}")
+                response = http_client.post(f"{TRANSLATE_API_URL}?key={API_KEY}", endpoint='google.translate', json=payload, headers=headers)
+                response.raise_for_status()
+                result = response.json()
+                translated_text = result["data"]["translations"][0]["translatedText"]
+                cache.set(text, lang_code, translated_text, namespace="html")
+            elif not from_phrasebook:
+                logger.debug(f"Translation cache hit for target {lang_code}")
 
+            translated_text = self.clean_translation(translated_text)
             logger.info(f"Translated text: {translated_text}")
 
 
@@ -191,14 +291,174 @@ class TranslateAndTTSAPIView(APIView):
             logger.error(f"Translation failed: {str(e)}")
             return Response({"error": f"Translation failed: {str(e)}"}, status=500)
 
+        if self.wants_audio(request.data):
+            return self.audio_response(translated_text, lang_code, from_phrasebook)
+
         # Generate audio using Google TTS with Chirp3-HD female voice preference
         audio_url = self.text_to_speech(translated_text, lang_code)
 
         return Response({
             "original_text": text,
             "translated_text": translated_text,
-            "audio_url": audio_url
+            "audio_url": audio_url,
+            "from_phrasebook": from_phrasebook
         })
 
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncTranslateAndTTSView(TTSPipelineMixin, View):
+    """
+    Native async TranslateAndTTSAPIView for ASGI deployments. Same request and response JSON;
+    the Google Translate and TTS calls are awaited instead of blocking a worker thread.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            if not isinstance(request, ASGIRequest):
+                # Under WSGI each request runs on its own event loop: close the client bound to it
+                await http_client.aclose_client()
+
+    async def get_best_voice_for_language(self, language_code: str) -> dict | None:
+        try:
+            await get_voice_catalog().aensure_loaded()
+            return self.select_voice(language_code)
+        except Exception as e:
+            logger.error(f"Error getting voice for {language_code}: {str(e)}")
+            return None
+
+    async def synthesize_chunk(self, text: str, voice_config: dict) -> bytes | None:
+        url = f"{TTS_SYNTHESIZE_URL}?key={settings.GOOGLE_API_KEY}"
+        response = await http_client.apost(url, endpoint='google.tts.synthesize', json=self.synthesize_payload(text, voice_config))
+        response.raise_for_status()
+        return self.decode_audio(response.json())
+
+    async def synthesize(self, chunks: list, voice_config: dict) -> list | None:
+        semaphore = asyncio.Semaphore(max(1, getattr(settings, 'TTS_CHUNK_WORKERS', 4)))
+
+        async def synthesize_chunk(chunk):
+            async with semaphore:
+                return await self.synthesize_chunk(chunk, voice_config)
+
+        tasks = [asyncio.ensure_future(synthesize_chunk(chunk)) for chunk in chunks]
+        try:
+            segments = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None if any(segment is None for segment in segments) else segments
+
+    async def text_to_speech(self, text: str, language_code: str) -> str | None:
+        file_name, error = await self.speech_file(text, language_code)
+        return self.audio_url(file_name) if file_name else error
+
+    async def speech_file(self, text: str, language_code: str) -> tuple:
+        try:
+            cleaned_text = self.clean_text_for_tts(text)
+            voice_config = await self.get_best_voice_for_language(language_code)
+            if not voice_config:
+                logger.warning(f"No voice available for {language_code}")
+                return None, f"not found audio (No voice available for {language_code})"
+
+            payload = self.synthesize_payload(cleaned_text, voice_config)
+            cache_key = get_audio_cache().key_for(payload)
+            # stat (and the LRU touch) on the audio store is disk I/O: keep it off the event loop
+            file_name = await sync_to_async(self.cached_audio, thread_sensitive=False)(cache_key)
+            if file_name:
+                return file_name, None
+
+            segments = await self.synthesize(self.tts_chunks(cleaned_text), voice_config)
+            if segments is None:
+                return None, "not found audio (No audio content received)"
+
+            # Joining and the file write stay off the event loop
+            return await sync_to_async(self.save_audio, thread_sensitive=False)(segments, cache_key), None
+
+        except httpx.HTTPStatusError as e:
+            return None, self.tts_http_error(language_code, e, e.response)
+        except Exception as e:
+            logger.error(f"TTS error for {language_code}: {str(e)}")
+            return None, f"not found audio (TTS error: {str(e)})"
+
+    async def audio_response(self, translated_text: str, lang_code: str, from_phrasebook: bool):
+        file_name, error = await self.speech_file(translated_text, lang_code)
+        if file_name:
+            try:
+                audio_file = await sync_to_async(open, thread_sensitive=False)(self.audio_path(file_name), 'rb')
+            except FileNotFoundError:
+                # Evicted between lookup and open
+                error = "not found audio (Audio file was removed)"
+            else:
+                response = StreamingHttpResponse(self.stream_audio(audio_file), content_type='audio/mpeg')
+                response['Content-Length'] = str(os.fstat(audio_file.fileno()).st_size)
+                return self.add_audio_headers(response, file_name, translated_text, lang_code, from_phrasebook)
+        return JsonResponse(
+            {"error": error, "translated_text": translated_text, "from_phrasebook": from_phrasebook},
+            status=502, json_dumps_params={'ensure_ascii': False}
+        )
+
+    async def stream_audio(self, audio_file):
+        # Block by block, read off the event loop, so a long recording is never held in memory whole
+        read = sync_to_async(audio_file.read, thread_sensitive=False)
+        try:
+            while True:
+                block = await read(TTS_AUDIO_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block
+        finally:
+            audio_file.close()
+
+    async def post(self, request):
+        try:
+            # Parsed like request.data in TranslateAndTTSAPIView, so bad bodies get the same 400
+            _, data = await sync_to_async(read_api_request)(request, authenticate=False)
+        except exceptions.APIException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+            return JsonResponse(detail, status=e.status_code)
+
+        text = data.get("text")
+        lang_code = data.get("lang") or data.get("target_lang")
+
+        if not text:
+            return JsonResponse({"error": "No text provided."}, status=400)
+        if not lang_code:
+            return JsonResponse({"error": "No language selected."}, status=400)
+
+        API_KEY = getattr(settings, 'GOOGLE_API_KEY', None)
+        if not API_KEY:
+            logger.error("GOOGLE_API_KEY not configured in settings.")
+            return JsonResponse({"error": "GOOGLE_API_KEY not configured in settings."}, status=500)
+
+        try:
+            cache = get_translation_cache()
+            translated_text = await sync_to_async(self.phrasebook_translation)(text, lang_code)
+            from_phrasebook = translated_text is not None
+            if not from_phrasebook:
+                translated_text = await acache_call(cache.get, text, lang_code, namespace="html")
+            if translated_text is None:
+                payload = {"q": text, "target": lang_code}
+                response = await http_client.apost(f"{TRANSLATE_API_URL}?key={API_KEY}", endpoint='google.translate', json=payload)
+                response.raise_for_status()
+                translated_text = response.json()["data"]["translations"][0]["translatedText"]
+                await acache_call(cache.set, text, lang_code, translated_text, namespace="html")
+            translated_text = self.clean_translation(translated_text)
+        except Exception as e:
+            logger.error(f"Translation failed: {str(e)}")
+            return JsonResponse({"error": f"Translation failed: {str(e)}"}, status=500)
+
+        if self.wants_audio(data):
+            return await self.audio_response(translated_text, lang_code, from_phrasebook)
+
+        audio_url = await self.text_to_speech(translated_text, lang_code)
+
+        return JsonResponse({
+            "original_text": text,
+            "translated_text": translated_text,
+            "audio_url": audio_url,
+            "from_phrasebook": from_phrasebook
+        }, json_dumps_params={'ensure_ascii': False})
+
 def home(request):
     return HttpResponse("Welcome to Help Me Speak")
\ No newline at end of file
@@ -0,0 +1,200 @@
+# tts_app/voices.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from myproject import http_client
+
+logger = logging.getLogger(__name__)
+
+TTS_VOICES_URL = "https://texttospeech.googleapis.com/v1/voices"
+
+
+def voice_type(name: str) -> str:
+    if 'Chirp3-HD' in name:
+        return 'Chirp3-HD'
+    return 'Neural2' if 'Neural2' in name else 'Standard'
+
+
+def voice_config(voice: dict) -> dict:
+    """The voice settings the TTS views send to Google for one entry of the /v1/voices list."""
+    return {
+        'name': voice['name'],
+        'language_code': voice['languageCodes'][0],
+        'gender': voice.get('ssmlGender', 'NEUTRAL'),
+        'type': voice_type(voice['name'])
+    }
+
+
+def language_prefixes(language_code: str) -> List[str]:
+    # "cmn-Hans-CN" answers requests for "cmn", "cmn-Hans" and "cmn-Hans-CN"
+    parts = language_code.split('-')
+    return ['-'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def build_voice_index(voices: List[dict]) -> Dict[str, Dict[str, dict]]:
+    """
+    Map every language code (and its shorter prefixes) to its preferred Chirp3-HD female
+    voice and its fallback, the first voice Google lists for it. Same choice as scanning
+    the list per request, done once per catalog refresh.
+    """
+    index = {}
+    for voice in voices:
+        if not voice.get('name') or not voice.get('languageCodes'):
+            continue
+        preferred = 'Chirp3-HD' in voice['name'] and voice.get('ssmlGender') == 'FEMALE'
+        keys = {prefix.lower() for code in voice['languageCodes'] for prefix in language_prefixes(code)}
+        for key in keys:
+            entry = index.setdefault(key, {'preferred': None, 'fallback': voice_config(voice)})
+            if preferred and entry['preferred'] is None:
+                entry['preferred'] = voice_config(voice)
+    return index
+
+
+class VoiceCatalog:
+    """
+    Google TTS voice list, fetched once and kept as a language -> voice index. Lookups after
+    `ttl` seconds still answer from the current index while one background thread refetches.
+    The raw list is saved to `path` so a restarted worker starts warm.
+    """
+
+    def __init__(self, ttl: int = 43200, path: Optional[str] = None):
+        self.ttl = ttl
+        self.path = path
+        self._index = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._counters = {'lookups': 0, 'misses': 0, 'fetches': 0, 'fetch_errors': 0, 'disk_loads': 0}
+
+    def _install(self, voices: List[dict], fetched_at: float):
+        index = build_voice_index(voices)
+        with self._lock:
+            self._index = index
+            # Wall-clock time so the age carries over through the disk file
+            self._fetched_at = fetched_at
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def load_from_disk(self) -> bool:
+        if not self.path:
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as catalog_file:
+                data = json.load(catalog_file)
+            self._install(data['voices'], data['fetched_at'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self._count('disk_loads')
+        return True
+
+    def save_to_disk(self, voices: List[dict], fetched_at: float):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as catalog_file:
+                json.dump({'fetched_at': fetched_at, 'voices': voices}, catalog_file)
+            # Atomic swap: other workers never read a half-written file
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save TTS voice catalog to {self.path}: {e}")
+
+    def _accept(self, voices: List[dict]):
+        fetched_at = time.time()
+        self._install(voices, fetched_at)
+        self._count('fetches')
+        self.save_to_disk(voices, fetched_at)
+        logger.info(f"TTS voice catalog refreshed: {len(voices)} voices")
+
+    def _voices_url(self) -> str:
+        return f"{TTS_VOICES_URL}?key={settings.GOOGLE_API_KEY}"
+
+    def fetch(self):
+        response = http_client.get(self._voices_url(), endpoint='google.tts.voices')
+        response.raise_for_status()
+        self._accept(response.json().get('voices', []))
+
+    async def afetch(self):
+        response = await http_client.aget(self._voices_url(), endpoint='google.tts.voices')
+        response.raise_for_status()
+        self._accept(response.json().get('voices', []))
+
+    def _refresh_in_background(self):
+        try:
+            self.fetch()
+        except Exception as e:
+            self._count('fetch_errors')
+            logger.error(f"TTS voice catalog refresh failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _schedule_refresh(self):
+        with self._lock:
+            if self._refreshing or time.time() - self._fetched_at < self.ttl:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name='tts-voice-catalog', daemon=True).start()
+
+    def ensure_loaded(self):
+        """Cold start: the disk copy if there is one (refreshed in the background when stale), else a blocking fetch."""
+        if self._index is None:
+            # One thread does the cold load; concurrent first requests wait for it
+            with self._load_lock:
+                if self._index is None and not self.load_from_disk():
+                    self.fetch()
+        self._schedule_refresh()
+
+    async def aensure_loaded(self):
+        if self._index is None and not self.load_from_disk():
+            await self.afetch()
+        self._schedule_refresh()
+
+    def voice_for(self, language_code: str) -> Optional[dict]:
+        """Preferred Chirp3-HD female voice for a loaded catalog, else the first voice for the language, else None."""
+        entry = (self._index or {}).get(language_code.lower())
+        self._count('lookups')
+        if entry is None:
+            self._count('misses')
+            return None
+        return dict(entry['preferred'] or entry['fallback'])
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+            self._fetched_at = 0.0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                'languages': len(self._index) if self._index is not None else 0,
+                'age_seconds': round(time.time() - self._fetched_at, 1) if self._index is not None else None,
+            }
+
+
+_voice_catalog = None
+_voice_catalog_lock = threading.Lock()
+
+
+def get_voice_catalog() -> VoiceCatalog:
+    """Return the process-wide voice catalog, creating it from settings on first use."""
+    global _voice_catalog
+    if _voice_catalog is None:
+        with _voice_catalog_lock:
+            if _voice_catalog is None:
+                _voice_catalog = VoiceCatalog(
+                    ttl=getattr(settings, 'TTS_VOICE_CATALOG_TTL', 43200),
+                    path=getattr(settings, 'TTS_VOICE_CATALOG_PATH', None),
+                )
+    return _voice_catalog